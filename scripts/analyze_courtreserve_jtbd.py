@@ -13,9 +13,12 @@ Author: Claude Code (Anthropic)
 Date: October 26, 2025
 """
 
+import argparse
 import pandas as pd
 import numpy as np
+from scipy import sparse
 import json
+import re
 import warnings
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -24,7 +27,9 @@ from collections import defaultdict, Counter
 
 # Machine learning and clustering
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN, AgglomerativeClustering
+from sklearn.neighbors import NearestNeighbors
+from joblib import Parallel, delayed
 from sklearn.decomposition import PCA
 from sklearn.metrics import silhouette_score, davies_bouldin_score
 
@@ -32,137 +37,493 @@ from sklearn.metrics import silhouette_score, davies_bouldin_score
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+import segment_model
+from data_access import load_report
+from figure_render import booking_heatmaps, render_figures
+from report_schema import SCHEMAS
+from stage_trace import StageTrace
+
 warnings.filterwarnings('ignore')
 
 # Set style for visualizations
 sns.set_style('whitegrid')
 plt.rcParams['figure.figsize'] = (12, 8)
 
+class PartnerIndex:
+    """
+    Co-play graph parsed once from the reservations "Members" field.
+
+    Each edge links a reservation's player to one of the other member IDs
+    listed in that reservation ("Name (#ID), Name2 (#ID2)"). Edges are kept
+    sorted by player so one member's partners are a contiguous slice.
+    Reservations are identified by index label, so the index must be unique.
+    """
+
+    def __init__(self, reservations: pd.DataFrame,
+                 player_col: str = 'Player _#', members_col: str = 'Members'):
+        """Parse the members field of every reservation into an edge list."""
+        if not reservations.index.is_unique:
+            raise ValueError("PartnerIndex needs a unique reservations index (use reset_index())")
+        self.row_labels = reservations.index
+
+        players = reservations[player_col]
+        listed = reservations[members_col].notna() & players.notna()
+        found = reservations.loc[listed, members_col].astype(str).str.extractall(r'#(\d+)')[0]
+
+        edge_rows = self.row_labels.get_indexer(found.index.get_level_values(0))
+        edge_players = players.to_numpy(dtype=object)[edge_rows]
+        edge_partners = found.to_numpy(dtype=object)
+
+        # A player is never their own partner; one edge per reservation and pair
+        edges = pd.DataFrame({'row': edge_rows, 'player': edge_players, 'partner': edge_partners})
+        edges = edges[edges['player'] != edges['partner']].drop_duplicates()
+
+        codes, self.member_ids = pd.factorize(pd.concat([edges['player'], edges['partner']], ignore_index=True))
+        self.member_ids = pd.Index(self.member_ids)
+        player_codes = codes[:len(edges)]
+        partner_codes = codes[len(edges):]
+
+        order = np.lexsort((partner_codes, player_codes))
+        self.edge_rows = edges['row'].to_numpy()[order]
+        self.edge_players = player_codes[order]
+        self.edge_partners = partner_codes[order]
+        self._offsets = np.searchsorted(self.edge_players, np.arange(len(self.member_ids) + 1))
+        self._adjacency = None
+
+    def __len__(self) -> int:
+        return len(self.edge_rows)
+
+    def adjacency(self) -> sparse.csr_matrix:
+        """Sparse member × member matrix of shared booking counts (player → partner)."""
+        if self._adjacency is None:
+            n = len(self.member_ids)
+            self._adjacency = sparse.csr_matrix(
+                (np.ones(len(self.edge_rows), dtype=np.int32), (self.edge_players, self.edge_partners)),
+                shape=(n, n)
+            )
+        return self._adjacency
+
+    def partners_of(self, member_id: str, rows=None) -> set:
+        """
+        Unique partners of one member, optionally restricted to a subset of
+        reservations given as index labels of the indexed frame.
+        """
+        code = self.member_ids.get_indexer([member_id])[0]
+        if code < 0:
+            return set()
+
+        lo, hi = self._offsets[code], self._offsets[code + 1]
+        partners = self.edge_partners[lo:hi]
+        if rows is not None:
+            partners = partners[self._row_mask(rows)[self.edge_rows[lo:hi]]]
+
+        return set(self.member_ids[np.unique(partners)])
+
+    def unique_partner_counts(self, rows=None) -> pd.Series:
+        """
+        Number of unique partners per member (members with none are omitted),
+        optionally restricted to a subset of reservations.
+        """
+        players, partners = self.edge_players, self.edge_partners
+        if rows is not None:
+            keep = self._row_mask(rows)[self.edge_rows]
+            players, partners = players[keep], partners[keep]
+
+        n = len(self.member_ids)
+        pairs = np.unique(players.astype(np.int64) * n + partners)
+        counts = np.bincount(pairs // n, minlength=n) if n else np.zeros(0, dtype=np.int64)
+
+        has_partners = counts > 0
+        return pd.Series(counts[has_partners], index=self.member_ids[has_partners])
+
+    def _row_mask(self, rows) -> np.ndarray:
+        """Boolean mask over indexed rows from index labels or a boolean mask."""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            return rows
+        mask = np.zeros(len(self.row_labels), dtype=bool)
+        positions = self.row_labels.get_indexer(rows)
+        mask[positions[positions >= 0]] = True
+        return mask
+
+
 class JTBDAnalyzer:
     """
     Analyzes CourtReserve data to identify JTBD customer segments.
     """
 
-    def __init__(self, data_dir: str = '.'):
-        """Initialize analyzer with data directory."""
+    # Export columns the analysis reads (others are never loaded)
+    # hour/dow are the importer's integer time dimensions of Start Date / Time
+    REPORT_COLUMNS = {
+        'reservations': ['Player _#', 'Player Name', 'Start Date / Time', 'Members', 'Members Count',
+                         'Guests', 'Is Event?', 'Event Name', 'Reservation Type', 'Payment Status',
+                         'hour', 'dow'],
+        'members': ['Member #', 'First Name', 'Last Name', 'Current Membership', 'Total Paid',
+                    'DUPR - Singles', 'DUPR - Doubles'],
+        'transactions': ['Member #', 'Trans. Date', 'Total'],
+        'checkins': ['Player _#', 'Check-in Date/Time', 'Check-In Status'],
+    }
+
+    # Clustering limits: silhouette scores use a sample above SILHOUETTE_SAMPLE_SIZE customers,
+    # K-Means switches to mini-batch at MINIBATCH_MIN_CUSTOMERS, and DBSCAN / hierarchical
+    # clustering (quadratic in customers) are fitted on a sample above QUADRATIC_MAX_CUSTOMERS
+    SILHOUETTE_SAMPLE_SIZE = 5000
+    MINIBATCH_MIN_CUSTOMERS = 50000
+    QUADRATIC_MAX_CUSTOMERS = 5000
+
+    # Tables read one member-ID partition at a time in out-of-core mode (partitions=N)
+    ACTIVITY_TABLES = ['reservations', 'transactions', 'checkins']
+
+    def __init__(self, data_dir: str = '.', start: str = None, end: str = None, partitions: int = None):
+        """
+        Initialize analyzer with output directory and an optional date range
+        (start <= date < end) for reservations, transactions and check-ins.
+
+        With partitions, those three tables are never loaded whole: the stages
+        that need them read one member-ID partition at a time (out_of_core.py)
+        and combine the partitions' results, which match the in-memory ones.
+        """
         self.data_dir = Path(data_dir)
+        self.start = start
+        self.end = end
+        self.partitions = partitions
+        self.table_rows = {}  # Rows per activity table, summed over partitions
         self.reservations = None
         self.members = None
         self.transactions = None
         self.cancellations = None
         self.events = None
         self.checkins = None
+        self.partner_index = None
 
         # Analysis results
         self.customer_features = None
+        self.scaled_features = None  # Standardized clustering features, rows as in customer_features
         self.segments = None
         self.context_switchers = None
 
+    def row_counts(self) -> Dict[str, int]:
+        """Rows currently held per dataset and result (for stage traces)."""
+        tables = {
+            'reservations': self.reservations,
+            'members': self.members,
+            'transactions': self.transactions,
+            'cancellations': self.cancellations,
+            'events': self.events,
+            'checkins': self.checkins,
+            'customer_features': self.customer_features,
+            'segments': self.segments,
+            'context_switchers': self.context_switchers,
+        }
+        counts = {name: len(value) for name, value in tables.items() if value is not None}
+        counts.update({name: rows for name, rows in self.table_rows.items() if name not in counts})
+        if self.partner_index is not None:
+            counts['partner_links'] = len(self.partner_index)
+        return counts
+
     def load_data(self) -> None:
-        """Load all CSV files and perform initial cleaning."""
+        """
+        Load all reports and perform initial cleaning.
+
+        Reports come from courtreserve.db (or the CSV exports when it has not
+        been built) through data_access; only REPORT_COLUMNS are loaded, and
+        the optional date range is applied in the query. In out-of-core mode
+        the ACTIVITY_TABLES are left for the stages to read by partition.
+        """
         print("Loading data files...")
+        dates = {'start': self.start, 'end': self.end}
 
         # Load reservations
-        self.reservations = pd.read_csv(
-            self.data_dir / 'ReservationReport_2025-10-26_03-50-PM.csv',
-            encoding='utf-8-sig'
-        )
-        print(f"  Loaded {len(self.reservations)} reservation records")
+        if self.partitions is None:
+            self._load_activity('reservations')
 
         # Load members
-        self.members = pd.read_csv(
-            self.data_dir / 'MembersReport_2025-10-26_04-58-PM.csv',
-            encoding='utf-8-sig'
-        )
+        self.members = load_report('members', columns=self.REPORT_COLUMNS['members'])
         print(f"  Loaded {len(self.members)} member records")
 
         # Load transactions
-        self.transactions = pd.read_csv(
-            self.data_dir / 'Transactions-2025.csv',
-            encoding='utf-8-sig'
-        )
-        print(f"  Loaded {len(self.transactions)} transaction records")
+        if self.partitions is None:
+            self._load_activity('transactions')
 
         # Load cancellations
-        self.cancellations = pd.read_csv(
-            self.data_dir / 'CancellationsReport_2025-10-26_09-49-PM.csv',
-            encoding='utf-8-sig'
-        )
+        self.cancellations = load_report('cancellations', **dates)
         print(f"  Loaded {len(self.cancellations)} cancellation records")
 
         # Load events
-        self.events = pd.read_csv(
-            self.data_dir / 'Event_Summary.csv',
-            encoding='utf-8-sig'
-        )
+        self.events = load_report('event_summary', **dates)
         print(f"  Loaded {len(self.events)} event summary records")
 
         # Load check-ins
-        self.checkins = pd.read_csv(
-            self.data_dir / 'CheckinReports2025-10-26_09-55-PM.csv',
-            encoding='utf-8-sig'
-        )
-        print(f"  Loaded {len(self.checkins)} check-in records")
+        if self.partitions is None:
+            self._load_activity('checkins')
+        else:
+            print(f"  Reservations, transactions and check-ins: read in {self.partitions} member-ID partitions")
 
         print("\nData loaded successfully!")
 
+    def _load_activity(self, table: str, partition: Tuple[int, int] = None) -> None:
+        """Load one of the ACTIVITY_TABLES (or one member-ID partition of it) onto the analyzer."""
+        df = load_report(table, columns=self.REPORT_COLUMNS[table], start=self.start, end=self.end,
+                         partition=partition)
+        setattr(self, table, df)
+        if partition is None:
+            print(f"  Loaded {len(df)} {table[:-1].replace('checkin', 'check-in')} records")
+
+    def _activity_partitions(self):
+        """
+        Load and clean the ACTIVITY_TABLES one member-ID partition at a time,
+        yielding with each partition on the analyzer (as self.reservations,
+        self.transactions, self.checkins and self.partner_index). A member's
+        rows are all in one partition, and each partition's frames are indexed
+        by the rows' positions in the full tables.
+        """
+        self.table_rows = {}
+        for index in range(self.partitions):
+            for table in self.ACTIVITY_TABLES:
+                self._load_activity(table, partition=(index, self.partitions))
+                self.table_rows[table] = self.table_rows.get(table, 0) + len(getattr(self, table))
+            if len(self.reservations) == 0:
+                continue
+            self._clean_activity()
+            yield index
+        self.reservations = self.transactions = self.checkins = self.partner_index = None
+
     def clean_data(self) -> None:
         """Clean and standardize data across all datasets."""
         print("\nCleaning data...")
 
-        # Clean reservations
-        self.reservations['Start Date / Time'] = pd.to_datetime(
-            self.reservations['Start Date / Time'],
-            format='%m/%d/%Y %I:%M %p',
-            errors='coerce'
-        )
-        self.reservations['Player _#'] = self.reservations['Player _#'].str.replace('#', '').str.strip()
-
         # Clean members - extract member number
         self.members['Member #'] = self.members['Member #'].astype(str)
 
+        if self.partitions is None:
+            self._clean_activity()
+            print(f"  Indexed {len(self.partner_index):,} partner links")
+
+        print("  Data cleaning complete")
+
+    def _clean_activity(self) -> None:
+        """Parse and standardize the reservations, transactions and check-ins, and index partners."""
+        # Parse dates with the formats declared in report_schema
+        SCHEMAS['reservations'].parse_dates(self.reservations, raw=True)
+        SCHEMAS['transactions'].parse_dates(self.transactions, raw=True)
+        SCHEMAS['checkins'].parse_dates(self.checkins, raw=True)
+
+        # Integer hour/dow of each reservation (derived here when the database predates them)
+        if not {'hour', 'dow'} <= set(self.reservations.columns):
+            SCHEMAS['reservations'].add_dimensions(self.reservations, source='Start Date / Time')
+
+        # Clean reservations
+        self.reservations['Player _#'] = self.reservations['Player _#'].str.replace('#', '').str.strip()
+
         # Clean transactions
-        self.transactions['Trans. Date'] = pd.to_datetime(
-            self.transactions['Trans. Date'],
-            errors='coerce'
-        )
         self.transactions['Member #'] = self.transactions['Member #'].astype(str)
 
         # Clean checkins
-        self.checkins['Check-in Date/Time'] = pd.to_datetime(
-            self.checkins['Check-in Date/Time'],
-            format='%m/%d/%Y %I:%M %p',
-            errors='coerce'
-        )
         self.checkins['Player _#'] = self.checkins['Player _#'].astype(str)
 
-        print("  Data cleaning complete")
+        # Parse the "Members" field once into a co-play edge list
+        self.partner_index = PartnerIndex(self.reservations)
 
-    def engineer_features(self) -> pd.DataFrame:
+    def engineer_features(self, per_member: bool = False) -> pd.DataFrame:
         """
         Engineer behavioral features for clustering across all 3 JTBD dimensions:
         1. JTBD signals (what progress they're making)
         2. Value preference signals (how they measure success)
         3. Willingness-to-pay signals (what they'll spend)
+
+        By default every feature is computed with a handful of grouped passes
+        over each table. per_member=True runs the original member-by-member
+        extraction, kept as the reference implementation for parity checks
+        (it needs the tables in memory). In out-of-core mode the grouped
+        passes run on each member-ID partition.
         """
         print("\nEngineering features...")
 
-        # Get unique members from reservations
-        member_ids = self.reservations['Player _#'].dropna().unique()
-        features = []
+        if self.partitions is not None and not per_member:
+            self.customer_features = self._engineer_features_partitioned()
+        elif per_member:
+            # Get unique members from reservations
+            member_ids = self.reservations['Player _#'].dropna().unique()
+            features = []
 
-        for member_id in member_ids:
-            feature_dict = self._extract_member_features(member_id)
-            if feature_dict is not None:
-                features.append(feature_dict)
+            for member_id in member_ids:
+                feature_dict = self._extract_member_features(member_id)
+                if feature_dict is not None:
+                    features.append(feature_dict)
 
-        self.customer_features = pd.DataFrame(features)
+            self.customer_features = pd.DataFrame(features)
+        else:
+            self.customer_features = self._engineer_features_grouped()
 
         print(f"  Engineered {len(self.customer_features.columns)} features for {len(self.customer_features)} customers")
         print(f"  Features: {', '.join(self.customer_features.columns[:10])}...")
 
         return self.customer_features
 
+    def _engineer_features_grouped(self) -> pd.DataFrame:
+        """
+        Compute the same feature table as _extract_member_features for every
+        member at once: one grouped aggregation per source table instead of
+        four boolean-mask scans per member.
+        """
+        res = self.reservations[self.reservations['Player _#'].notna()]
+        member_ids = pd.Index(res['Player _#'].unique())
+
+        # === Per-reservation flags, aggregated per member in one pass ===
+        start = res['Start Date / Time']
+        hours = res['hour']
+        dow = res['dow']
+        is_event = res['Is Event?'] == 'TRUE'
+        event_names = res['Event Name'].fillna('').str.lower()
+        res_types = res['Reservation Type']
+
+        work = pd.DataFrame({
+            'member_id': res['Player _#'],
+            'morning': hours.between(6, 11),
+            'afternoon': hours.between(12, 16),
+            'evening': hours.between(17, 21),
+            'weekday': dow.between(0, 4),
+            'weekend': (dow == 5) | (dow == 6),
+            'hour': hours.astype(float),
+            'dow': dow.astype(float),
+            'party_size': res['Members Count'],
+            'solo': res['Members Count'] == 1,
+            'has_guests': res['Guests'].notna(),
+            'is_event': is_event,
+            'drills': is_event & event_names.str.contains('drill|skill', case=False),
+            'social': is_event & event_names.str.contains('social|mixer|open play', case=False),
+            'competitive': is_event & event_names.str.contains('tournament|advanced|expert', case=False),
+            'start': start,
+            'organized': res_types.str.contains('Doubles.*Add Players Now', case=False, na=False),
+            'dropin': res_types.str.contains('drop', case=False, na=False),
+            'paid': res['Payment Status'].isin(['Paid', 'Partially Paid']),
+        })
+
+        agg = work.groupby('member_id', sort=False).agg(
+            n=('member_id', 'size'),
+            morning=('morning', 'sum'),
+            afternoon=('afternoon', 'sum'),
+            evening=('evening', 'sum'),
+            weekday=('weekday', 'sum'),
+            weekend=('weekend', 'sum'),
+            hour_std=('hour', 'std'),
+            dow_std=('dow', 'std'),
+            party_size=('party_size', 'mean'),
+            solo=('solo', 'sum'),
+            has_guests=('has_guests', 'sum'),
+            events=('is_event', 'sum'),
+            drills=('drills', 'sum'),
+            social=('social', 'sum'),
+            competitive=('competitive', 'sum'),
+            first_start=('start', 'min'),
+            last_start=('start', 'max'),
+            organized=('organized', 'sum'),
+            dropin=('dropin', 'sum'),
+            paid=('paid', 'sum'),
+        ).reindex(member_ids)
+
+        n = agg['n'].to_numpy()
+        multi = n > 1
+
+        # Booking frequency; members whose dates all failed to parse fall back to 0
+        date_range = ((agg['last_start'] - agg['first_start']).dt.days + 1).to_numpy(dtype=float)
+        has_range = date_range > 0
+
+        unique_partners = self.partner_index.unique_partner_counts().reindex(member_ids, fill_value=0).to_numpy()
+
+        # === Check-ins ===
+        checkin_groups = self.checkins.groupby('Player _#', sort=False)
+        checkin_counts = checkin_groups.size().reindex(member_ids, fill_value=0).to_numpy()
+        checked_in = (self.checkins['Check-In Status'] == 'Checked-In').groupby(
+            self.checkins['Player _#'], sort=False
+        ).sum().reindex(member_ids, fill_value=0).to_numpy()
+        has_checkins = checkin_counts > 0
+
+        # === Transactions ===
+        spend = self.transactions.groupby('Member #', sort=False)['Total'].agg(['sum', 'mean'])
+        has_transactions = member_ids.isin(spend.index)
+        spend = spend.astype(object).reindex(member_ids)
+
+        # === Member roster (first matching row, as .iloc[0] did) ===
+        roster = self.members.drop_duplicates('Member #', keep='first').set_index('Member #')
+        has_info = member_ids.isin(roster.index)
+        info = roster.astype(object).reindex(member_ids)
+
+        tier_codes, tier_values = pd.factorize(info['Current Membership'])
+        tier_table = np.array([self._encode_membership_tier(m) for m in tier_values] +
+                              [self._encode_membership_tier(np.nan)], dtype=np.int64)
+        membership_tier = np.where(has_info, tier_table[tier_codes], 0)
+
+        singles = info['DUPR - Singles'] if 'DUPR - Singles' in info.columns else pd.Series(None, index=info.index)
+        doubles = info['DUPR - Doubles'] if 'DUPR - Doubles' in info.columns else pd.Series(None, index=info.index)
+        dupr = [self._parse_dupr(s, d) for s, d in zip(singles.to_numpy(dtype=object), doubles.to_numpy(dtype=object))]
+
+        features = pd.DataFrame({
+            'member_id': member_ids.to_numpy(),
+            'pct_morning': agg['morning'].to_numpy() / n,
+            'pct_afternoon': agg['afternoon'].to_numpy() / n,
+            'pct_evening': agg['evening'].to_numpy() / n,
+            'pct_weekday': agg['weekday'].to_numpy() / n,
+            'pct_weekend': agg['weekend'].to_numpy() / n,
+            'time_consistency': self._fill_absent(1 / (agg['hour_std'] + 1), multi),
+            'day_consistency': self._fill_absent(1 / (agg['dow_std'] + 1), multi),
+            'unique_partners': unique_partners,
+            'partner_variety_rate': unique_partners / n,
+            'avg_party_size': agg['party_size'].to_numpy(),
+            'solo_rate': agg['solo'].to_numpy() / n,
+            'guest_booking_rate': agg['has_guests'].to_numpy() / n,
+            'event_participation_rate': agg['events'].to_numpy() / n,
+            'total_events': agg['events'].to_numpy(),
+            'drills_events': agg['drills'].to_numpy(),
+            'social_events': agg['social'].to_numpy(),
+            'competitive_events': agg['competitive'].to_numpy(),
+            'bookings_per_month': self._fill_absent(n / date_range * 30, has_range),
+            'total_bookings': n,
+            'check_in_rate': self._fill_absent(checked_in / np.maximum(checkin_counts, 1), has_checkins),
+            'has_checkin_data': has_checkins.astype(np.int64),
+            'total_spend': self._fill_absent(spend['sum'], has_transactions),
+            'avg_transaction': self._fill_absent(spend['mean'], has_transactions),
+            'spend_per_booking': self._fill_absent(spend['sum'].to_numpy() / n, has_transactions),
+            'membership_tier': membership_tier,
+            'total_paid': self._fill_absent(info['Total Paid'], has_info),
+            'dupr_level': self._fill_absent(dupr, has_info),
+            'organized_bookings_rate': agg['organized'].to_numpy() / n,
+            'dropsin_rate': agg['dropin'].to_numpy() / n,
+            'payment_rate': agg['paid'].to_numpy() / n,
+        })
+
+        return features
+
+    def _engineer_features_partitioned(self) -> pd.DataFrame:
+        """
+        _engineer_features_grouped() on one member-ID partition at a time.
+        Every feature depends only on the member's own rows, so each
+        partition's features are final; they are put back in the order the
+        members first appear in the reservations, as in the in-memory path.
+        """
+        parts = []
+        first_seen = []
+        for index in self._activity_partitions():
+            features = self._engineer_features_grouped()
+            res = self.reservations[self.reservations['Player _#'].notna()]
+            first_row = pd.Series(res.index, index=res['Player _#'].to_numpy()).groupby(level=0, sort=False).min()
+            parts.append(features)
+            first_seen.append(first_row.reindex(features['member_id']).to_numpy())
+            print(f"  Partition {index + 1}/{self.partitions}: {len(features):,} customers")
+
+        features = pd.concat(parts, ignore_index=True)
+        return features.iloc[np.argsort(np.concatenate(first_seen), kind='stable')].reset_index(drop=True)
+
+    def _fill_absent(self, values, present: np.ndarray, fallback: Any = 0) -> pd.Series:
+        """
+        Substitute the literal fallback used by _extract_member_features for
+        members without data, then re-infer the dtype the way
+        pd.DataFrame(list_of_dicts) does (all-fallback columns stay int64).
+        """
+        filled = np.asarray(values, dtype=object).copy()
+        filled[~np.asarray(present)] = fallback
+        return pd.Series(filled).infer_objects()
+
     def _extract_member_features(self, member_id: str) -> Dict[str, Any]:
         """Extract all behavioral features for a single member."""
 
@@ -196,12 +557,11 @@ class JTBDAnalyzer:
 
         # === SOCIAL PATTERNS (Value Preference Signals) ===
 
-        # Partner variety
+        # Partner variety (parsed per reservation here, independently of PartnerIndex)
         all_members_field = member_reservations['Members'].dropna()
         unique_partners = set()
         for members_str in all_members_field:
             # Extract member IDs from format "Name (#ID), Name2 (#ID2)"
-            import re
             partner_ids = re.findall(r'#(\d+)', str(members_str))
             unique_partners.update([p for p in partner_ids if p != member_id])
 
@@ -276,9 +636,9 @@ class JTBDAnalyzer:
             features['dupr_level'] = 0
 
         # Reservation type preferences (organized vs. drop-in)
-        res_types = member_reservations['Reservation Type'].fillna('')
-        features['organized_bookings_rate'] = res_types.str.contains('Doubles.*Add Players Now', case=False).sum() / len(member_reservations)
-        features['dropsin_rate'] = res_types.str.contains('drop', case=False).sum() / len(member_reservations)
+        res_types = member_reservations['Reservation Type']
+        features['organized_bookings_rate'] = res_types.str.contains('Doubles.*Add Players Now', case=False, na=False).sum() / len(member_reservations)
+        features['dropsin_rate'] = res_types.str.contains('drop', case=False, na=False).sum() / len(member_reservations)
 
         # Payment behavior
         paid_bookings = member_reservations[member_reservations['Payment Status'].isin(['Paid', 'Partially Paid'])]
@@ -315,59 +675,107 @@ class JTBDAnalyzer:
             pass
         return 0.0
 
-    def cluster_customers(self, n_clusters_range: Tuple[int, int] = (3, 8)) -> Dict[str, Any]:
+    def cluster_customers(self, n_clusters_range: Tuple[int, int] = (3, 8), n_jobs: int = 1,
+                          patience: int = None) -> Dict[str, Any]:
         """
         Run multiple clustering algorithms to discover natural segments.
 
+        K-Means is fitted for every k in n_clusters_range (n_jobs at a time)
+        and the best silhouette score wins. With patience set, the scan stops
+        once the score has fallen that many k in a row. Large customer bases
+        switch to mini-batch K-Means, sampled silhouette scores, and DBSCAN /
+        hierarchical clustering fitted on a sample (see the class limits).
+
         Returns dictionary with clustering results and metrics.
         """
         print("\nRunning clustering analysis...")
 
-        # Prepare features for clustering (exclude non-numeric and ID columns)
-        numeric_cols = [col for col in self.customer_features.columns
-                       if col != 'member_id' and self.customer_features[col].dtype in [np.float64, np.int64]]
-
+        numeric_cols = self.clustering_columns()
         X = self.customer_features[numeric_cols].fillna(0)
 
         # Standardize features
         scaler = StandardScaler()
         X_scaled = scaler.fit_transform(X)
+        self.scaled_features = X_scaled
+        n = len(X_scaled)
+
+        # Same silhouette sample for every k, so the scores stay comparable
+        sample_size = self.SILHOUETTE_SAMPLE_SIZE if n > self.SILHOUETTE_SAMPLE_SIZE else None
+        minibatch = n >= self.MINIBATCH_MIN_CUSTOMERS
+
+        def fit_k(k):
+            if minibatch:
+                kmeans = MiniBatchKMeans(n_clusters=k, random_state=42, n_init=3, batch_size=4096)
+            else:
+                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+            labels = kmeans.fit_predict(X_scaled)
+            if len(set(labels)) < 2:  # Need at least 2 clusters for silhouette
+                return k, kmeans, None
+            return k, kmeans, silhouette_score(X_scaled, labels, sample_size=sample_size, random_state=42)
 
         # Try different numbers of clusters
         best_kmeans = None
         best_score = -1
         best_k = None
-
-        print("\n  Testing K-Means with different cluster counts...")
-        for k in range(n_clusters_range[0], n_clusters_range[1] + 1):
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            labels = kmeans.fit_predict(X_scaled)
-
-            if len(set(labels)) > 1:  # Need at least 2 clusters for silhouette
-                score = silhouette_score(X_scaled, labels)
+        k_scores = {}
+        previous, falling = None, 0
+
+        print(f"\n  Testing {'mini-batch ' if minibatch else ''}K-Means with different cluster counts"
+              f"{f' (silhouette on {sample_size:,} sampled customers)' if sample_size else ''}...")
+        ks = list(range(n_clusters_range[0], n_clusters_range[1] + 1))
+        batch = max(1, n_jobs)
+        for i in range(0, len(ks), batch):
+            # Threads: K-Means and silhouette spend their time in native code
+            fits = Parallel(n_jobs=batch, prefer='threads')(delayed(fit_k)(k) for k in ks[i:i + batch])
+            for k, kmeans, score in fits:
+                if score is None:
+                    continue
+                k_scores[k] = score
                 print(f"    k={k}: silhouette={score:.3f}, inertia={kmeans.inertia_:.1f}")
 
                 if score > best_score:
                     best_score = score
                     best_kmeans = kmeans
                     best_k = k
+                falling = falling + 1 if previous is not None and score < previous else 0
+                previous = score
+                if patience and falling >= patience:
+                    break
+            if patience and falling >= patience:
+                if k < ks[-1]:
+                    print(f"    Stopped early: silhouette fell for {falling} consecutive k")
+                break
 
         print(f"\n  Best K-Means: k={best_k}, silhouette={best_score:.3f}")
 
         # Use best K-Means result
         self.customer_features['cluster_kmeans'] = best_kmeans.predict(X_scaled)
 
+        # DBSCAN and hierarchical clustering are quadratic in customers: fit them on a sample above the limit
+        sample = None
+        if n > self.QUADRATIC_MAX_CUSTOMERS:
+            sample = np.sort(np.random.default_rng(42).choice(n, self.QUADRATIC_MAX_CUSTOMERS, replace=False))
+            print(f"\n  Fitting DBSCAN and hierarchical clustering on {len(sample):,} of {n:,} customers")
+
         # Also try DBSCAN for density-based clustering
         print("\n  Running DBSCAN...")
         dbscan = DBSCAN(eps=0.5, min_samples=5)
-        self.customer_features['cluster_dbscan'] = dbscan.fit_predict(X_scaled)
+        if sample is None:
+            self.customer_features['cluster_dbscan'] = dbscan.fit_predict(X_scaled)
+        else:
+            dbscan.fit(X_scaled[sample])
+            self.customer_features['cluster_dbscan'] = self._assign_dbscan(dbscan, X_scaled)
         n_dbscan_clusters = len(set(self.customer_features['cluster_dbscan'])) - (1 if -1 in self.customer_features['cluster_dbscan'] else 0)
         print(f"    DBSCAN found {n_dbscan_clusters} clusters (+ {(self.customer_features['cluster_dbscan'] == -1).sum()} noise points)")
 
         # Hierarchical clustering
         print("\n  Running Hierarchical Clustering...")
         hierarchical = AgglomerativeClustering(n_clusters=best_k)
-        self.customer_features['cluster_hierarchical'] = hierarchical.fit_predict(X_scaled)
+        if sample is None:
+            self.customer_features['cluster_hierarchical'] = hierarchical.fit_predict(X_scaled)
+        else:
+            self.customer_features['cluster_hierarchical'] = self._assign_nearest_centroid(
+                X_scaled, X_scaled[sample], hierarchical.fit_predict(X_scaled[sample]))
 
         # Use K-Means as primary clustering method
         self.customer_features['segment'] = self.customer_features['cluster_kmeans']
@@ -376,6 +784,8 @@ class JTBDAnalyzer:
         clustering_results = {
             'best_k': best_k,
             'silhouette_score': best_score,
+            'silhouette_by_k': k_scores,
+            'silhouette_sample_size': sample_size,
             'davies_bouldin_score': davies_bouldin_score(X_scaled, self.customer_features['segment']),
             'n_customers': len(self.customer_features),
             'feature_names': numeric_cols,
@@ -387,6 +797,67 @@ class JTBDAnalyzer:
 
         return clustering_results
 
+    def clustering_columns(self) -> List[str]:
+        """Feature columns clustered on (numeric, excluding IDs and cluster labels)."""
+        return [col for col in self.customer_features.columns
+                if col != 'member_id' and self.customer_features[col].dtype in [np.float64, np.int64]]
+
+    def assign_segments(self, bundle: Dict[str, Any], model_path: str = segment_model.MODEL_PATH) -> Dict[str, Any]:
+        """
+        Assign segments from a saved model (segment_model.load_model()) instead
+        of reclustering: unchanged customers keep their saved segment, new and
+        changed ones get the nearest saved centroid, and the model file's
+        assignments are updated.
+
+        Nothing is assigned when the customers have drifted from the ones
+        the model was trained on; the returned 'assigned' is then False and
+        cluster_customers() should be run.
+        """
+        print("\nAssigning segments from saved model...")
+
+        X_scaled = bundle['scaler'].transform(self.customer_features[bundle['feature_names']].fillna(0))
+        drift = segment_model.check_drift(bundle, X_scaled)
+        print(f"  Drift: distance ratio {drift['distance_ratio']:.2f}, "
+              f"{drift['outside_share']:.1%} outside training p95, mean shift {drift['mean_shift']:.2f} SD")
+        if drift['drifted']:
+            print(f"  ⚠️  Drift over limits ({', '.join(drift['drifted'])}); refitting")
+            return {'assigned': False, 'drift': drift}
+
+        segments, digests, scored = segment_model.assign_segments(bundle, self.customer_features, X_scaled)
+        self.scaled_features = X_scaled
+        self.customer_features['cluster_kmeans'] = segments
+        self.customer_features['segment'] = segments
+
+        # Later runs only score what changes after today
+        bundle['digests'] = digests
+        bundle['assignments'] = pd.Series(segments, index=digests.index)
+        bundle['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        segment_model.write_bundle(bundle, model_path)
+
+        print(f"  Scored {scored:,} new/changed of {len(segments):,} customers "
+              f"(model trained {bundle['trained_at']}, k={bundle['best_k']})")
+        return {'assigned': True, 'drift': drift, 'scored': scored, 'best_k': bundle['best_k']}
+
+    @staticmethod
+    def _assign_dbscan(dbscan: DBSCAN, X: np.ndarray) -> np.ndarray:
+        """Label every row with the cluster of its nearest core sample within eps (-1: noise)."""
+        labels = np.full(len(X), -1)
+        if len(dbscan.core_sample_indices_) == 0:
+            return labels
+        distance, nearest = NearestNeighbors(n_neighbors=1).fit(dbscan.components_).kneighbors(X)
+        core_labels = dbscan.labels_[dbscan.core_sample_indices_]
+        within = distance[:, 0] <= dbscan.eps
+        labels[within] = core_labels[nearest[within, 0]]
+        return labels
+
+    @staticmethod
+    def _assign_nearest_centroid(X: np.ndarray, X_fit: np.ndarray, fit_labels: np.ndarray) -> np.ndarray:
+        """Label every row with the cluster whose centroid (over the fitted rows) is closest."""
+        clusters = np.unique(fit_labels)
+        centroids = np.vstack([X_fit[fit_labels == c].mean(axis=0) for c in clusters])
+        distances = (X ** 2).sum(axis=1)[:, None] - 2 * X @ centroids.T + (centroids ** 2).sum(axis=1)
+        return clusters[distances.argmin(axis=1)]
+
     def profile_segments(self) -> Dict[int, Dict[str, Any]]:
         """
         Create detailed profiles for each discovered segment.
@@ -553,14 +1024,40 @@ class JTBDAnalyzer:
                 'confidence': 'medium'
             }
 
-    def identify_context_switchers(self, min_bookings: int = 5) -> List[Dict[str, Any]]:
+    # Context pairs compared for every member: (dimension, context_a, context_b)
+    CONTEXT_PAIRS = [
+        ('time_of_day', 'morning', 'evening'),
+        ('day_of_week', 'weekday', 'weekend'),
+    ]
+
+    def identify_context_switchers(self, min_bookings: int = 5, per_member: bool = False) -> List[Dict[str, Any]]:
         """
         Identify customers who exhibit multiple behavioral patterns in different contexts.
 
         Critical for understanding that segments are context-based, not person-based.
+
+        By default every reservation is tagged with its contexts once and all
+        members are summarized with one grouped pass per context.
+        per_member=True runs the original member-by-member comparison, kept
+        as the reference implementation for parity checks.
         """
         print("\nIdentifying context switchers...")
 
+        if self.partitions is not None and not per_member:
+            # Each partition finds its own members, in customer_features order
+            context_switchers = []
+            for _ in self._activity_partitions():
+                context_switchers += self._batched_context_switchers(min_bookings)
+            order = pd.Series(np.arange(len(self.customer_features)), index=self.customer_features['member_id'])
+            self.context_switchers = sorted(context_switchers, key=lambda switcher: order[switcher['member_id']])
+            print(f"  Found {len(self.context_switchers)} context switchers")
+            return self.context_switchers
+
+        if not per_member:
+            self.context_switchers = self._batched_context_switchers(min_bookings)
+            print(f"  Found {len(self.context_switchers)} context switchers")
+            return self.context_switchers
+
         context_switchers = []
 
         # Only analyze customers with sufficient bookings
@@ -628,6 +1125,95 @@ class JTBDAnalyzer:
 
         return context_switchers
 
+    def _context_masks(self) -> Dict[str, pd.Series]:
+        """Reservation masks for each booking context (same hour/day ranges as the per-member path)."""
+        hours = self.reservations['hour']
+        weekday = self.reservations['dow'].between(0, 4).fillna(False)
+        return {
+            'morning': hours.between(6, 11).fillna(False),
+            'evening': hours.between(17, 21).fillna(False),
+            'weekday': weekday,
+            'weekend': ~weekday,
+        }
+
+    def _batched_context_switchers(self, min_bookings: int) -> List[Dict[str, Any]]:
+        """All members' context summaries in one grouped pass per context, compared as arrays."""
+        res = self.reservations
+        work = pd.DataFrame({
+            'member_id': res['Player _#'],
+            'party_size': res['Members Count'],
+            'guest': res['Guests'].notna(),
+            'event': (res['Is Event?'] == 'TRUE').fillna(False).astype(bool),
+        })
+
+        # Members with enough bookings, in customer_features order
+        totals = work['member_id'].value_counts()
+        active = self.customer_features.loc[self.customer_features['total_bookings'] >= min_bookings, 'member_id']
+        active = pd.Index(active[active.map(totals).fillna(0).to_numpy() >= min_bookings])
+
+        # Per-(member, context) summaries aligned with the active members
+        summaries = {}
+        for context, mask in self._context_masks().items():
+            mask = mask.to_numpy(dtype=bool)
+            grouped = work[mask].groupby('member_id', sort=False).agg(
+                n_bookings=('guest', 'size'),
+                avg_party_size=('party_size', 'mean'),
+                has_guests=('guest', 'any'),
+                events=('event', 'sum'),
+            ).reindex(active)
+            n = grouped['n_bookings'].fillna(0).to_numpy(dtype=np.int64)
+            summaries[context] = {
+                'n_bookings': n,
+                'avg_party_size': grouped['avg_party_size'].to_numpy(dtype=np.float64),
+                'has_guests': grouped['has_guests'].fillna(False).to_numpy(dtype=bool),
+                'n_unique_partners': self.partner_index.unique_partner_counts(rows=mask)
+                                         .reindex(active, fill_value=0).to_numpy(dtype=np.int64),
+                'event_rate': grouped['events'].to_numpy(dtype=np.float64) / np.maximum(n, 1),
+            }
+
+        # Same thresholds as _patterns_differ(), for every member at once
+        differs = {}
+        for dimension, a, b in self.CONTEXT_PAIRS:
+            pa, pb = summaries[a], summaries[b]
+            with np.errstate(invalid='ignore'):
+                differs[dimension] = (
+                    (pa['n_bookings'] >= 2) & (pb['n_bookings'] >= 2)
+                    & ((np.abs(pa['avg_party_size'] - pb['avg_party_size']) > 1)
+                       | (np.abs(pa['n_unique_partners'] - pb['n_unique_partners']) > 3)
+                       | (np.abs(pa['event_rate'] - pb['event_rate']) > 0.3))
+                )
+
+        def pattern(context, i):
+            summary = summaries[context]
+            return {
+                'n_bookings': int(summary['n_bookings'][i]),
+                'avg_party_size': summary['avg_party_size'][i],
+                'has_guests': summary['has_guests'][i],
+                'n_unique_partners': int(summary['n_unique_partners'][i]),
+                'event_rate': summary['event_rate'][i],
+            }
+
+        # Name from each member's first reservation
+        names = res.drop_duplicates('Player _#').set_index('Player _#')['Player Name']
+
+        context_switchers = []
+        for i in np.flatnonzero(np.logical_or.reduce(list(differs.values()))):
+            member_id = active[i]
+            context_switchers.append({
+                'member_id': member_id,
+                'member_name': names[member_id],
+                'total_bookings': int(totals[member_id]),
+                'contexts': [{
+                    'dimension': dimension,
+                    'context_a': a,
+                    'context_b': b,
+                    'pattern_a': pattern(a, i),
+                    'pattern_b': pattern(b, i)
+                } for dimension, a, b in self.CONTEXT_PAIRS if differs[dimension][i]]
+            })
+
+        return context_switchers
+
     def _summarize_context_pattern(self, bookings: pd.DataFrame, member_id: str) -> Dict[str, Any]:
         """Summarize behavioral pattern for a specific context."""
 
@@ -635,7 +1221,6 @@ class JTBDAnalyzer:
         all_members_field = bookings['Members'].dropna()
         unique_partners = set()
         for members_str in all_members_field:
-            import re
             partner_ids = re.findall(r'#(\d+)', str(members_str))
             unique_partners.update([p for p in partner_ids if p != member_id])
 
@@ -753,12 +1338,13 @@ class JTBDAnalyzer:
         # Data Quality Assessment
         report.append("\n## Data Quality Assessment")
         report.append("\n### Data Coverage")
-        report.append(f"- **Reservations:** {len(self.reservations)} records")
+        rows = self.row_counts()
+        report.append(f"- **Reservations:** {rows['reservations']} records")
         report.append(f"- **Members:** {len(self.members)} records")
-        report.append(f"- **Transactions:** {len(self.transactions)} records")
+        report.append(f"- **Transactions:** {rows['transactions']} records")
         report.append(f"- **Cancellations:** {len(self.cancellations)} records")
         report.append(f"- **Events:** {len(self.events)} event sessions")
-        report.append(f"- **Check-ins:** {len(self.checkins)} records")
+        report.append(f"- **Check-ins:** {rows['checkins']} records")
 
         report.append("\n### Limitations")
         report.append("- **Partial month:** October 1-26 (26 days). Monthly metrics are extrapolated.")
@@ -778,7 +1364,9 @@ class JTBDAnalyzer:
         results = {
             'summary': {
                 'total_customers': int(len(self.customer_features)),
-                'total_bookings': int(self.reservations['Player _#'].value_counts().sum()),
+                'total_bookings': int(self.reservations['Player _#'].value_counts().sum()
+                                      if self.reservations is not None
+                                      else self.customer_features['total_bookings'].sum()),
                 'date_range': 'October 1-26, 2025',
                 'analysis_date': datetime.now().isoformat(),
                 'segments_discovered': len(self.segments)
@@ -870,135 +1458,210 @@ class JTBDAnalyzer:
 
         print(f"  JSON results saved to {output_file}")
 
-    def create_visualizations(self, output_dir: str = '.') -> None:
-        """Create visualization plots."""
+    def create_visualizations(self, output_dir: str = '.', jobs: int = None, force: bool = False) -> None:
+        """
+        Create visualization plots.
+
+        The figures' arrays are computed here (reusing the clustering's
+        standardized features) and drawn by figure_render in parallel worker
+        processes; figures whose data is unchanged since the last run are
+        not redrawn unless force is set.
+        """
         print("\nCreating visualizations...")
 
         output_path = Path(output_dir)
+        segments = self.customer_features['segment'].to_numpy()
 
         # 1. Cluster scatter plot (PCA)
-        numeric_cols = [col for col in self.customer_features.columns
-                       if col not in ['member_id', 'segment', 'cluster_kmeans', 'cluster_dbscan', 'cluster_hierarchical']
-                       and self.customer_features[col].dtype in [np.float64, np.int64]]
-
-        X = self.customer_features[numeric_cols].fillna(0)
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
+        X_scaled = self.scaled_features
+        if X_scaled is None:
+            numeric_cols = [col for col in self.customer_features.columns
+                           if col not in ['member_id', 'segment', 'cluster_kmeans', 'cluster_dbscan', 'cluster_hierarchical']
+                           and self.customer_features[col].dtype in [np.float64, np.int64]]
+            X_scaled = StandardScaler().fit_transform(self.customer_features[numeric_cols].fillna(0))
 
         pca = PCA(n_components=2)
         X_pca = pca.fit_transform(X_scaled)
 
-        plt.figure(figsize=(12, 8))
-        scatter = plt.scatter(X_pca[:, 0], X_pca[:, 1],
-                            c=self.customer_features['segment'],
-                            cmap='viridis',
-                            alpha=0.6,
-                            s=50)
-        plt.colorbar(scatter, label='Segment')
-        plt.xlabel(f'PC1 ({pca.explained_variance_ratio_[0]*100:.1f}% variance)')
-        plt.ylabel(f'PC2 ({pca.explained_variance_ratio_[1]*100:.1f}% variance)')
-        plt.title('Customer Segments (PCA Projection)')
-        plt.tight_layout()
-        plt.savefig(output_path / 'segment_clusters.png', dpi=300)
-        print("  Saved: segment_clusters.png")
-        plt.close()
-
         # 2. Segment size distribution
-        plt.figure(figsize=(10, 6))
         segment_sizes = self.customer_features['segment'].value_counts().sort_index()
         segment_names = [self.segments[sid]['jtbd_hypothesis']['name'] for sid in segment_sizes.index]
 
-        plt.bar(range(len(segment_sizes)), segment_sizes.values)
-        plt.xticks(range(len(segment_sizes)), segment_names, rotation=45, ha='right')
-        plt.xlabel('Segment')
-        plt.ylabel('Number of Customers')
-        plt.title('Customer Distribution Across Segments')
-        plt.tight_layout()
-        plt.savefig(output_path / 'segment_distribution.png', dpi=300)
-        print("  Saved: segment_distribution.png")
-        plt.close()
-
-        # 3. Booking time heatmap by segment
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
-        axes = axes.flatten()
-
-        for idx, (segment_id, profile) in enumerate(sorted(self.segments.items())):
-            if idx >= 6:
-                break
-
-            ax = axes[idx]
-            segment_members = self.customer_features[self.customer_features['segment'] == segment_id]['member_id'].tolist()
-            segment_reservations = self.reservations[self.reservations['Player _#'].isin(segment_members)]
-
-            if len(segment_reservations) > 0:
-                hours = segment_reservations['Start Date / Time'].dt.hour
-                days = segment_reservations['Start Date / Time'].dt.dayofweek
-
-                heatmap_data = np.zeros((7, 24))
-                for day, hour in zip(days, hours):
-                    if pd.notna(day) and pd.notna(hour):
-                        heatmap_data[int(day), int(hour)] += 1
-
-                sns.heatmap(heatmap_data, ax=ax, cmap='YlOrRd', cbar=True)
-                ax.set_title(f"Segment {segment_id}: {profile['jtbd_hypothesis']['name']}")
-                ax.set_xlabel('Hour of Day')
-                ax.set_ylabel('Day of Week')
-                ax.set_yticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'], rotation=0)
-
-        plt.tight_layout()
-        plt.savefig(output_path / 'booking_time_heatmaps.png', dpi=300)
-        print("  Saved: booking_time_heatmaps.png")
-        plt.close()
+        # 3. Booking time heatmap by segment (first six segments)
+        shown = sorted(self.segments.items())[:6]
+        group_of = pd.Series(np.arange(len(shown)), index=[segment_id for segment_id, _ in shown])
+        member_group = pd.Series(self.customer_features['segment'].map(group_of).to_numpy(),
+                                 index=self.customer_features['member_id'].to_numpy())
+        heatmaps = np.zeros((len(shown), 7, 24))
+        bookings = np.zeros(len(shown), dtype=np.int64)
+        # Counts add up across member partitions in out-of-core mode
+        for _ in (self._activity_partitions() if self.partitions is not None else [None]):
+            groups = self.reservations['Player _#'].map(member_group).fillna(-1).to_numpy()
+            heatmaps += booking_heatmaps(groups, self.reservations['dow'].astype(float),
+                                         self.reservations['hour'].astype(float), len(shown))
+            bookings += np.bincount(groups[groups >= 0].astype(np.int64), minlength=len(shown))
+        has_bookings = bookings > 0
+
+        render_figures([
+            (draw_segment_clusters, output_path / 'segment_clusters.png',
+             {'X_pca': X_pca, 'segments': segments, 'variance': pca.explained_variance_ratio_[:2]}),
+            (draw_segment_distribution, output_path / 'segment_distribution.png',
+             {'names': segment_names, 'sizes': segment_sizes.to_numpy()}),
+            (draw_booking_heatmaps, output_path / 'booking_time_heatmaps.png',
+             {'heatmaps': heatmaps, 'has_bookings': has_bookings,
+              'titles': [f"Segment {segment_id}: {profile['jtbd_hypothesis']['name']}" for segment_id, profile in shown]}),
+        ], jobs=jobs, force=force)
 
         print("  Visualization creation complete")
 
 
-def main():
-    """Main execution function."""
-    print("="*70)
-    print("CourtReserve JTBD Customer Segmentation Analysis")
-    print("Pickleball Clubhouse Chicago")
-    print("="*70)
-
-    # Initialize analyzer
-    analyzer = JTBDAnalyzer(data_dir='.')
+def draw_segment_clusters(path, X_pca, segments, variance):
+    """Customer segments on the first two principal components."""
+    plt.figure(figsize=(12, 8))
+    scatter = plt.scatter(X_pca[:, 0], X_pca[:, 1],
+                        c=segments,
+                        cmap='viridis',
+                        alpha=0.6,
+                        s=50)
+    plt.colorbar(scatter, label='Segment')
+    plt.xlabel(f'PC1 ({variance[0]*100:.1f}% variance)')
+    plt.ylabel(f'PC2 ({variance[1]*100:.1f}% variance)')
+    plt.title('Customer Segments (PCA Projection)')
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def draw_segment_distribution(path, names, sizes):
+    """Customers per segment."""
+    plt.figure(figsize=(10, 6))
+    plt.bar(range(len(sizes)), sizes)
+    plt.xticks(range(len(sizes)), names, rotation=45, ha='right')
+    plt.xlabel('Segment')
+    plt.ylabel('Number of Customers')
+    plt.title('Customer Distribution Across Segments')
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def draw_booking_heatmaps(path, heatmaps, has_bookings, titles):
+    """Day-of-week × hour booking heatmap for up to six segments."""
+    fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+    axes = axes.flatten()
+
+    for idx, title in enumerate(titles):
+        if not has_bookings[idx]:
+            continue
+        ax = axes[idx]
+        sns.heatmap(heatmaps[idx], ax=ax, cmap='YlOrRd', cbar=True)
+        ax.set_title(title)
+        ax.set_xlabel('Hour of Day')
+        ax.set_ylabel('Day of Week')
+        ax.set_yticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'], rotation=0)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300)
+    plt.close()
+
+
+def run_pipeline(analyzer, trace, visualizations=True, n_jobs=1, patience=None, model_path=None, refit=False):
+    """
+    Run every analysis stage through trace (a StageTrace) and write the outputs
+    to the cwd. n_jobs and patience are passed to cluster_customers().
 
+    With model_path, segments are assigned from the saved model there unless
+    refit is set, the model does not fit the features, or drift is detected;
+    a refit is saved to model_path.
+    """
     # Load and clean data
-    analyzer.load_data()
-    analyzer.clean_data()
+    trace.run('load_data', analyzer.load_data)
+    trace.run('clean_data', analyzer.clean_data)
 
     # Feature engineering
-    analyzer.engineer_features()
-
-    # Clustering
-    analyzer.cluster_customers(n_clusters_range=(3, 7))
+    trace.run('engineer_features', analyzer.engineer_features)
+
+    # Clustering: assign from the saved model, or (re)fit and save it
+    bundle = None
+    if model_path and not refit:
+        bundle = segment_model.load_model(analyzer.clustering_columns(), model_path)
+    if bundle is None or not trace.run('assign_segments', analyzer.assign_segments, bundle, model_path)['assigned']:
+        results = trace.run('cluster_customers', analyzer.cluster_customers, n_clusters_range=(3, 7),
+                            n_jobs=n_jobs, patience=patience)
+        if model_path:
+            segment_model.save_model(results, analyzer.customer_features, model_path)
+            print(f"  Saved segment model: {model_path}")
 
     # Segment profiling
-    analyzer.profile_segments()
+    trace.run('profile_segments', analyzer.profile_segments)
 
     # JTBD hypothesis generation
-    analyzer.generate_jtbd_hypotheses()
+    trace.run('generate_jtbd_hypotheses', analyzer.generate_jtbd_hypotheses)
 
     # Context switcher detection
-    analyzer.identify_context_switchers(min_bookings=5)
+    trace.run('identify_context_switchers', analyzer.identify_context_switchers, min_bookings=5)
 
     # Generate outputs
-    analyzer.generate_report('jtbd-analysis-report.md')
-    analyzer.export_json_results('analysis-results.json')
+    trace.run('generate_report', analyzer.generate_report, 'jtbd-analysis-report.md')
+    trace.run('export_json_results', analyzer.export_json_results, 'analysis-results.json')
 
     # Optional: Create visualizations
+    if not visualizations:
+        return
     try:
-        analyzer.create_visualizations('.')
+        trace.run('create_visualizations', analyzer.create_visualizations, '.')
     except Exception as e:
         print(f"\nWarning: Visualization creation failed: {e}")
         print("Continuing without visualizations...")
 
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description='CourtReserve JTBD customer segmentation analysis')
+    parser.add_argument('--trace', default='jtbd-trace.json',
+                        help='JSON file for per-stage wall/CPU time, peak RSS and row counts')
+    parser.add_argument('--profile', metavar='DIR', help='write a cProfile dump of every stage to DIR')
+    parser.add_argument('--memory', action='store_true',
+                        help='also trace Python allocations per stage (tracemalloc; stages run 2-4x slower)')
+    parser.add_argument('--jobs', type=int, default=1, help='K-Means fits run in parallel while choosing k')
+    parser.add_argument('--patience', type=int,
+                        help='stop trying larger k once the silhouette score falls this many times in a row')
+    parser.add_argument('--model', default=segment_model.MODEL_PATH,
+                        help='saved segment model: assign segments from it when it fits, save refits to it')
+    parser.add_argument('--refit', action='store_true', help='recluster even when the saved model fits')
+    parser.add_argument('--partitions', type=int,
+                        help='read reservations, transactions and check-ins in this many member-ID partitions '
+                             'instead of all at once (out-of-core, for data larger than memory)')
+    args = parser.parse_args()
+
+    print("="*70)
+    print("CourtReserve JTBD Customer Segmentation Analysis")
+    print("Pickleball Clubhouse Chicago")
+    print("="*70)
+
+    # Initialize analyzer
+    analyzer = JTBDAnalyzer(data_dir='.', partitions=args.partitions)
+    trace = StageTrace('jtbd', rows=analyzer.row_counts, profile_dir=args.profile,
+                       track_memory=args.memory)
+
+    try:
+        run_pipeline(analyzer, trace, n_jobs=args.jobs, patience=args.patience,
+                     model_path=args.model, refit=args.refit)
+    finally:
+        # Failed runs keep the stages that completed (and the one that raised)
+        trace.print_summary()
+        trace.write(args.trace)
+
     print("\n" + "="*70)
     print("Analysis complete!")
     print("="*70)
     print("\nGenerated files:")
     print("  - jtbd-analysis-report.md (comprehensive analysis)")
     print("  - analysis-results.json (machine-readable results)")
+    print(f"  - {args.trace} (per-stage timings)")
+    print(f"  - {args.model} (segment model; --refit to recluster)")
+    if args.profile:
+        print(f"  - {args.profile}/jtbd-*.prof (per-stage cProfile dumps)")
     print("  - segment_clusters.png (visualization)")
     print("  - segment_distribution.png (visualization)")
     print("  - booking_time_heatmaps.png (visualization)")
@@ -7,6 +7,7 @@ Purpose: Identify conversion opportunity from drop-in players to members
 Output: Segment profile + real customer examples + conversion revenue model
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -14,56 +15,59 @@ import seaborn as sns
 from collections import Counter
 import sys
 
-def load_checkin_data(file_path):
-    """Load and parse check-in reports."""
-    print(f"Loading check-in data from {file_path}...")
+from create_database import table_exists
+from data_access import describe_source, load_report, resolve_source
+from figure_render import render_figures
+from out_of_core import OrderedCounts, iter_partitions
+from query_database import get_pool, run_query
+from report_schema import classify_time_of_day, parse_prices
 
-    df = pd.read_csv(file_path, encoding='utf-8-sig')  # Handle BOM if present
+# Check-in columns used by the analysis
+CHECKIN_COLUMNS = ['Player _#', 'Player First Name', 'Player Last Name', 'Membership Name',
+                   'Event Name', 'Price', 'Pickleball Rating']
 
-    print(f"Loaded {len(df)} check-in records")
-    print(f"Columns: {list(df.columns[:10])}...")  # Show first 10 columns
-    return df
+def load_checkin_data(start=None, end=None):
+    """Load Non-Member/Visitor check-ins (from courtreserve.db, or the CSV export)."""
+    print(f"Loading check-in data from {describe_source('checkins')}...")
 
-def parse_price(price_str):
-    """Extract numeric price from strings like '(Drop-in)  $16.00'."""
-    if pd.isna(price_str):
-        return 0.0
+    df = load_report('checkins', columns=CHECKIN_COLUMNS, start=start, end=end,
+                     memberships=['Non-Member/Visitor'])
 
-    try:
-        # Extract number after $ sign
-        price_str = str(price_str)
-        if '$' in price_str:
-            amount = price_str.split('$')[1].strip().split()[0]
-            return float(amount)
-        return 0.0
-    except:
-        return 0.0
-
-def parse_time_of_day(event_name):
-    """Determine time of day from event name."""
-    if pd.isna(event_name):
-        return 'unknown'
-
-    event_lower = str(event_name).lower()
-
-    if 'morning' in event_lower or '7:00 am' in event_lower or '8:00 am' in event_lower:
-        return 'morning'
-    elif 'evening' in event_lower or '7:00 pm' in event_lower or '8:00 pm' in event_lower:
-        return 'evening'
-    elif 'midday' in event_lower or 'mid-day' in event_lower or '11:00 am' in event_lower or '12:00 pm' in event_lower:
-        return 'midday'
-    else:
-        # Try to infer from time in name
-        if any(hr in event_lower for hr in ['5:00 pm', '6:00 pm', '7:00 pm', '8:00 pm', '9:00 pm']):
-            return 'evening'
-        elif any(hr in event_lower for hr in ['7:00 am', '8:00 am', '9:00 am', '10:00 am']):
-            return 'morning'
-        elif any(hr in event_lower for hr in ['11:00 am', '12:00 pm', '1:00 pm', '2:00 pm', '3:00 pm', '4:00 pm']):
-            return 'midday'
+    print(f"Loaded {len(df)} Non-Member/Visitor check-in records")
+    print(f"Columns: {list(df.columns[:10])}...")  # Show first 10 columns
+    return df
 
-    return 'unknown'
+def load_player_spend():
+    """
+    Per-player Non-Member/Visitor spend, visits, name and rating from the
+    player_checkins aggregates that create_database.py maintains (a few
+    thousand rows). Returns None when check-ins come from the CSV export or
+    the database predates the aggregates.
+    """
+    if resolve_source('checkins') != 'db':
+        return None
+    with get_pool().connection() as conn:
+        if not table_exists(conn, 'player_checkins'):
+            return None
+
+    # A player can have several membership-name groups; 'first' follows check-in order
+    groups = run_query("""
+        SELECT "player__#", spend, player_first_name, player_last_name, visits,
+               pickleball_rating, rated_row
+        FROM player_checkins
+        WHERE membership_name LIKE '%Non-Member/Visitor%'
+        ORDER BY first_row
+    """)
+    player_spend = groups.groupby('player__#').agg(
+        Total_Spend=('spend', 'sum'),
+        First_Name=('player_first_name', 'first'),
+        Last_Name=('player_last_name', 'first'),
+        Visits=('visits', 'sum'),
+    )
+    player_spend['Rating'] = groups.sort_values('rated_row').groupby('player__#')['pickleball_rating'].first()
+    return player_spend.reset_index().rename(columns={'player__#': 'Player_ID'})
 
-def analyze_pay_per_use_segment(df):
+def analyze_pay_per_use_segment(df, player_spend=None):
     """
     Analyze Non-Member/Visitor check-ins to profile the pay-per-use segment.
 
@@ -74,6 +78,10 @@ def analyze_pay_per_use_segment(df):
     - Timing patterns
     - Skill levels
     - High-value conversion targets
+
+    player_spend (from load_player_spend) replaces the per-player groupby
+    over the check-ins when given. analyze_pay_per_use_partitioned() gives
+    the same results reading one member-ID partition at a time.
     """
     print("\nAnalyzing pay-per-use segment (Non-Member/Visitor)...")
 
@@ -82,15 +90,121 @@ def analyze_pay_per_use_segment(df):
 
     print(f"Found {len(non_members)} Non-Member/Visitor check-ins")
 
-    # Parse prices
-    non_members['price_numeric'] = non_members['Price'].apply(parse_price)
+    # Parse prices (check-ins without one count as free)
+    non_members['price_numeric'] = parse_prices(non_members['Price']).fillna(0.0)
 
     # Parse time of day
-    non_members['time_of_day'] = non_members['Event Name'].apply(parse_time_of_day)
+    non_members['time_of_day'] = classify_time_of_day(non_members['Event Name'])
+
+    paid = non_members[non_members['price_numeric'] > 0]['price_numeric']
+    ratings = (non_members[non_members['Pickleball Rating'].notna()]['Pickleball Rating']
+               if 'Pickleball Rating' in non_members.columns else None)
+    profile = {
+        'unique_players': non_members['Player _#'].nunique(),
+        'total_checkins': len(non_members),
+        'event_types': non_members['Event Name'].value_counts().head(10),
+        'price_dist': paid.describe(),
+        'price_counts': paid.value_counts().head(5),
+        'time_dist': non_members['time_of_day'].value_counts(),
+        'rating_dist': ratings.value_counts().sort_index() if ratings is not None else None,
+    }
+
+    # Calculate total spend per player (unless pre-aggregated by the importer)
+    if player_spend is None:
+        player_spend = player_spend_from_checkins(non_members)
+
+    return summarize_segment(profile, player_spend), non_members
+
+def analyze_pay_per_use_partitioned(partitions, player_spend=None, start=None, end=None):
+    """
+    analyze_pay_per_use_segment() reading the Non-Member/Visitor check-ins one
+    member-ID partition at a time (see out_of_core.py), for check-in tables
+    too large to load whole. Counts are combined across partitions and each
+    player's spend is summed within its partition, so the results are the
+    same as the in-memory path; only one partition is held at a time.
+    """
+    print("\nAnalyzing pay-per-use segment (Non-Member/Visitor)...")
+    print(f"Reading check-ins from {describe_source('checkins')} in {partitions} member-ID partitions")
+
+    events = OrderedCounts('Event Name')
+    prices = OrderedCounts('price_numeric')
+    times = OrderedCounts('time_of_day')
+    ratings = None
+    unique_players = total_checkins = 0
+    spends = []
+
+    for index, df in iter_partitions('checkins', by='member', partitions=partitions, columns=CHECKIN_COLUMNS,
+                                     start=start, end=end, memberships=['Non-Member/Visitor']):
+        non_members = df[df['Membership Name'].str.contains('Non-Member/Visitor', case=False, na=False)].copy()
+        if len(non_members) == 0:
+            continue
+        non_members['price_numeric'] = parse_prices(non_members['Price']).fillna(0.0)
+        non_members['time_of_day'] = classify_time_of_day(non_members['Event Name'])
+
+        # Partitions hold disjoint players
+        unique_players += non_members['Player _#'].nunique()
+        total_checkins += len(non_members)
+
+        # Counts keep each row's position in the report so ties order as in memory
+        events.add(non_members['Event Name'], non_members.index)
+        paid = non_members[non_members['price_numeric'] > 0]['price_numeric']
+        prices.add(paid, paid.index)
+        times.add(non_members['time_of_day'], non_members.index)
+        if 'Pickleball Rating' in non_members.columns:
+            if ratings is None:
+                ratings = OrderedCounts('Pickleball Rating')
+            ratings.add(non_members['Pickleball Rating'], non_members.index)
+
+        if player_spend is None:
+            spends.append(player_spend_from_checkins(non_members))
+        print(f"  Partition {index + 1}/{partitions}: {len(non_members):,} check-ins")
+
+    print(f"Found {total_checkins} Non-Member/Visitor check-ins")
+
+    profile = {
+        'unique_players': unique_players,
+        'total_checkins': total_checkins,
+        'event_types': events.value_counts().head(10),
+        'price_dist': prices.describe(),
+        'price_counts': prices.value_counts().head(5),
+        'time_dist': times.value_counts(),
+        'rating_dist': ratings.value_counts().sort_index() if ratings is not None else None,
+    }
+
+    # Players are disjoint across partitions; groupby sorted them by ID
+    if player_spend is None and spends:
+        player_spend = pd.concat(spends, ignore_index=True).sort_values('Player_ID', kind='stable',
+                                                                        ignore_index=True)
+    elif player_spend is None:
+        player_spend = player_spend_from_checkins(pd.DataFrame(columns=CHECKIN_COLUMNS + ['price_numeric']))
+
+    return summarize_segment(profile, player_spend)
 
-    # Count unique players
-    unique_players = non_members['Player _#'].nunique()
-    total_checkins = len(non_members)
+def player_spend_from_checkins(non_members):
+    """Total spend, name, visits and rating per player from their check-ins."""
+    player_spend = non_members.groupby('Player _#').agg({
+        'price_numeric': 'sum',
+        'Player First Name': 'first',
+        'Player Last Name': 'first',
+        'Event Name': 'count',  # Counts visits
+        'Pickleball Rating': 'first'
+    }).reset_index()
+
+    player_spend.columns = ['Player_ID', 'Total_Spend', 'First_Name', 'Last_Name', 'Visits', 'Rating']
+    return player_spend
+
+def summarize_segment(profile, player_spend):
+    """
+    Print the segment profile, find the high-value conversion targets and
+    model the conversion revenue.
+
+    Args:
+        profile: unique_players, total_checkins and the event_types,
+            price_dist, price_counts, time_dist and rating_dist Series
+        player_spend: Player_ID, Total_Spend, First_Name, Last_Name, Visits, Rating per player
+    """
+    unique_players = profile['unique_players']
+    total_checkins = profile['total_checkins']
     avg_visits_per_player = total_checkins / unique_players if unique_players > 0 else 0
 
     print(f"\nSegment Size:")
@@ -99,56 +213,44 @@ def analyze_pay_per_use_segment(df):
     print(f"  Average visits per player: {avg_visits_per_player:.1f}")
 
     # Activity preferences
-    event_types = non_members['Event Name'].value_counts().head(10)
+    event_types = profile['event_types']
     print(f"\nTop 10 Activity Types:")
     for event, count in event_types.items():
-        pct = (count / len(non_members)) * 100
+        pct = (count / total_checkins) * 100
         print(f"  {event}: {count} ({pct:.1f}%)")
 
     # Price distribution
-    price_dist = non_members[non_members['price_numeric'] > 0]['price_numeric'].describe()
+    price_dist = profile['price_dist']
     print(f"\nPrice Points (for paid check-ins):")
     print(f"  Average: ${price_dist['mean']:.2f}")
     print(f"  Median: ${price_dist['50%']:.2f}")
     print(f"  Range: ${price_dist['min']:.2f} - ${price_dist['max']:.2f}")
 
     # Common price points
-    price_counts = non_members[non_members['price_numeric'] > 0]['price_numeric'].value_counts().head(5)
+    price_counts = profile['price_counts']
     print(f"\nMost Common Price Points:")
     for price, count in price_counts.items():
         print(f"  ${price:.2f}: {count} check-ins")
 
     # Time of day distribution
-    time_dist = non_members['time_of_day'].value_counts()
+    time_dist = profile['time_dist']
     print(f"\nTime of Day Distribution:")
     for time, count in time_dist.items():
-        pct = (count / len(non_members)) * 100
+        pct = (count / total_checkins) * 100
         print(f"  {time.capitalize()}: {count} ({pct:.1f}%)")
 
     # Skill level distribution (if available)
-    if 'Pickleball Rating' in non_members.columns:
-        ratings = non_members[non_members['Pickleball Rating'].notna()]['Pickleball Rating']
-        if len(ratings) > 0:
-            print(f"\nSkill Level Distribution (n={len(ratings)}):")
-            rating_dist = ratings.value_counts().sort_index()
-            for rating, count in rating_dist.items():
-                pct = (count / len(ratings)) * 100
-                print(f"  {rating}: {count} ({pct:.1f}%)")
+    rating_dist = profile['rating_dist']
+    if rating_dist is not None and len(rating_dist) > 0:
+        n_rated = int(rating_dist.sum())
+        print(f"\nSkill Level Distribution (n={n_rated}):")
+        for rating, count in rating_dist.items():
+            pct = (count / n_rated) * 100
+            print(f"  {rating}: {count} ({pct:.1f}%)")
 
     # Find high-value conversion targets
     print(f"\nIdentifying high-value conversion targets...")
 
-    # Calculate total spend per player
-    player_spend = non_members.groupby('Player _#').agg({
-        'price_numeric': 'sum',
-        'Player First Name': 'first',
-        'Player Last Name': 'first',
-        'Event Name': 'count',  # Counts visits
-        'Pickleball Rating': 'first'
-    }).reset_index()
-
-    player_spend.columns = ['Player_ID', 'Total_Spend', 'First_Name', 'Last_Name', 'Visits', 'Rating']
-
     # Calculate monthly spend (data is for ~4 months, so divide by 4)
     # Note: This is approximate based on July-October data
     player_spend['Monthly_Spend_Est'] = player_spend['Total_Spend'] / 4
@@ -199,28 +301,56 @@ def analyze_pay_per_use_segment(df):
         'conversion_revenue': annual_revenue
     }
 
-    return results, non_members
+    return results
 
-def create_visualization(results, output_path):
-    """Create visualization of pay-per-use segment characteristics."""
+def create_visualization(results, output_path, force=False):
+    """
+    Create visualization of pay-per-use segment characteristics (skipped when
+    its data is unchanged since the last run, unless force).
+    """
     print(f"\nCreating pay-per-use segment visualization...")
 
+    event_counts = results['event_types'].head(8)
+    targets = results['high_value_targets'].head(10)
+
+    summary_text = (
+        f"SEGMENT SIZE\n"
+        f"  • {results['unique_players']:,} unique players\n"
+        f"  • {results['total_checkins']:,} total check-ins\n"
+        f"  • {results['avg_visits_per_player']:.1f} avg visits/player\n\n"
+        f"CONVERSION OPPORTUNITY\n"
+        f"  • 20% conversion rate (conservative)\n"
+        f"  • {int(results['unique_players'] * 0.20):,} convertible players\n"
+        f"  • $99/month membership\n"
+        f"  • 12-month average duration\n\n"
+        f"ANNUAL REVENUE POTENTIAL:\n"
+        f"  ${results['conversion_revenue']:,.0f}/year"
+    )
+
+    return render_figures([(draw_visualization, output_path, {
+        'event_names': [name[:30] + '...' if len(name) > 30 else name for name in event_counts.index],
+        'event_counts': event_counts.to_numpy(),
+        'time_labels': list(results['time_dist'].index),
+        'time_counts': list(results['time_dist'].values),
+        'target_names': [f"{row['First_Name']} {row['Last_Name'][0]}." for _, row in targets.iterrows()],
+        'target_spends': targets['Monthly_Spend_Est'].to_numpy() if len(targets) > 0 else np.zeros(0),
+        'summary_text': summary_text,
+    })], force=force)
+
+def draw_visualization(path, event_names, event_counts, time_labels, time_counts,
+                       target_names, target_spends, summary_text):
+    """Draw the four-panel pay-per-use segment profile."""
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     fig.suptitle('Pay-Per-Use Segment Profile (Non-Member/Visitor Analysis)',
                  fontsize=16, fontweight='bold')
 
     # 1. Activity Types (top 8)
-    event_counts = results['event_types'].head(8)
-    event_names = [name[:30] + '...' if len(name) > 30 else name for name in event_counts.index]
-
-    axes[0, 0].barh(event_names, event_counts.values, color='steelblue')
+    axes[0, 0].barh(event_names, event_counts, color='steelblue')
     axes[0, 0].set_xlabel('Check-ins', fontweight='bold')
     axes[0, 0].set_title('Top 8 Activity Types', fontweight='bold')
     axes[0, 0].invert_yaxis()
 
     # 2. Time of Day Distribution
-    time_labels = list(results['time_dist'].index)
-    time_counts = list(results['time_dist'].values)
     colors = ['#FFD700', '#FF6347', '#4169E1', '#808080']  # morning, evening, midday, unknown
 
     axes[0, 1].pie(time_counts, labels=time_labels, autopct='%1.1f%%', colors=colors[:len(time_labels)],
@@ -228,12 +358,8 @@ def create_visualization(results, output_path):
     axes[0, 1].set_title('Time of Day Preference', fontweight='bold')
 
     # 3. High-Value Conversion Targets
-    if len(results['high_value_targets']) > 0:
-        top_10 = results['high_value_targets'].head(10)
-        names = [f"{row['First_Name']} {row['Last_Name'][0]}." for _, row in top_10.iterrows()]
-        spends = top_10['Monthly_Spend_Est'].values
-
-        axes[1, 0].barh(names, spends, color='green')
+    if len(target_names) > 0:
+        axes[1, 0].barh(target_names, target_spends, color='green')
         axes[1, 0].set_xlabel('Estimated Monthly Spend ($)', fontweight='bold')
         axes[1, 0].set_title('Top 10 High-Value Conversion Targets', fontweight='bold')
         axes[1, 0].invert_yaxis()
@@ -246,30 +372,13 @@ def create_visualization(results, output_path):
 
     # 4. Conversion Opportunity Summary
     axes[1, 1].axis('off')
-
-    summary_text = (
-        f"SEGMENT SIZE\n"
-        f"  • {results['unique_players']:,} unique players\n"
-        f"  • {results['total_checkins']:,} total check-ins\n"
-        f"  • {results['avg_visits_per_player']:.1f} avg visits/player\n\n"
-        f"CONVERSION OPPORTUNITY\n"
-        f"  • 20% conversion rate (conservative)\n"
-        f"  • {int(results['unique_players'] * 0.20):,} convertible players\n"
-        f"  • $99/month membership\n"
-        f"  • 12-month average duration\n\n"
-        f"ANNUAL REVENUE POTENTIAL:\n"
-        f"  ${results['conversion_revenue']:,.0f}/year"
-    )
-
     axes[1, 1].text(0.1, 0.9, summary_text, fontsize=11, verticalalignment='top',
                     family='monospace',
                     bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
 
     plt.tight_layout(rect=[0, 0.03, 1, 0.96])
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"Visualization saved to {output_path}")
-
-    return fig
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
 
 def generate_narrative_insights(results):
     """Generate narrative-friendly insights for partner document."""
@@ -378,17 +487,26 @@ These aren't beginners trying pickleball once. They're **regular customers** cho
 
 def main():
     """Main execution function."""
-    # File paths
-    input_file = 'CheckinReports2025-10-26_09-55-PM.csv'
+    parser = argparse.ArgumentParser(description='Pay-per-use (Non-Member/Visitor) segment analysis')
+    parser.add_argument('--partitions', type=int,
+                        help='read check-ins in this many member-ID partitions instead of all at once '
+                             '(out-of-core, for check-in tables larger than memory)')
+    args = parser.parse_args()
+
+    # Output paths
     visualization_output = 'pay_per_use_segment.png'
     insights_output = 'pay_per_use_insights.txt'
 
     try:
-        # Load data
-        df = load_checkin_data(input_file)
-
-        # Analyze pay-per-use segment
-        results, filtered_df = analyze_pay_per_use_segment(df)
+        if args.partitions:
+            # Analyze pay-per-use segment one member partition at a time
+            results = analyze_pay_per_use_partitioned(args.partitions, load_player_spend())
+        else:
+            # Load data
+            df = load_checkin_data()
+
+            # Analyze pay-per-use segment
+            results, filtered_df = analyze_pay_per_use_segment(df, load_player_spend())
 
         # Create visualization
         create_visualization(results, visualization_output)
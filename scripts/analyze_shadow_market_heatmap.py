@@ -7,6 +7,7 @@ Purpose: Replace qualitative "ghost town" narrative with precise utilization per
 Output: Heatmap visualization + quantified revenue opportunity
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -14,19 +15,29 @@ import seaborn as sns
 from datetime import datetime
 import sys
 
-def load_utilization_data(file_path):
-    """Load and parse court utilization CSV."""
-    print(f"Loading utilization data from {file_path}...")
+from data_access import describe_source, load_report
+from figure_render import render_figures
+from out_of_core import OrderedCounts, iter_partitions
+from report_schema import SCHEMAS
+from utilization_cube import DAY_NAMES, SHADOW_MARKET, WEEKS_PER_YEAR
 
-    # Read CSV, skip metadata row
-    df = pd.read_csv(file_path, skiprows=1)
+def load_utilization_data(start=None, end=None):
+    """
+    Load court utilization (from courtreserve.db, or the CSV export) in the
+    report's wide layout: one row per time slot, one column per date.
+    """
+    print(f"Loading utilization data from {describe_source('court_utilization')}...")
 
-    # First column is time slots
-    df = df.rename(columns={df.columns[0]: 'time_slot'})
+    # Long (time_slot, date, utilization_pct) rows; the "Total" column has no date
+    long = load_report('court_utilization', start=start, end=end)
+    long = long[long['date'].notna()]
 
-    # Remove "Total" column if it exists
-    if 'Total' in df.columns:
-        df = df.drop(columns=['Total'])
+    # Pivot back to the export layout, keeping time slot and date order
+    df = long.pivot_table(index='time_slot', columns='date', values='utilization_pct',
+                          aggfunc='first', dropna=False, sort=False)
+    df = df.reindex(index=long['time_slot'].unique(), columns=sorted(long['date'].unique()))
+    df.columns = [f"{d.month}/{d.day}/{d.year}" for d in df.columns]
+    df = df.rename_axis('time_slot').reset_index()
 
     print(f"Loaded {len(df)} time slots across {len(df.columns)-1} dates")
     return df
@@ -53,93 +64,130 @@ def parse_time_slot(time_slot_str):
     except:
         return None
 
+def parse_utilization(value):
+    """
+    Parse one utilization cell ("15.3 %", "0 %" or a number) to a percentage.
+    Blank and unparseable cells count as 0.
+    """
+    try:
+        if pd.isna(value) or value == '':
+            return 0.0
+        return float(str(value).replace('%', '').replace(' ', '').strip())
+    except:
+        return 0.0
+
+def parse_utilization_values(values):
+    """Parse an array of utilization cells, parsing each distinct value once."""
+    codes, uniques = pd.factorize(values)
+    parsed = np.array([parse_utilization(value) for value in uniques] + [0.0])
+    return parsed[codes]  # Missing cells (code -1) take the trailing 0.0
+
 def get_day_of_week(date_str):
     """Convert date string like '1/1/2025' to day of week (0=Monday, 6=Sunday)."""
     try:
-        date_obj = datetime.strptime(date_str, '%m/%d/%Y')
+        date_obj = datetime.strptime(date_str, SCHEMAS['court_utilization'].datetime_format('date'))
         return date_obj.weekday()
     except:
         return None
 
-def analyze_shadow_market(df):
+def analyze_shadow_market(df, window=SHADOW_MARKET):
     """
-    Analyze weekday 9 AM - 4 PM utilization (the 'shadow market').
+    Analyze utilization in a time window; by default weekday 9 AM - 4 PM
+    (the 'shadow market'). The window also sets the court count, price per
+    court-hour and fill rate of the revenue math (see utilization_cube.Window).
 
     Returns dictionary with:
     - Average utilization by hour and day-of-week
     - Lowest utilization windows
     - Revenue opportunity calculations
+
+    analyze_shadow_market_by_month() gives the same results reading the
+    utilization table one month at a time.
     """
-    print("\nAnalyzing shadow market (weekday 9 AM - 4 PM)...")
+    print(f"\nAnalyzing {window.name.lower()} ({window.describe()})...")
 
     # Add hour column
     df['hour'] = df['time_slot'].apply(parse_time_slot)
 
-    # Filter to 9 AM - 4 PM (hours 9-15)
-    shadow_hours = df[df['hour'].between(9, 15)].copy()
+    # Filter to the window's hours (9-15 for 9 AM - 4 PM)
+    shadow_hours = df[df['hour'].between(window.start_hour, window.end_hour - 1)]
 
-    # Initialize results
-    utilization_by_day_hour = {}
-    all_values = []
-
-    # Process each date column
+    # Date columns on the window's days (non-date columns such as "Total" are skipped)
     date_columns = [col for col in df.columns if col not in ['time_slot', 'hour']]
-
-    for col in date_columns:
-        day_of_week = get_day_of_week(col)
-
-        # Skip weekends (5=Saturday, 6=Sunday)
-        if day_of_week is None or day_of_week >= 5:
-            continue
-
-        # Get utilization values for this date
-        for idx, row in shadow_hours.iterrows():
-            hour = row['hour']
-            value_str = row[col]
-
-            # Parse percentage (handle formats like "15.3 %", "0 %")
-            try:
-                if pd.isna(value_str) or value_str == '':
-                    utilization = 0.0
-                else:
-                    utilization = float(str(value_str).replace('%', '').replace(' ', '').strip())
-            except:
-                utilization = 0.0
-
-            # Store by day-of-week and hour
-            key = (day_of_week, hour)
-            if key not in utilization_by_day_hour:
-                utilization_by_day_hour[key] = []
-            utilization_by_day_hour[key].append(utilization)
-            all_values.append(utilization)
-
-    # Calculate averages
+    weekdays = [(col, get_day_of_week(col)) for col in date_columns]
+    weekdays = [(col, day) for col, day in weekdays if day in window.days]
+    columns = [col for col, _ in weekdays]
+
+    # Melt the matrix once, date by date, and parse it as one array
+    n_slots = len(shadow_hours)
+    all_values = parse_utilization_values(shadow_hours[columns].to_numpy(dtype=object).ravel(order='F'))
+    days = np.repeat([day for _, day in weekdays], n_slots).astype(int)
+    hours = np.tile(shadow_hours['hour'].to_numpy(), len(columns))
+
+    # Average by (day_of_week, hour); groups keep first-seen order so ties sort as before
+    codes, keys = pd.factorize(pd.MultiIndex.from_arrays([days, hours]))
+    grouped = np.split(all_values[np.argsort(codes, kind='stable')], np.cumsum(np.bincount(codes))[:-1])
     avg_utilization_by_day_hour = {}
-    for key, values in utilization_by_day_hour.items():
-        avg_utilization_by_day_hour[key] = np.mean(values)
+    for (day, hour), values in zip(keys.tolist(), grouped):
+        avg_utilization_by_day_hour[(day, hour)] = np.mean(values)
 
+    return summarize_shadow_market(avg_utilization_by_day_hour, np.mean(all_values), np.median(all_values), window)
+
+def analyze_shadow_market_by_month(window=SHADOW_MARKET, start=None, end=None):
+    """
+    analyze_shadow_market() over the court_utilization table one month at a
+    time (see out_of_core.py), for utilization history too large to pivot in
+    memory. Each month adds its per-(day, hour) sums and counts and its value
+    counts (for the median), so only one month of rows is held at a time.
+    """
+    print(f"\nAnalyzing {window.name.lower()} ({window.describe()})...")
+    print(f"Reading utilization from {describe_source('court_utilization')} one month at a time")
+
+    totals = {}  # (day, hour) -> [sum, count], in first-seen order
+    values = OrderedCounts()
+    for month, long in iter_partitions('court_utilization', by='month', start=start, end=end):
+        if 'dow' not in long.columns:
+            long['dow'] = long['date'].dt.dayofweek
+        hours = long['start_hour'].astype(float)
+        days = long['dow'].astype(float)
+        rows = long[(long['date'].notna() & days.isin(window.days)
+                     & hours.between(window.start_hour, window.end_hour - 1)).to_numpy(dtype=bool)]
+
+        # Date by date in time-slot order, as the pivoted report is read; blank cells count as 0
+        rows = rows.sort_values('date', kind='stable')
+        utilization = rows['utilization_pct'].astype(float).fillna(0.0)
+        partial = utilization.groupby([rows['dow'].astype(int), rows['start_hour'].astype(int)], sort=False).agg(['sum', 'size'])
+        for key, total, count in zip(partial.index.tolist(), partial['sum'], partial['size']):
+            running = totals.setdefault(key, [0.0, 0])
+            running[0] += total
+            running[1] += count
+        values.add(utilization)
+        print(f"  {month:%Y-%m}: {len(rows):,} slots in the window")
+
+    avg_utilization_by_day_hour = {key: total / count for key, (total, count) in totals.items()}
+    overall_avg = sum(total for total, _ in totals.values()) / values.total if values.total else np.nan
+    return summarize_shadow_market(avg_utilization_by_day_hour, overall_avg, values.median(), window)
+
+def summarize_shadow_market(avg_utilization_by_day_hour, overall_avg, overall_median, window=SHADOW_MARKET):
+    """Rank the window's (day, hour) averages and model the revenue opportunity."""
     # Find lowest utilization windows
     sorted_windows = sorted(avg_utilization_by_day_hour.items(), key=lambda x: x[1])
     lowest_windows = sorted_windows[:10]
 
-    # Calculate overall statistics
-    overall_avg = np.mean(all_values)
-    overall_median = np.median(all_values)
-
     # Calculate empty capacity
-    # Assume 7 courts, 7 hours (9 AM - 4 PM), 5 weekdays
-    total_weekly_capacity = 7 * 7 * 5  # 245 court-hours per week
+    # Shadow market: 7 courts, 7 hours (9 AM - 4 PM), 5 weekdays = 245 court-hours per week
+    total_weekly_capacity = window.weekly_capacity
     avg_empty_pct = (100 - overall_avg) / 100
     empty_court_hours = total_weekly_capacity * avg_empty_pct
 
     # Revenue calculation
-    # Assume $30/court-hour average (mix of drop-ins, reservations, events)
-    revenue_per_court_hour = 30
+    # Shadow market: $30/court-hour average (mix of drop-ins, reservations, events)
+    revenue_per_court_hour = window.price_per_hour
 
     # If we fill 30% of empty capacity
-    fillable_capacity = empty_court_hours * 0.30
+    fillable_capacity = empty_court_hours * window.fill_rate
     weekly_revenue_opportunity = fillable_capacity * revenue_per_court_hour
-    annual_revenue_opportunity = weekly_revenue_opportunity * 52
+    annual_revenue_opportunity = weekly_revenue_opportunity * WEEKS_PER_YEAR
 
     results = {
         'avg_utilization_by_day_hour': avg_utilization_by_day_hour,
@@ -156,33 +204,53 @@ def analyze_shadow_market(df):
     print(f"  Average utilization: {overall_avg:.1f}%")
     print(f"  Median utilization: {overall_median:.1f}%")
     print(f"  Empty capacity: {empty_court_hours:.1f} court-hours/week ({avg_empty_pct*100:.1f}% empty)")
-    print(f"  Fillable capacity (30%): {fillable_capacity:.1f} court-hours/week")
+    print(f"  Fillable capacity ({window.fill_rate:.0%}): {fillable_capacity:.1f} court-hours/week")
     print(f"  Revenue opportunity: ${weekly_revenue_opportunity:,.0f}/week (${annual_revenue_opportunity:,.0f}/year)")
 
     print(f"\n10 Lowest Utilization Windows (Day, Hour, Avg Utilization):")
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
     for (day, hour), util in lowest_windows:
-        print(f"  {day_names[day]}, {hour}:00-{hour+1}:00: {util:.1f}%")
+        print(f"  {DAY_NAMES[day]}, {hour}:00-{hour+1}:00: {util:.1f}%")
 
     return results
 
-def create_heatmap(results, output_path):
-    """Create heatmap visualization of weekday daytime utilization."""
+def create_heatmap(results, output_path, window=SHADOW_MARKET, force=False):
+    """
+    Create heatmap visualization of utilization in the analyzed window
+    (skipped when the heatmap's data is unchanged since the last run, unless force).
+    """
     print(f"\nCreating heatmap visualization...")
 
     # Prepare data for heatmap
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    hours = list(range(9, 16))  # 9 AM - 3 PM (last slot is 3-4 PM)
+    days = list(window.days)
+    day_names = [DAY_NAMES[day] for day in days]
+    hours = list(window.hours)  # 9 AM - 3 PM for the shadow market (last slot is 3-4 PM)
 
     # Create matrix
     matrix = np.zeros((len(hours), len(day_names)))
 
     for (day, hour), util in results['avg_utilization_by_day_hour'].items():
-        if day < 5 and hour in hours:
-            day_idx = day
+        if day in days and hour in hours:
+            day_idx = days.index(day)
             hour_idx = hours.index(hour)
             matrix[hour_idx, day_idx] = util
 
+    # Add summary text
+    summary_text = (
+        f"Average Utilization: {results['overall_avg']:.1f}%\n"
+        f"Empty Capacity: {results['empty_court_hours_per_week']:.0f} court-hours/week\n"
+        f"Revenue Opportunity ({window.fill_rate:.0%} fill): ${results['annual_revenue_opportunity']:,.0f}/year"
+    )
+
+    return render_figures([(draw_heatmap, output_path, {
+        'matrix': matrix,
+        'day_names': day_names,
+        'hour_labels': [f"{h}:00-{h+1}:00" for h in hours],
+        'title': f'{window.name}: Court Utilization\n({window.describe()}, {window.courts} courts)',
+        'summary_text': summary_text,
+    })], force=force)
+
+def draw_heatmap(path, matrix, day_names, hour_labels, title, summary_text):
+    """Draw the utilization heatmap (time slots × days) with its summary box."""
     # Create figure
     fig, ax = plt.subplots(figsize=(10, 8))
 
@@ -194,22 +262,14 @@ def create_heatmap(results, output_path):
                 vmin=0,
                 vmax=100,
                 xticklabels=day_names,
-                yticklabels=[f"{h}:00-{h+1}:00" for h in hours],
+                yticklabels=hour_labels,
                 cbar_kws={'label': 'Utilization (%)'},
                 ax=ax)
 
-    ax.set_title('Shadow Market: Weekday Daytime Court Utilization\n(9 AM - 4 PM, Jan-Oct 2025)',
-                 fontsize=14, fontweight='bold', pad=20)
+    ax.set_title(title, fontsize=14, fontweight='bold', pad=20)
     ax.set_xlabel('Day of Week', fontsize=12, fontweight='bold')
     ax.set_ylabel('Time Slot', fontsize=12, fontweight='bold')
 
-    # Add summary text
-    summary_text = (
-        f"Average Utilization: {results['overall_avg']:.1f}%\n"
-        f"Empty Capacity: {results['empty_court_hours_per_week']:.0f} court-hours/week\n"
-        f"Revenue Opportunity (30% fill): ${results['annual_revenue_opportunity']:,.0f}/year"
-    )
-
     ax.text(0.5, -0.15, summary_text,
             transform=ax.transAxes,
             ha='center',
@@ -217,17 +277,13 @@ def create_heatmap(results, output_path):
             bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
 
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"Heatmap saved to {output_path}")
-
-    return fig
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close(fig)
 
 def generate_narrative_insights(results):
     """Generate narrative-friendly insights for partner document."""
     print("\nGenerating narrative insights...")
 
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-
     # Find absolute lowest window
     lowest = results['lowest_windows'][0]
     (lowest_day, lowest_hour), lowest_util = lowest
@@ -235,7 +291,7 @@ def generate_narrative_insights(results):
     insights = {
         'overall_avg': results['overall_avg'],
         'lowest_window': {
-            'day': day_names[lowest_day],
+            'day': DAY_NAMES[lowest_day],
             'hour': f"{lowest_hour}:00-{lowest_hour+1}:00",
             'utilization': lowest_util,
             'empty_pct': 100 - lowest_util
@@ -269,17 +325,26 @@ This is PURE UPSIDE—these hours currently generate $0. No cannibalization of c
 
 def main():
     """Main execution function."""
-    # File paths
-    input_file = 'CourtUtilization-by-date.csv'
+    parser = argparse.ArgumentParser(description='Shadow market (weekday daytime) utilization analysis')
+    parser.add_argument('--by-month', action='store_true',
+                        help='aggregate the utilization table one month at a time instead of pivoting it '
+                             'whole (out-of-core, for multi-year or multi-club history)')
+    args = parser.parse_args()
+
+    # Output paths
     heatmap_output = 'shadow_market_heatmap.png'
     insights_output = 'shadow_market_insights.txt'
 
     try:
-        # Load data
-        df = load_utilization_data(input_file)
-
-        # Analyze shadow market
-        results = analyze_shadow_market(df)
+        if args.by_month:
+            # Analyze shadow market one month at a time
+            results = analyze_shadow_market_by_month()
+        else:
+            # Load data
+            df = load_utilization_data()
+
+            # Analyze shadow market
+            results = analyze_shadow_market(df)
 
         # Create heatmap
         create_heatmap(results, heatmap_output)
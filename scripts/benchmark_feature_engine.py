@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Feature Engine Benchmark
+Compares the grouped feature engine in JTBDAnalyzer.engineer_features against
+the original per-member extraction on synthetic CourtReserve data (from
+synthetic_data.generate_exports).
+
+Purpose: Verify both paths produce the same customer feature table and
+measure the speedup at 10×, 100× and 1000× the current data volume.
+
+Usage:
+    python3 scripts/benchmark_feature_engine.py
+    python3 scripts/benchmark_feature_engine.py --scales 1 10 100 1000 --sample 200
+
+The per-member path is run in full only up to --full-scale (it is
+O(members × rows)); above that its runtime is extrapolated from a random
+sample of members, and parity is checked on that sample.
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from analyze_courtreserve_jtbd import JTBDAnalyzer
+from report_schema import SCHEMAS
+from synthetic_data import BASE_MEMBERS, BASE_MONTHS, generate_exports
+
+# Share of reservation timestamps made unparseable, so the NaT paths are exercised
+BAD_DATE_RATE = 0.002
+
+
+def make_synthetic_frames(scale, seed=42):
+    """
+    Build raw (pre-clean_data) reservation, member, transaction and check-in
+    frames with synthetic_data.generate_exports(): scale multiplies the
+    October 2025 member count over the same 9 months.
+    """
+    exports = generate_exports(members=max(1, int(round(BASE_MEMBERS * scale))), months=BASE_MONTHS, seed=seed)
+    reservations, members, transactions, checkins = [
+        exports[name][[col for col in JTBDAnalyzer.REPORT_COLUMNS[name] if col in exports[name].columns]].copy()
+        for name in ['reservations', 'members', 'transactions', 'checkins']]
+
+    rng = np.random.default_rng(seed)
+    reservations.loc[rng.random(len(reservations)) < BAD_DATE_RATE, 'Start Date / Time'] = 'not a date'
+
+    return reservations, members, transactions, checkins
+
+
+def build_analyzer(scale, seed=42):
+    """Return a JTBDAnalyzer loaded with cleaned synthetic data."""
+    analyzer = JTBDAnalyzer()
+    frames = make_synthetic_frames(scale, seed)
+
+    # Apply the dtypes read_csv would give each report (e.g. categoricals)
+    reports = ['reservations', 'members', 'transactions', 'checkins']
+    (analyzer.reservations, analyzer.members,
+     analyzer.transactions, analyzer.checkins) = [
+        df.astype(SCHEMAS[name].dtypes_for(df.columns)) for name, df in zip(reports, frames)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer.clean_data()
+    return analyzer
+
+
+def run_scale(scale, full_scale, sample_size, seed=42):
+    """Benchmark both feature paths at one scale and check parity."""
+    analyzer = build_analyzer(scale, seed)
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        grouped = analyzer.engineer_features()
+    grouped_seconds = time.perf_counter() - t0
+
+    n_members = len(grouped)
+
+    if scale <= full_scale:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            per_member = analyzer.engineer_features(per_member=True)
+        per_member_seconds = time.perf_counter() - t0
+        pd.testing.assert_frame_equal(grouped, per_member)
+        method = 'measured'
+    else:
+        rng = np.random.default_rng(seed)
+        sample_ids = rng.choice(grouped['member_id'].to_numpy(), size=min(sample_size, n_members), replace=False)
+
+        t0 = time.perf_counter()
+        sampled = pd.DataFrame([analyzer._extract_member_features(mid) for mid in sample_ids])
+        per_member_seconds = (time.perf_counter() - t0) / len(sample_ids) * n_members
+
+        expected = grouped.set_index('member_id').loc[sample_ids].reset_index()
+        pd.testing.assert_frame_equal(expected, sampled, check_dtype=False)
+        method = f'estimated ({len(sample_ids)} sampled)'
+
+    return {
+        'scale': scale,
+        'reservations': len(analyzer.reservations),
+        'members': n_members,
+        'grouped_seconds': grouped_seconds,
+        'per_member_seconds': per_member_seconds,
+        'speedup': per_member_seconds / grouped_seconds,
+        'method': method,
+    }
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=float, nargs='+', default=[10, 100, 1000],
+                        help='multiples of the current export size to benchmark')
+    parser.add_argument('--full-scale', type=float, default=1,
+                        help='largest scale at which the per-member path is run in full')
+    parser.add_argument('--sample', type=int, default=200,
+                        help='members sampled to extrapolate the per-member runtime')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("JTBD Feature Engine Benchmark")
+    print("=" * 70)
+
+    results = []
+    for scale in [1] + [s for s in args.scales if s != 1]:
+        print(f"\nScale {scale:g}×...")
+        result = run_scale(scale, args.full_scale, args.sample, args.seed)
+        print(f"  {result['reservations']:,} reservations, {result['members']:,} customers")
+        print(f"  Grouped:    {result['grouped_seconds']:10.2f}s")
+        print(f"  Per-member: {result['per_member_seconds']:10.2f}s ({result['method']})")
+        print(f"  Speedup:    {result['speedup']:10.1f}×  ✓ parity")
+        results.append(result)
+
+    print("\n" + "=" * 70)
+    print(f"{'Scale':>7} {'Reservations':>13} {'Customers':>10} {'Grouped':>9} {'Per-member':>11} {'Speedup':>9}")
+    for r in results:
+        print(f"{r['scale']:>6g}× {r['reservations']:>13,} {r['members']:>10,} "
+              f"{r['grouped_seconds']:>8.2f}s {r['per_member_seconds']:>10.1f}s {r['speedup']:>8.0f}×")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Query Connection Benchmark
+Compares opening a new SQLite connection for every query (the original
+run_query) against the pooled read-only connections in query_database.
+
+Purpose: Verify both paths return the same results and measure the cost of
+per-call connects for loops of small queries (notebooks, the summaries in
+query_database.main()).
+
+Usage:
+    python3 scripts/benchmark_query_pool.py
+    python3 scripts/benchmark_query_pool.py --queries 1000 --threads 4
+    python3 scripts/benchmark_query_pool.py --db courtreserve.db
+
+Without --db a synthetic database shaped like courtreserve.db (check-ins
+and court utilization) is built in a temporary directory.
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import query_database
+
+# Check-ins of the October 2025 export
+BASE_CHECKINS = 15513
+BASE_PLAYERS = 2000
+
+MEMBERSHIPS = ['Founder Membership', 'Fanatic Annual', 'Non-Member/Visitor', 'Coach']
+TIME_SLOTS = [f"{h % 12 or 12}:00 {'AM' if h < 12 else 'PM'} - {(h + 1) % 12 or 12}:00 {'AM' if h + 1 < 12 else 'PM'}"
+              for h in range(6, 22)]
+
+# Queries run in rotation; players and dates vary so each call has new parameters
+QUERIES = [
+    ("""SELECT COUNT(*) AS checkins, SUM(price_amount) AS spent
+        FROM checkins WHERE "player__#" = ?""", 'player'),
+    ("""SELECT event_name, checkin_datetime FROM checkins
+        WHERE "player__#" = ? ORDER BY checkin_datetime DESC LIMIT 5""", 'player'),
+    ("""SELECT time_slot, utilization_pct FROM court_utilization
+        WHERE date = ? ORDER BY time_slot""", 'date'),
+    ("""SELECT AVG(utilization_pct) AS avg_utilization FROM court_utilization
+        WHERE date >= ? AND utilization_pct IS NOT NULL""", 'date'),
+]
+
+
+def make_database(path, scale=1, seed=42):
+    """Write a synthetic check-in and utilization database and return its players and dates."""
+    rng = np.random.default_rng(seed)
+    n_checkins = int(BASE_CHECKINS * scale)
+    players = np.arange(1000000, 1000000 + int(BASE_PLAYERS * scale))
+    dates = pd.date_range('2025-01-01', '2025-10-26', freq='D')
+
+    checkins = pd.DataFrame({
+        'player__#': rng.choice(players, n_checkins),
+        'checkin_datetime': (pd.Timestamp('2025-03-01 06:00')
+                             + pd.to_timedelta(rng.integers(0, 240 * 24, n_checkins), unit='h')
+                             ).strftime('%Y-%m-%d %H:%M:%S'),
+        'membership_name': rng.choice(MEMBERSHIPS, n_checkins),
+        'event_name': rng.choice(['Open Play', 'Skills Drill', 'Round Robin'], n_checkins),
+        'price_amount': rng.choice([0.0, 10.0, 16.0], n_checkins),
+    })
+    utilization = pd.DataFrame({
+        'time_slot': np.tile(TIME_SLOTS, len(dates)),
+        'date': np.repeat(dates.strftime('%Y-%m-%d %H:%M:%S'), len(TIME_SLOTS)),
+        'utilization_pct': rng.uniform(0, 100, len(dates) * len(TIME_SLOTS)).round(2),
+    })
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    checkins.to_sql('checkins', conn, index=False)
+    utilization.to_sql('court_utilization', conn, index=False)
+    conn.execute('CREATE INDEX idx_checkins_player ON checkins("player__#")')
+    conn.execute("CREATE INDEX idx_utilization_date ON court_utilization(date)")
+    conn.commit()
+    conn.close()
+    return players.tolist(), list(dates.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def sample_values(path):
+    """Players and dates to query in an existing database."""
+    conn = sqlite3.connect(path)
+    players = [row[0] for row in conn.execute('SELECT DISTINCT "player__#" FROM checkins LIMIT 500')]
+    dates = [row[0] for row in conn.execute("SELECT DISTINCT date FROM court_utilization LIMIT 500")]
+    conn.close()
+    return players, dates
+
+
+def make_workload(n_queries, players, dates, seed=42):
+    """Return [(sql, params)] cycling through QUERIES."""
+    rng = np.random.default_rng(seed)
+    workload = []
+    for i in range(n_queries):
+        sql, kind = QUERIES[i % len(QUERIES)]
+        values = players if kind == 'player' else dates
+        workload.append((sql, (values[rng.integers(len(values))],)))
+    return workload
+
+
+def per_call_query(sql, params):
+    """The original run_query: connect, query, close."""
+    conn = sqlite3.connect(query_database.DB_PATH)
+    df = pd.read_sql_query(sql, conn, params=params)
+    conn.close()
+    return df
+
+
+def run(workload, query, threads):
+    """Run the workload and return (seconds, results)."""
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(lambda item: query(*item), workload))
+    else:
+        results = [query(sql, params) for sql, params in workload]
+    return time.perf_counter() - start, results
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=1000, help='queries per run')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4], help='concurrent callers to test')
+    parser.add_argument('--scale', type=float, default=1, help='synthetic data size (multiple of current exports)')
+    parser.add_argument('--db', help='benchmark an existing database instead of synthetic data')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Query Connection Benchmark")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            query_database.DB_PATH = args.db
+            players, dates = sample_values(args.db)
+        else:
+            query_database.DB_PATH = str(Path(tmp) / 'courtreserve.db')
+            players, dates = make_database(query_database.DB_PATH, args.scale)
+        print(f"\nDatabase: {query_database.DB_PATH}")
+
+        workload = make_workload(args.queries, players, dates)
+        results = []
+        for threads in args.threads:
+            query_database.close_pool()
+            per_call_seconds, expected = run(workload, per_call_query, threads)
+            pooled_seconds, actual = run(workload, query_database.run_query, threads)
+            for a, b in zip(expected, actual):
+                pd.testing.assert_frame_equal(a, b)
+
+            print(f"\n{threads} thread(s), {len(workload):,} queries...")
+            print(f"  Per-call connect: {per_call_seconds:8.3f}s")
+            print(f"  Pooled:           {pooled_seconds:8.3f}s")
+            print(f"  Speedup:          {per_call_seconds / pooled_seconds:8.1f}×  ✓ parity")
+            results.append((threads, per_call_seconds, pooled_seconds))
+
+        query_database.close_pool()
+
+    print("\n" + "=" * 70)
+    print(f"{'Threads':>8} {'Per-call':>10} {'Pooled':>10} {'Per query':>16} {'Speedup':>9}")
+    for threads, per_call_seconds, pooled_seconds in results:
+        per_query = f"{per_call_seconds / args.queries * 1e3:.2f}→{pooled_seconds / args.queries * 1e3:.2f} ms"
+        print(f"{threads:>8} {per_call_seconds:>9.3f}s {pooled_seconds:>9.3f}s {per_query:>16} "
+              f"{per_call_seconds / pooled_seconds:>8.1f}×")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
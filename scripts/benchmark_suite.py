@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+End-to-End Benchmark Suite
+Generates synthetic CourtReserve exports at one or more scales, then times
+the database import, every stage of the JTBD pipeline, the shadow market
+analysis and the pay-per-use analysis on them. Each run is appended to a
+JSON-lines history tagged with the git commit, so regressions show up as a
+diff between commits rather than a feeling that things got slower.
+
+Purpose: Reproducible performance numbers for the whole workflow, at the
+club's current size and at the sizes it is growing into, without the real
+exports.
+
+Usage:
+    python3 scripts/benchmark_suite.py
+    python3 scripts/benchmark_suite.py --scales 1 4 10 --months 12
+    python3 scripts/benchmark_suite.py --scales 1 --no-plots --repeat 3
+    python3 scripts/benchmark_suite.py --compare
+    python3 scripts/benchmark_suite.py --compare --last 3
+
+Scale 1 is the October 2025 exports (4,477 members over 9 months, 7 courts);
+scale N multiplies members by N. Every scale runs in its own temporary
+directory. History records (one line per scale and repeat):
+    {"commit", "timestamp", "python", "pandas", "numpy", "platform", "cpus",
+     "scale", "members", "months", "courts", "seed",
+     "rows": {"exports": {table: rows}, "jtbd": {dataset: rows}},
+     "timings": {stage: wall seconds}, "cpu": {stage: CPU seconds}}
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+import query_database
+from analyze_courtreserve_jtbd import JTBDAnalyzer, run_pipeline
+from analyze_pay_per_use_segment import analyze_pay_per_use_segment, load_checkin_data, load_player_spend
+from analyze_shadow_market_heatmap import analyze_shadow_market, load_utilization_data
+from create_database import create_database
+from stage_trace import StageTrace
+from synthetic_data import BASE_COURTS, BASE_MEMBERS, BASE_MONTHS, generate_exports, write_exports
+
+DEFAULT_HISTORY = 'benchmark_history.jsonl'
+
+
+def git_commit():
+    """Short HEAD hash of the scripts' checkout, suffixed -dirty with uncommitted changes."""
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=SCRIPTS_DIR, capture_output=True, text=True).stdout.strip()
+    try:
+        commit = git('rev-parse', '--short', 'HEAD')
+        dirty = git('status', '--porcelain', '--untracked-files=no')
+    except OSError:
+        return 'unknown'
+    return f"{commit}-dirty" if commit and dirty else (commit or 'unknown')
+
+
+def run_scale(scale, months, courts, seed, plots=True, verbose=False):
+    """Generate exports at one scale in a temporary directory and time every step."""
+    members = max(1, int(round(BASE_MEMBERS * scale)))
+    suite = StageTrace('suite')
+    jtbd = StageTrace('jtbd')
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='courtreserve-bench-') as tmp:
+        os.chdir(tmp)
+        try:
+            with quiet:
+                exports = suite.run('generate', generate_exports, members, months, courts, seed=seed)
+                suite.run('write_exports', write_exports, exports, tmp)
+                suite.run('create_database', create_database, jobs=1)
+
+                analyzer = JTBDAnalyzer(data_dir='.')
+                jtbd.rows = analyzer.row_counts
+                run_pipeline(analyzer, jtbd, visualizations=plots)
+
+                suite.run('shadow_market', lambda: analyze_shadow_market(load_utilization_data()))
+                suite.run('pay_per_use', lambda: analyze_pay_per_use_segment(load_checkin_data(), load_player_spend()))
+        finally:
+            query_database.close_pool()
+            os.chdir(cwd)
+
+    stages = suite.stages[:3] + [dict(s, stage=f"jtbd.{s['stage']}") for s in jtbd.stages] + suite.stages[3:]
+    return {
+        'scale': scale,
+        'members': members,
+        'months': months,
+        'courts': courts,
+        'seed': seed,
+        'rows': {'exports': {table: len(df) for table, df in exports.items()},
+                 'jtbd': jtbd.stages[-1].get('rows', {}) if jtbd.stages else {}},
+        'timings': {s['stage']: s['wall_seconds'] for s in stages},
+        'cpu': {s['stage']: s['cpu_seconds'] for s in stages},
+    }
+
+
+def run_suite(args):
+    """Run every scale (and repeat) and append the records to the history file."""
+    history = Path(args.history).resolve()
+    environment = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+    print(f"Benchmarking commit {environment['commit']} "
+          f"(scales {', '.join(f'{s:g}' for s in args.scales)}, {args.months} months, {args.courts} courts)")
+
+    for scale in args.scales:
+        for attempt in range(args.repeat):
+            print(f"\n▶ Scale {scale:g} (run {attempt + 1}/{args.repeat})...")
+            record = {**environment, 'timestamp': datetime.now().isoformat(timespec='seconds'),
+                      **run_scale(scale, args.months, args.courts, args.seed, plots=not args.no_plots,
+                                  verbose=args.verbose)}
+            with open(history, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+            total = sum(record['timings'].values())
+            exported = record['rows']['exports']
+            print(f"   {record['members']:,} members, {exported['reservations']:,} reservations, "
+                  f"{exported['checkins']:,} check-ins")
+            for stage, seconds in record['timings'].items():
+                print(f"   {stage:36s} {seconds:>8.2f}s {seconds / total:>6.0%}")
+            print(f"   {'total':36s} {total:>8.2f}s")
+
+    print(f"\n✓ Appended {len(args.scales) * args.repeat} record(s) to {history}")
+
+
+def compare(args):
+    """Print each stage's time per commit (fastest repeat) for every scale in the history."""
+    history = Path(args.history)
+    if not history.exists():
+        print(f"❌ No benchmark history at {history}; run the suite first.")
+        return
+
+    # {(scale, months, courts): {commit: {stage: fastest seconds}}}, commits in first-run order
+    runs = defaultdict(dict)
+    with open(history) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            key = (record['scale'], record['months'], record['courts'])
+            best = runs[key].setdefault(record['commit'], {})
+            for stage, seconds in record['timings'].items():
+                best[stage] = min(seconds, best.get(stage, seconds))
+            best['total'] = min(sum(record['timings'].values()), best.get('total', float('inf')))
+
+    for (scale, months, courts), commits in sorted(runs.items()):
+        shown = list(commits)[-args.last:]
+        print(f"\n📊 Scale {scale:g} ({months} months, {courts} courts) — fastest run per commit")
+        print(f"   {'Stage':36s}" + ''.join(f" {c[:13]:>13s}" for c in shown) + f" {'Change':>8s}")
+
+        stages = list(dict.fromkeys(s for c in shown for s in commits[c] if s != 'total')) + ['total']
+        for stage in stages:
+            times = [commits[c].get(stage) for c in shown]
+            cells = ''.join(f" {t:>12.2f}s" if t is not None else f" {'-':>13s}" for t in times)
+            change = ''
+            if len(times) > 1 and times[-1] is not None and times[-2]:
+                change = f"{times[-1] / times[-2] - 1:+.0%}"
+            print(f"   {stage:36s}{cells} {change:>8s}")
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=float, nargs='+', default=[1],
+                        help='member multiples of the October 2025 exports to run')
+    parser.add_argument('--months', type=int, default=BASE_MONTHS)
+    parser.add_argument('--courts', type=int, default=BASE_COURTS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=1, help='runs per scale (--compare keeps the fastest)')
+    parser.add_argument('--no-plots', action='store_true', help='skip the JTBD visualization stage')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON-lines file runs are appended to')
+    parser.add_argument('--compare', action='store_true', help='compare stage timings across commits and exit')
+    parser.add_argument('--last', type=int, default=5, help='commits shown by --compare')
+    parser.add_argument('--verbose', action='store_true', help="show the scripts' own progress output")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args)
+    else:
+        run_suite(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Columnar Report Cache
+Typed, compressed Parquet copies of CourtReserve exports, keyed by the
+SHA-256 of the source CSV and the parse signature of its report schema.
+
+Purpose: Parse each export once. ReportSchema.read_csv() serves a report
+from its cache file while the CSV is unchanged (same hash) and parsed the
+same way (same signature), reading only the requested columns, and writes
+the cache after parsing a CSV it has not seen. create_database.py therefore
+fills the cache on import and the analysis scripts start from columnar
+reads instead of CSV parsing.
+
+A CSV is only re-hashed when its size or modification time changed since
+it was last hashed (source_sha256()), so a cache hit costs a stat rather
+than a pass over the file.
+
+Cache location:
+    courtreserve_cache/<report>-<key>.parquet (repository root)
+    courtreserve_cache/source-hashes.json (size, mtime and SHA-256 per CSV)
+
+Requires pyarrow (pip install pyarrow). Without it every read falls back to
+the CSV, and nothing is cached. Deleting the directory is always safe.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / 'courtreserve_cache'
+
+# Characters of the cache key used in cache file names
+KEY_LENGTH = 16
+
+# Source file hashes by path, with the size and mtime they were computed at
+HASH_INDEX = CACHE_DIR / 'source-hashes.json'
+
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_hash_index():
+    try:
+        with open(HASH_INDEX) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_hash_index(index):
+    """Write the index atomically, dropping files that no longer exist."""
+    index = {path: entry for path, entry in index.items() if os.path.exists(path)}
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp = HASH_INDEX.with_name(f'{HASH_INDEX.name}.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp, HASH_INDEX)
+
+
+def source_sha256(path):
+    """
+    SHA-256 of a source file, reusing the hash recorded in HASH_INDEX while
+    the file's size and modification time (ns) are unchanged. The file is
+    only read when they differ or it has not been hashed before.
+    """
+    stat = os.stat(path)
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    key = os.path.abspath(path)
+
+    index = _read_hash_index()
+    entry = index.get(key)
+    if entry is not None and entry[:2] == stamp:
+        return entry[2]
+
+    digest = file_sha256(path)
+    index[key] = stamp + [digest]
+    _write_hash_index(index)
+    return digest
+
+
+def enabled():
+    """Return True when a Parquet engine is available."""
+    return pq is not None
+
+
+def cache_path(report, csv_file, signature=''):
+    """
+    Return the cache file for a report's source CSV (None without Parquet
+    support). signature identifies how the report is parsed (see
+    ReportSchema.cache_signature()), so changing the parser or the
+    declared dtypes moves to a new cache file instead of reusing a stale one.
+    """
+    if not enabled():
+        return None
+    key = hashlib.sha256(f'{source_sha256(csv_file)}:{signature}'.encode()).hexdigest()
+    return CACHE_DIR / f'{report}-{key[:KEY_LENGTH]}.parquet'
+
+
+def read_cache(path, columns=None):
+    """
+    Read a cache file, or return None when it does not exist.
+
+    columns limits the read to those columns; names missing from the cached
+    report are ignored, as with optional export columns.
+    """
+    if path is None or not path.exists():
+        return None
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [col for col in columns if col in available]
+    return pd.read_parquet(path, engine='pyarrow', columns=columns)
+
+
+def write_cache(path, df):
+    """
+    Write a report to its cache file and return the path.
+
+    The file is written under a temporary name and renamed into place so
+    parallel importers and readers never see a partial file. Frames pyarrow
+    cannot store (e.g. object columns mixing numbers and text) are skipped.
+    """
+    if path is None:
+        return None
+
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        df.to_parquet(tmp, engine='pyarrow', compression='zstd', index=False)
+    except (ValueError, TypeError, NotImplementedError) as e:
+        tmp.unlink(missing_ok=True)
+        print(f"   ⚠️  Not cached ({path.name}): {e}")
+        return None
+
+    os.replace(tmp, path)
+    return path
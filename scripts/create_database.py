@@ -6,7 +6,12 @@ This script imports all CourtReserve CSV files into a local SQLite database
 for easier querying and analysis.
 
 Usage:
-    python3 scripts/create_database.py
+    python3 scripts/create_database.py                # full rebuild
+    python3 scripts/create_database.py --incremental  # upsert new/changed rows
+    python3 scripts/create_database.py --jobs 4       # parse tables in 4 processes
+    python3 scripts/create_database.py --chunksize 50000  # stream big exports
+    python3 scripts/create_database.py --club lincoln-park   # one club of a multi-club setup
+    python3 scripts/create_database.py --all-clubs        # every club under clubs/
 
 CSV Source Directory:
     _to_process/ (place fresh CSV downloads here)
@@ -14,6 +19,14 @@ CSV Source Directory:
 Output:
     courtreserve.db (SQLite database file in repository root)
 
+Multi-club layout:
+    Each club has its own directory under clubs/ with the same layout:
+    clubs/<club>/_to_process/ holds its exports and the import writes
+    clubs/<club>/courtreserve.db. Every table carries a club_id column
+    (DEFAULT_CLUB for the single-club database in the repository root), and
+    query_database.run_club_query() fans queries out across the club
+    databases.
+
 Tables created:
     - reservations
     - members
@@ -25,6 +38,7 @@ Tables created:
     - events
     - instructors
     - sales_summary
+    - player_checkins, player_checkin_counts (per-player aggregates of checkins)
 
 Database file size: ~50-100MB (depending on data volume)
 
@@ -34,33 +48,98 @@ Workflow:
     3. Run: python3 scripts/create_database.py
     4. Database created with fresh data
     5. Move processed CSVs to z_processed_csv_files/
+
+Incremental mode:
+    Keeps the existing database and skips any CSV whose SHA-256 is already
+    recorded in the _import_manifest table. Rows from changed files are
+    upserted by natural key (see UPSERT_KEYS) so overlapping weekly report
+    windows only write rows that are new or different. The per-player
+    aggregates are recomputed only for players with new check-ins.
 """
 
+import argparse
 import sqlite3
 import pandas as pd
 import os
 import glob
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
+from columnar_cache import source_sha256
+from report_schema import SCHEMAS, classify_time_of_day, parse_time_slots
+
 # CSV source directory
 CSV_DIR = '_to_process'
 
 # Database file location
 DB_PATH = 'courtreserve.db'
 
-# CSV file patterns (finds most recent versions in _to_process/)
-CSV_PATTERNS = {
-    'reservations': f'{CSV_DIR}/ReservationReport_*.csv',
-    'members': f'{CSV_DIR}/MembersReport_*.csv',
-    'checkins': f'{CSV_DIR}/CheckinReports*.csv',
-    'court_utilization': f'{CSV_DIR}/Court*Util*.csv',  # Matches Court_Util and CourtUtilization
-    'cancellations': f'{CSV_DIR}/Cancellation*Report*.csv',
-    'event_registrants': f'{CSV_DIR}/EventRegistrantsReports*.csv',
-    'transactions': f'{CSV_DIR}/Transactions*.csv',  # Matches all Transactions files
-    'events': f'{CSV_DIR}/Event*Summary*.csv',  # Matches Event_Summary and Event_Registrant_Summary
-    'event_list': f'{CSV_DIR}/Event_List.csv',
-    'instructors': f'{CSV_DIR}/InstructorReport_*.csv',
-    'sales_summary': f'{CSV_DIR}/Sales*Report*.csv',  # Matches both SalesReport and Sales-Summary-Report
+# Multi-club layout: clubs/<club>/_to_process/ -> clubs/<club>/courtreserve.db
+CLUBS_DIR = 'clubs'
+
+# Column identifying the club in every table, and the club of the single-club database
+CLUB_COLUMN = 'club_id'
+DEFAULT_CLUB = 'pcc'
+
+# Export file names (finds most recent versions in a CSV directory)
+CSV_FILE_PATTERNS = {
+    'reservations': 'ReservationReport_*.csv',
+    'members': 'MembersReport_*.csv',
+    'checkins': 'CheckinReports*.csv',
+    'court_utilization': 'Court*Util*.csv',  # Matches Court_Util and CourtUtilization
+    'cancellations': 'Cancellation*Report*.csv',
+    'event_registrants': 'EventRegistrantsReports*.csv',
+    'transactions': 'Transactions*.csv',  # Matches all Transactions files
+    'events': 'Event*Summary*.csv',  # Matches Event_Summary and Event_Registrant_Summary
+    'event_list': 'Event_List.csv',
+    'instructors': 'InstructorReport_*.csv',
+    'sales_summary': 'Sales*Report*.csv',  # Matches both SalesReport and Sales-Summary-Report
+}
+
+# CSV file patterns in _to_process/
+CSV_PATTERNS = {key: f'{CSV_DIR}/{pattern}' for key, pattern in CSV_FILE_PATTERNS.items()}
+
+# Table recording which source files have been ingested (by content hash)
+MANIFEST_TABLE = '_import_manifest'
+
+# Single-row table with a stamp that changes on every import that writes data
+VERSION_TABLE = '_db_version'
+
+# Per-player check-in aggregates: one summary row and a set of histogram rows
+# per player and group, so segment queries read a few thousand rows instead
+# of every check-in. Rebuilt for the players whose check-ins changed.
+PLAYER_SUMMARY_TABLE = 'player_checkins'
+PLAYER_COUNTS_TABLE = 'player_checkin_counts'
+
+# Aggregates are grouped by these checkins columns (those present), so
+# membership and registration-type segment filters still apply to them
+PLAYER_GROUP_COLUMNS = [CLUB_COLUMN, 'player__#', 'membership_name', 'registration_type']
+
+# Histograms in PLAYER_COUNTS_TABLE: {dimension: (SQL value, column it needs)}
+PLAYER_COUNT_DIMENSIONS = {
+    'event_name': ('event_name', 'event_name'),
+    'time_of_day': ('time_of_day', 'time_of_day'),
+    'hour': ('hour', 'hour'),
+    'dow': ('dow', 'dow'),  # 0=Monday
+}
+
+# Natural keys for incremental upserts. Rows sharing a key are replaced as a
+# group when any of them changed. '*' appends rows that are not already stored
+# verbatim, counting copies (event-style reports without an ID column, where
+# two identical check-ins are two rows): a row exported three times and
+# stored twice is appended once. Tables not listed are snapshots and are
+# replaced whenever their source file changes.
+UPSERT_KEYS = {
+    'reservations': ['confirmation_#'],
+    'members': ['member_#'],
+    'transactions': ['transaction_id'],
+    'court_utilization': ['date', 'time_slot'],
+    'checkins': '*',
+    'cancellations': '*',
+    'event_registrants': '*',
 }
 
 
@@ -74,270 +153,707 @@ def find_latest_csv(pattern):
     return files[0]
 
 
-def create_database():
-    """Create SQLite database and import all CSV files."""
-
-    # Remove existing database
-    if os.path.exists(DB_PATH):
-        print(f"Removing existing database: {DB_PATH}")
-        os.remove(DB_PATH)
+def quote(name):
+    """Quote an SQLite identifier (column names contain '#', '.', etc.)."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def club_paths(club=None):
+    """
+    Return (CSV directory, database path) for a club, or for the single-club
+    layout in the repository root when club is None.
+    """
+    if club is None:
+        return CSV_DIR, DB_PATH
+    if not re.fullmatch(r'[A-Za-z0-9_-]+', club):
+        raise ValueError(f"Club IDs are letters, digits, '-' and '_', not {club!r}")
+    return os.path.join(CLUBS_DIR, club, CSV_DIR), os.path.join(CLUBS_DIR, club, DB_PATH)
+
+
+def list_clubs(with_database=False):
+    """Club IDs under CLUBS_DIR with exports to import (or, with_database, a built database)."""
+    if not os.path.isdir(CLUBS_DIR):
+        return []
+    clubs = []
+    for club in sorted(os.listdir(CLUBS_DIR)):
+        csv_dir, db_path = club_paths(club) if re.fullmatch(r'[A-Za-z0-9_-]+', club) else (None, None)
+        if csv_dir is not None and os.path.exists(db_path if with_database else csv_dir):
+            clubs.append(club)
+    return clubs
+
+
+def table_exists(conn, table):
+    """Check whether a table exists in the database."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+    return row is not None
+
+
+def ensure_manifest(conn):
+    """Create the import manifest table if needed."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            table_name TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            sha256 TEXT NOT NULL,
+            rows INTEGER,
+            imported_at TEXT,
+            PRIMARY KEY (table_name, sha256)
+        )
+    """)
+
+
+def is_imported(conn, table, csv_file):
+    """Check whether this exact file content was already ingested into table."""
+    row = conn.execute(
+        f"SELECT 1 FROM {MANIFEST_TABLE} WHERE table_name = ? AND sha256 = ?",
+        (table, source_sha256(csv_file))
+    ).fetchone()
+    return row is not None
+
+
+def record_import(conn, table, csv_file, rows):
+    """Record an ingested file in the manifest."""
+    conn.execute(
+        f"INSERT OR REPLACE INTO {MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?)",
+        (table, os.path.basename(csv_file), source_sha256(csv_file), rows, datetime.now().isoformat())
+    )
+
+
+def write_version_stamp(conn):
+    """Record a new database version (query result caches key on it)."""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (version TEXT NOT NULL, imported_at TEXT)")
+    conn.execute(f"DELETE FROM {VERSION_TABLE}")
+    conn.execute(f"INSERT INTO {VERSION_TABLE} VALUES (?, ?)", (uuid.uuid4().hex, datetime.now().isoformat()))
+
+
+def read_version_stamp(conn):
+    """Return the database version stamp, or None for databases built before stamps."""
+    if not table_exists(conn, VERSION_TABLE):
+        return None
+    row = conn.execute(f"SELECT version FROM {VERSION_TABLE}").fetchone()
+    return row[0] if row else None
+
+
+def write_table(conn, table, df, incremental=False):
+    """
+    Write a cleaned DataFrame to its table.
+
+    Full imports replace the table. Incremental imports upsert by the
+    table's natural key (UPSERT_KEYS) and return the number of rows written.
+    """
+    keys = UPSERT_KEYS.get(table)
+    if not incremental or keys is None or not table_exists(conn, table):
+        df.to_sql(table, conn, if_exists='replace', index=False)
+        return len(df)
+
+    return upsert_table(conn, table, df, keys)
+
+
+def table_columns(conn, table):
+    """Return the column names of a table in order."""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({quote(table)})")]
+
+
+def add_missing_columns(conn, table, columns):
+    """Add columns that a newer export introduced to an existing table."""
+    existing = set(table_columns(conn, table))
+    for col in columns:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(col)}")
+
+
+def backfill_utilization_hours(conn):
+    """
+    Add start_hour/end_hour to a court_utilization table created before
+    the importer derived them (unchanged files are skipped by --incremental,
+    so their rows would never get them). Returns the number of rows filled.
+    """
+    if 'start_hour' in table_columns(conn, 'court_utilization'):
+        return 0
+    add_missing_columns(conn, 'court_utilization', ['start_hour', 'end_hour'])
+
+    slots = [row[0] for row in conn.execute("SELECT DISTINCT time_slot FROM court_utilization")]
+    hours = parse_time_slots(pd.Series(slots, dtype=object)).astype('Int64')
+    conn.execute("CREATE TEMP TABLE _slot_hours (time_slot TEXT, start_hour INTEGER, end_hour INTEGER)")
+    conn.executemany("INSERT INTO _slot_hours VALUES (?, ?, ?)",
+                     [(slot, None if pd.isna(start) else int(start), None if pd.isna(end) else int(end))
+                      for slot, start, end in zip(slots, hours['start_hour'], hours['end_hour'])])
+    filled = conn.execute("""
+        UPDATE court_utilization SET
+            start_hour = (SELECT start_hour FROM _slot_hours h WHERE h.time_slot = court_utilization.time_slot),
+            end_hour = (SELECT end_hour FROM _slot_hours h WHERE h.time_slot = court_utilization.time_slot)
+    """).rowcount
+    conn.execute("DROP TABLE _slot_hours")
+    return filled
+
+
+def backfill_time_dimensions(conn, table):
+    """
+    Fill the integer time dimensions (report_schema.TIME_DIMENSIONS) of rows
+    stored before the importer materialized them: the columns are added to
+    older tables, and rows appended to such a table by --incremental leave
+    the earlier rows NULL. Returns the number of rows filled.
+    """
+    schema = SCHEMAS[table]
+    dimensions = list(schema.dimension_dtypes())
+    if not dimensions or schema.dimensions not in table_columns(conn, table):
+        return 0
+    add_missing_columns(conn, table, dimensions)
+
+    source = quote(schema.dimensions)
+    missing = ' OR '.join(f"{quote(col)} IS NULL" for col in dimensions)
+    rows = pd.read_sql_query(f"SELECT rowid AS row_id, {source} FROM {quote(table)} "
+                             f"WHERE {source} IS NOT NULL AND ({missing})", conn)
+    if rows.empty:
+        return 0
+    rows[schema.dimensions] = pd.to_datetime(rows[schema.dimensions], format='ISO8601', errors='coerce')
+    dims = schema.add_dimensions(rows)[['row_id'] + dimensions].astype(object)
+    dims = dims.where(dims.notna(), None)
+
+    conn.execute(f"CREATE TEMP TABLE _dims (row_id INTEGER PRIMARY KEY, "
+                 f"{', '.join(quote(col) + ' INTEGER' for col in dimensions)})")
+    conn.executemany(f"INSERT INTO _dims VALUES ({', '.join('?' * (len(dimensions) + 1))})",
+                     dims.itertuples(index=False, name=None))
+    filled = conn.execute(f"""
+        UPDATE {quote(table)} SET
+            {', '.join(f"{quote(col)} = (SELECT {quote(col)} FROM _dims d WHERE d.row_id = {quote(table)}.rowid)"
+                       for col in dimensions)}
+        WHERE rowid IN (SELECT row_id FROM _dims)
+    """).rowcount
+    conn.execute("DROP TABLE _dims")
+    return filled
+
+
+def backfill_club_id(conn, table, club_id):
+    """
+    Add CLUB_COLUMN to a table created before the importer recorded the club
+    (rows imported since always carry it). Returns the number of rows filled.
+    """
+    if CLUB_COLUMN in table_columns(conn, table):
+        return 0
+    add_missing_columns(conn, table, [CLUB_COLUMN])
+    return conn.execute(f"UPDATE {quote(table)} SET {CLUB_COLUMN} = ?", (club_id,)).rowcount
+
+
+def backfill_checkin_time_of_day(conn):
+    """
+    Add time_of_day to a checkins table created before the importer derived
+    it. Returns the number of rows filled.
+    """
+    if 'time_of_day' in table_columns(conn, 'checkins'):
+        return 0
+    add_missing_columns(conn, 'checkins', ['time_of_day'])
+
+    names = [row[0] for row in conn.execute("SELECT DISTINCT event_name FROM checkins")]
+    labels = classify_time_of_day(pd.Series(names, dtype=object))
+    conn.execute("CREATE TEMP TABLE _event_times (event_name TEXT, time_of_day TEXT)")
+    conn.executemany("INSERT INTO _event_times VALUES (?, ?)", zip(names, labels))
+    filled = conn.execute("""
+        UPDATE checkins SET time_of_day = COALESCE(
+            (SELECT time_of_day FROM _event_times t WHERE t.event_name = checkins.event_name), 'unknown')
+    """).rowcount
+    conn.execute("DROP TABLE _event_times")
+    return filled
+
+
+def player_aggregate_sql(conn):
+    """
+    Return (summary SELECT, counts SELECT) over checkins, each with a {where}
+    placeholder, for the columns this checkins table has (None if it has no
+    player column).
+    """
+    available = set(table_columns(conn, 'checkins'))
+    if 'player__#' not in available:
+        return None
+    group = ', '.join(quote(col) for col in PLAYER_GROUP_COLUMNS if col in available)
+
+    aggregates = ["COUNT(*) AS visits"]
+    if 'price_amount' in available:
+        aggregates += [
+            "COUNT(price_amount) AS priced_visits",
+            "SUM(price_amount) AS spend",
+            "SUM(price_amount > 0) AS paid_visits",
+            "SUM(CASE WHEN price_amount > 0 THEN price_amount END) AS paid_spend",
+        ]
+    if 'checkin_datetime' in available:
+        aggregates += [
+            "MIN(checkin_datetime) AS first_checkin",
+            "MAX(checkin_datetime) AS last_checkin",
+            "COUNT(DISTINCT date(checkin_datetime)) AS active_days",
+        ]
+    aggregates.append("MIN(rowid) AS first_row")
+
+    # Names come from the group's first check-in, the rating from its first rated one
+    columns = ['a.' + quote(col) for col in PLAYER_GROUP_COLUMNS if col in available]
+    columns += ['a.' + expr.rsplit(' AS ', 1)[1] for expr in aggregates]
+    joins = ''
+    if {'player_first_name', 'player_last_name'} <= available:
+        columns += ['f.player_first_name', 'f.player_last_name']
+        joins += " JOIN checkins f ON f.rowid = a.first_row"
+    if 'pickleball_rating' in available:
+        aggregates.append("MIN(CASE WHEN pickleball_rating IS NOT NULL THEN rowid END) AS rated_row")
+        columns += ['r.pickleball_rating', 'a.rated_row']
+        joins += " LEFT JOIN checkins r ON r.rowid = a.rated_row"
+
+    summary = (f"SELECT {', '.join(columns)} FROM "
+               f"(SELECT {group}, {', '.join(aggregates)} FROM checkins{{where}} GROUP BY {group}) a{joins}")
+    counts = ' UNION ALL '.join(
+        f"SELECT {group}, '{dimension}' AS dimension, {value} AS value, COUNT(*) AS checkins "
+        f"FROM checkins{{where}} GROUP BY {group}, {value}"
+        for dimension, (value, column) in PLAYER_COUNT_DIMENSIONS.items() if column in available
+    )
+    return summary, counts
+
+
+def refresh_player_aggregates(conn, players=None):
+    """
+    Build PLAYER_SUMMARY_TABLE and PLAYER_COUNTS_TABLE from checkins.
+
+    With players=None both tables are rebuilt; otherwise only the rows of
+    the given player IDs are recomputed (falling back to a rebuild when the
+    tables are missing or checkins gained columns since they were built).
+    Returns the number of summary rows written.
+    """
+    queries = player_aggregate_sql(conn)
+    if queries is None:
+        return 0
+    summary, counts = queries
+
+    if players is not None and table_exists(conn, PLAYER_SUMMARY_TABLE):
+        expected = [col[0] for col in conn.execute(summary.format(where='') + " LIMIT 0").description]
+        if expected != table_columns(conn, PLAYER_SUMMARY_TABLE):
+            players = None
+    elif players is not None:
+        players = None
+
+    if players is None:
+        conn.execute(f"DROP TABLE IF EXISTS {PLAYER_SUMMARY_TABLE}")
+        conn.execute(f"DROP TABLE IF EXISTS {PLAYER_COUNTS_TABLE}")
+        conn.execute(f"CREATE TABLE {PLAYER_SUMMARY_TABLE} AS {summary.format(where='')}")
+        if counts:
+            conn.execute(f"CREATE TABLE {PLAYER_COUNTS_TABLE} AS {counts.format(where='')}")
+        return conn.execute(f"SELECT COUNT(*) FROM {PLAYER_SUMMARY_TABLE}").fetchone()[0]
+
+    conn.execute("CREATE TEMP TABLE _refresh_players (player)")
+    conn.executemany("INSERT INTO _refresh_players VALUES (?)", [(player,) for player in players])
+    where = ' WHERE "player__#" IN (SELECT player FROM temp._refresh_players)'
+    conn.execute(f"DELETE FROM {PLAYER_SUMMARY_TABLE}{where}")
+    written = conn.execute(f"INSERT INTO {PLAYER_SUMMARY_TABLE} {summary.format(where=where)}").rowcount
+    if counts and table_exists(conn, PLAYER_COUNTS_TABLE):
+        conn.execute(f"DELETE FROM {PLAYER_COUNTS_TABLE}{where}")
+        conn.execute(f"INSERT INTO {PLAYER_COUNTS_TABLE} {counts.format(where=where)}")
+    conn.execute("DROP TABLE _refresh_players")
+    return written
+
+
+def upsert_table(conn, table, df, keys):
+    """Insert new rows and replace changed rows of table, matching on keys."""
+    staging = f'_staging_{table}'
+    df.to_sql(staging, conn, if_exists='replace', index=False)
+    return merge_staging(conn, table, staging, keys)
+
+
+def merge_staging(conn, table, staging, keys):
+    """Upsert the rows of a staging table into table by natural key, then drop it."""
+    cursor = conn.cursor()
 
-    # Create new database connection
-    print(f"\nCreating new database: {DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
+    columns = table_columns(conn, staging)
+    add_missing_columns(conn, table, columns)
+    cols = ', '.join(quote(c) for c in columns)
+
+    if keys == '*':
+        # Multiset anti-join: number the copies of each distinct row on both
+        # sides, so the n-th incoming copy is new unless n copies are stored
+        def numbered(source):
+            return f"SELECT {cols}, ROW_NUMBER() OVER (PARTITION BY {cols}) AS _copy FROM {quote(source)}"
+
+        cursor.execute(f"""
+            INSERT INTO {quote(table)} ({cols})
+            SELECT {cols} FROM (
+                SELECT {cols}, _copy FROM ({numbered(staging)})
+                EXCEPT
+                SELECT {cols}, _copy FROM ({numbered(table)})
+            )
+        """)
+        written = cursor.rowcount
+        print(f"   ↻ Appended {written:,} new rows")
+    else:
+        key_cols = ', '.join(quote(k) for k in keys)
+        match = ' AND '.join(f"a.{quote(k)} IS b.{quote(k)}" for k in keys)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {quote('idx_' + table + '_upsert_key')} ON {quote(table)}({key_cols})")
+        cursor.execute(f"CREATE INDEX {quote('idx_' + staging + '_key')} ON {quote(staging)}({key_cols})")
+
+        # Keys whose stored rows differ from the incoming rows (or are new)
+        stored = f"SELECT {cols} FROM {quote(table)} a WHERE EXISTS (SELECT 1 FROM {quote(staging)} b WHERE {match})"
+        cursor.execute("DROP TABLE IF EXISTS temp._changed_keys")
+        cursor.execute(f"""
+            CREATE TEMP TABLE _changed_keys AS
+            SELECT {key_cols} FROM (SELECT {cols} FROM {quote(staging)} EXCEPT {stored})
+            UNION
+            SELECT {key_cols} FROM ({stored} EXCEPT SELECT {cols} FROM {quote(staging)})
+        """)
+
+        target_match = ' AND '.join(f"{quote(table)}.{quote(k)} IS b.{quote(k)}" for k in keys)
+        cursor.execute(f"""
+            DELETE FROM {quote(table)}
+            WHERE EXISTS (SELECT 1 FROM temp._changed_keys b WHERE {target_match})
+        """)
+        cursor.execute(f"""
+            INSERT INTO {quote(table)} ({cols})
+            SELECT {cols} FROM {quote(staging)} a
+            WHERE EXISTS (SELECT 1 FROM temp._changed_keys b WHERE {match})
+        """)
+        written = cursor.rowcount
+        cursor.execute("DROP TABLE temp._changed_keys")
+        print(f"   ↻ Upserted {written:,} new or changed rows (key: {', '.join(keys)})")
+
+    cursor.execute(f"DROP TABLE {quote(staging)}")
+    return written
+
+
+# ============================================================================
+# Table Loaders (read + clean one report; run in worker processes)
+# ============================================================================
+# Column names, categoricals, date formats and derived columns are declared in
+# report_schema.SCHEMAS; only reports needing reshaping have a loader here.
+
+def load_court_utilization(csv_file):
+    """Load the wide utilization report and melt it to (time_slot, date, utilization_pct)."""
+    schema = SCHEMAS['court_utilization']
+    df = schema.read_csv(csv_file)
+
+    # Rename first column to time_slot
+    df = df.rename(columns={df.columns[0]: 'time_slot'})
+
+    # Melt to long format (time_slot, date, utilization_pct)
+    id_vars = ['time_slot']
+    value_vars = [col for col in df.columns if col != 'time_slot']
+
+    df_long = df.melt(id_vars=id_vars, value_vars=value_vars,
+                     var_name='date', value_name='utilization_pct')
+
+    # Parse utilization percentage
+    df_long['utilization_pct'] = df_long['utilization_pct'].str.replace(' %', '').str.replace('%', '')
+    df_long['utilization_pct'] = pd.to_numeric(df_long['utilization_pct'], errors='coerce')
+
+    # Parse date and derive start_hour/end_hour/dow
+    return schema.clean(df_long)
+
+
+def load_transactions(csv_files):
+    """Load, clean and combine one or more transaction reports."""
+    df_combined = pd.concat([SCHEMAS['transactions'].load(f) for f in sorted(csv_files)], ignore_index=True)
+
+    # Overlapping report windows repeat transactions; keep the latest copy
+    if 'transaction_id' in df_combined.columns:
+        df_combined = df_combined.drop_duplicates(subset='transaction_id', keep='last')
+
+    return df_combined
+
+
+def load_instructors(csv_file):
+    """Load and clean the instructor report."""
+    df = SCHEMAS['instructors'].load(csv_file)
+
+    # Handle duplicate column names by adding suffix
+    cols = pd.Series(df.columns)
+    for dup in cols[cols.duplicated()].unique():
+        cols[cols[cols == dup].index.values.tolist()] = [dup + '_' + str(i) if i != 0 else dup for i in range(sum(cols == dup))]
+    df.columns = cols
+
+    return df
+
+
+def load_sales_summary(csv_file):
+    """Load and clean the sales summary report."""
+    df = SCHEMAS['sales_summary'].load(csv_file)
+
+    # Clean up 'name' field (remove extra whitespace and newlines)
+    if 'name' in df.columns:
+        df['name'] = df['name'].str.strip().str.replace('\n', ' ').str.replace(r'\s+', ' ', regex=True)
+
+    return df
+
+
+# Tables in import order: (table, CSV_FILE_PATTERNS key, label, loader)
+IMPORT_PLAN = [
+    ('reservations', 'reservations', 'Reservations', SCHEMAS['reservations'].load),
+    ('members', 'members', 'Members', SCHEMAS['members'].load),
+    ('checkins', 'checkins', 'Check-ins', SCHEMAS['checkins'].load),
+    ('court_utilization', 'court_utilization', 'Court Utilization', load_court_utilization),
+    ('cancellations', 'cancellations', 'Cancellations', SCHEMAS['cancellations'].load),
+    ('event_registrants', 'event_registrants', 'Event Registrants', SCHEMAS['event_registrants'].load),
+    ('transactions', 'transactions', 'Transactions', load_transactions),
+    ('event_summary', 'events', 'Event Summary', SCHEMAS['event_summary'].load),
+    ('event_list', 'event_list', 'Event List', SCHEMAS['event_list'].load),
+    ('instructors', 'instructors', 'Instructors', load_instructors),
+    ('sales_summary', 'sales_summary', 'Sales Summary', load_sales_summary),
+]
+
+# Tables built from every matching file rather than the latest one
+MULTI_FILE_TABLES = {'transactions'}
+
+# Tables that can be streamed in chunks; streaming kicks in automatically for
+# source files above STREAM_THRESHOLD_BYTES (or always with --chunksize)
+STREAMING_TABLES = {'reservations', 'transactions'}
+STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def find_source_files(table, csv_dir=None):
+    """Return the CSV file(s) a table is built from (empty list if none), in csv_dir or CSV_DIR."""
+    pattern = os.path.join(csv_dir or CSV_DIR, CSV_FILE_PATTERNS[{name: key for name, key, _, _ in IMPORT_PLAN}[table]])
+    if table in MULTI_FILE_TABLES:
+        return sorted(glob.glob(pattern))
+    latest = find_latest_csv(pattern)
+    return [latest] if latest else []
+
+
+def parse_table(table, csv_files, club_id=DEFAULT_CLUB):
+    """
+    Worker entry point: run one table's loader, stamp the club and time it.
+
+    Returns (table, DataFrame, seconds). Runs in a separate process when
+    --jobs > 1, so it must only depend on its arguments.
+    """
+    loader = {name: fn for name, _, _, fn in IMPORT_PLAN}[table]
+    start = time.perf_counter()
+    df = loader(csv_files if table in MULTI_FILE_TABLES else csv_files[0])
+    df[CLUB_COLUMN] = club_id
+    return table, df, time.perf_counter() - start
+
+
+def iter_table_chunks(table, csv_files, chunksize, club_id=DEFAULT_CLUB):
+    """Yield cleaned chunks of at most chunksize rows, file by file."""
+    schema = SCHEMAS[table]
+    for csv_file in sorted(csv_files):
+        for chunk in schema.read_csv(csv_file, chunksize=chunksize):
+            chunk = schema.clean(chunk)
+            chunk[CLUB_COLUMN] = club_id
+            yield chunk
+
+
+def should_stream(table, csv_files, chunksize):
+    """Stream a table when asked to, or when its source is too large to load whole."""
+    if table not in STREAMING_TABLES:
+        return False
+    return bool(chunksize) or sum(os.path.getsize(f) for f in csv_files) > STREAM_THRESHOLD_BYTES
+
+
+def stream_table(conn, table, csv_files, incremental, chunksize, club_id=DEFAULT_CLUB):
+    """
+    Import a large report chunk by chunk so peak memory stays bounded by the
+    chunk size. Each cleaned chunk is appended to SQLite; duplicate natural
+    keys across chunks are then removed in SQL (keeping the latest row) and,
+    in incremental mode, the staged rows are upserted into the table.
+
+    Returns (rows read, rows written, parse seconds, write seconds).
+    """
+    keys = UPSERT_KEYS.get(table)
+    merge = incremental and keys not in (None, '*') and table_exists(conn, table)
+    target = f'_staging_{table}' if merge else table
+    conn.execute(f"DROP TABLE IF EXISTS {quote(target)}")
+
+    rows = 0
+    parse_seconds = write_seconds = 0.0
+    chunks = iter_table_chunks(table, csv_files, chunksize or DEFAULT_CHUNKSIZE, club_id)
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        parse_seconds += time.perf_counter() - start
+        if chunk is None:
+            break
+
+        start = time.perf_counter()
+        if table_exists(conn, target):
+            add_missing_columns(conn, target, chunk.columns)
+        chunk.to_sql(target, conn, if_exists='append', index=False)
+        write_seconds += time.perf_counter() - start
+        rows += len(chunk)
+        print(f"   … {rows:,} rows streamed")
+
+    start = time.perf_counter()
+    written = rows
+    if table == 'transactions' and 'transaction_id' in table_columns(conn, target):
+        removed = conn.execute(f"""
+            DELETE FROM {quote(target)} WHERE rowid NOT IN (
+                SELECT MAX(rowid) FROM {quote(target)} GROUP BY transaction_id
+            )
+        """).rowcount
+        written -= removed
+    if merge:
+        written = merge_staging(conn, table, target, keys)
+    write_seconds += time.perf_counter() - start
+
+    return rows, written, parse_seconds, write_seconds
+
+
+def create_database(incremental=False, jobs=1, chunksize=None, club=None):
+    """
+    Create SQLite database and import all CSV files.
+
+    With incremental=True the existing database is kept, unchanged files are
+    skipped and changed files are upserted by natural key. With jobs > 1 the
+    tables are read and cleaned in a process pool while this process writes
+    each finished table to SQLite, so wall time is bounded by the largest
+    report rather than the sum of all reports. Reservations and transactions
+    are streamed in chunks when chunksize is given or their files are large.
+
+    With club, the club's exports (clubs/<club>/_to_process/) are imported
+    into its own database (clubs/<club>/courtreserve.db); see club_paths().
+    """
+    csv_dir, db_path = club_paths(club)
+    club_id = club or DEFAULT_CLUB
+
+    if incremental and os.path.exists(db_path):
+        print(f"\nUpdating existing database: {db_path}")
+    else:
+        # Remove existing database
+        if os.path.exists(db_path):
+            print(f"Removing existing database: {db_path}")
+            os.remove(db_path)
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+        # Create new database connection
+        print(f"\nCreating new database: {db_path}")
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    # WAL lets the analysis scripts keep reading while an import writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    ensure_manifest(conn)
+
+    # Databases from before club_id: stamp stored rows first, so upserts compare like with like
+    stamped = 0
+    if incremental:
+        for table, _, _, _ in IMPORT_PLAN:
+            if table_exists(conn, table):
+                stamped += backfill_club_id(conn, table, club_id)
+        if stamped:
+            print(f"\n   ✓ Stamped {CLUB_COLUMN} '{club_id}' on {stamped:,} existing rows")
+        conn.commit()
 
     tables_created = 0
+    tables_skipped = 0
     total_records = 0
 
     print("\n" + "=" * 80)
     print("IMPORTING CSV FILES TO DATABASE")
     print("=" * 80)
 
-    # Import Reservations
-    csv_file = find_latest_csv(CSV_PATTERNS['reservations'])
-    if csv_file:
-        print(f"\n1. Importing Reservations from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-
-        # Clean column names
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_')
-
-        # Parse dates
-        if 'start_date___time' in df.columns:
-            df['start_datetime'] = pd.to_datetime(df['start_date___time'], errors='coerce')
-        if 'end_date___time' in df.columns:
-            df['end_datetime'] = pd.to_datetime(df['end_date___time'], errors='coerce')
-        if 'created_on' in df.columns:
-            df['created_on'] = pd.to_datetime(df['created_on'], errors='coerce')
-
-        df.to_sql('reservations', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} reservations")
+    # Find source files (and skip unchanged ones in incremental mode)
+    pending = {}
+    labels = {}
+    for number, (table, pattern_key, label, _) in enumerate(IMPORT_PLAN, 1):
+        labels[table] = f"{number}. {label}"
+        found = find_source_files(table, csv_dir)
+
+        if not found:
+            print(f"\n{number}. ⚠️  {label} CSV not found "
+                  f"(pattern: {os.path.join(csv_dir, CSV_FILE_PATTERNS[pattern_key])})")
+            continue
+
+        new_files = [f for f in found if not is_imported(conn, table, f)] if incremental else found
+        if not new_files:
+            print(f"\n{number}. {label} unchanged, skipping {len(found)} file(s)")
+            tables_skipped += 1
+            continue
+
+        print(f"\n{number}. Importing {label} from: {', '.join(new_files)}")
+        pending[table] = new_files
+
+    # Check-ins are append-only, so rows past this rowid are the new ones
+    checkins_seen = None
+    if incremental and table_exists(conn, 'checkins'):
+        checkins_seen = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM checkins").fetchone()[0]
+
+    # Parse tables concurrently; this (single) thread is the only SQLite writer
+    print(f"\nParsing {len(pending)} table(s) with {jobs} worker(s)...")
+    timings = []
+
+    def write_result(table, df, parse_seconds):
+        nonlocal tables_created, total_records
+        print(f"\n{labels[table]}: parsed {len(df):,} rows in {parse_seconds:.2f}s")
+        start = time.perf_counter()
+        written = write_table(conn, table, df, incremental)
+        for csv_file in pending[table]:
+            record_import(conn, table, csv_file, len(df) if len(pending[table]) == 1 else None)
+        conn.commit()
+        write_seconds = time.perf_counter() - start
+        print(f"   ✓ Imported {len(df):,} rows into {table}")
+        timings.append((table, len(df), written, parse_seconds, write_seconds))
         tables_created += 1
-        total_records += len(df)
-    else:
-        print(f"\n1. ⚠️  Reservations CSV not found (pattern: {CSV_PATTERNS['reservations']})")
-
-    # Import Members
-    csv_file = find_latest_csv(CSV_PATTERNS['members'])
-    if csv_file:
-        print(f"\n2. Importing Members from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_')
-
-        # Parse dates
-        if 'current_membership_start_date' in df.columns:
-            df['membership_start_date'] = pd.to_datetime(df['current_membership_start_date'], errors='coerce')
-        if 'date_of_birth' in df.columns:
-            df['date_of_birth'] = pd.to_datetime(df['date_of_birth'], errors='coerce')
-
-        df.to_sql('members', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} members")
-        tables_created += 1
-        total_records += len(df)
-    else:
-        print(f"\n2. ⚠️  Members CSV not found (pattern: {CSV_PATTERNS['members']})")
-
-    # Import Check-ins
-    csv_file = find_latest_csv(CSV_PATTERNS['checkins'])
-    if csv_file:
-        print(f"\n3. Importing Check-ins from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_').str.replace('-', '_')
-
-        # Parse dates
-        if 'check_in_date_time' in df.columns:
-            df['checkin_datetime'] = pd.to_datetime(df['check_in_date_time'], errors='coerce')
-
-        # Parse price from strings like "(Drop-in) $16.00"
-        if 'price' in df.columns:
-            df['price_amount'] = df['price'].str.extract(r'\$(\d+\.?\d*)')[0].astype(float)
-
-        df.to_sql('checkins', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} check-ins")
-        tables_created += 1
-        total_records += len(df)
-    else:
-        print(f"\n3. ⚠️  Check-ins CSV not found (pattern: {CSV_PATTERNS['checkins']})")
-
-    # Import Court Utilization
-    csv_file = find_latest_csv(CSV_PATTERNS['court_utilization'])
-    if csv_file:
-        print(f"\n4. Importing Court Utilization from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False, skiprows=1)
-
-        # Rename first column to time_slot
-        df.columns = [df.columns[0]] + list(df.columns[1:])
-        df = df.rename(columns={df.columns[0]: 'time_slot'})
-
-        # Melt to long format (time_slot, date, utilization_pct)
-        id_vars = ['time_slot']
-        value_vars = [col for col in df.columns if col != 'time_slot']
-
-        df_long = df.melt(id_vars=id_vars, value_vars=value_vars,
-                         var_name='date', value_name='utilization_pct')
-
-        # Parse utilization percentage
-        df_long['utilization_pct'] = df_long['utilization_pct'].str.replace(' %', '').str.replace('%', '')
-        df_long['utilization_pct'] = pd.to_numeric(df_long['utilization_pct'], errors='coerce')
-
-        # Parse date
-        df_long['date'] = pd.to_datetime(df_long['date'], errors='coerce')
-
-        df_long.to_sql('court_utilization', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df_long):,} utilization records ({len(df)} time slots × {len(value_vars)} dates)")
-        tables_created += 1
-        total_records += len(df_long)
-    else:
-        print(f"\n4. ⚠️  Court Utilization CSV not found (pattern: {CSV_PATTERNS['court_utilization']})")
-
-    # Import Cancellations
-    csv_file = find_latest_csv(CSV_PATTERNS['cancellations'])
-    if csv_file:
-        print(f"\n5. Importing Cancellations from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_')
-
-        # Parse dates
-        if 'start_date___time' in df.columns:
-            df['start_datetime'] = pd.to_datetime(df['start_date___time'], errors='coerce')
-        if 'cancelled_on' in df.columns:
-            df['cancelled_on'] = pd.to_datetime(df['cancelled_on'], errors='coerce')
-
-        df.to_sql('cancellations', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} cancellations")
+        total_records += written
+
+    def stream_result(table):
+        nonlocal tables_created, total_records
+        print(f"\n{labels[table]}: streaming in chunks of {chunksize or DEFAULT_CHUNKSIZE:,} rows")
+        rows, written, parse_seconds, write_seconds = stream_table(conn, table, pending[table], incremental, chunksize,
+                                                                   club_id)
+        for csv_file in pending[table]:
+            record_import(conn, table, csv_file, rows if len(pending[table]) == 1 else None)
+        conn.commit()
+        print(f"   ✓ Imported {rows:,} rows into {table}")
+        timings.append((table, rows, written, parse_seconds, write_seconds))
         tables_created += 1
-        total_records += len(df)
+        total_records += written
+
+    # Streamed tables are parsed and written here while the pool handles the rest
+    streamed = [table for table, files in pending.items() if should_stream(table, files, chunksize)]
+    in_memory = [table for table in pending if table not in streamed]
+
+    if jobs > 1 and len(in_memory) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(in_memory))) as pool:
+            futures = [pool.submit(parse_table, table, pending[table], club_id) for table in in_memory]
+            for table in streamed:
+                stream_result(table)
+            for future in as_completed(futures):
+                write_result(*future.result())
     else:
-        print(f"\n5. ⚠️  Cancellations CSV not found (pattern: {CSV_PATTERNS['cancellations']})")
-
-    # Import Event Registrants
-    csv_file = find_latest_csv(CSV_PATTERNS['event_registrants'])
-    if csv_file:
-        print(f"\n6. Importing Event Registrants from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_')
-
-        # Parse dates
-        if 'event_date' in df.columns:
-            df['event_date'] = pd.to_datetime(df['event_date'], errors='coerce')
-
-        df.to_sql('event_registrants', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} event registrations")
-        tables_created += 1
-        total_records += len(df)
-    else:
-        print(f"\n6. ⚠️  Event Registrants CSV not found (pattern: {CSV_PATTERNS['event_registrants']})")
-
-    # Import Transactions (may be multiple files)
-    csv_files = glob.glob(CSV_PATTERNS['transactions'])
-    if csv_files:
-        print(f"\n7. Importing Transactions from {len(csv_files)} file(s):")
-        dfs = []
-        for csv_file in sorted(csv_files):
-            print(f"   - {os.path.basename(csv_file)}")
-            df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-
-            # Clean column names (preserve # and other special chars in quotes)
-            df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_').str.replace('.', '')
-
-            # Remove summary row (last row with no Transaction ID)
-            if 'transaction_id' in df.columns:
-                df = df[df['transaction_id'].notna()]
-
-            dfs.append(df)
-
-        # Combine all transaction files
-        df_combined = pd.concat(dfs, ignore_index=True)
-
-        # Parse dates (after combining)
-        if 'trans_date' in df_combined.columns:
-            df_combined['trans_datetime'] = pd.to_datetime(df_combined['trans_date'], errors='coerce')
-        if 'paid_date' in df_combined.columns:
-            df_combined['paid_datetime'] = pd.to_datetime(df_combined['paid_date'], errors='coerce')
-
-        df_combined.to_sql('transactions', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df_combined):,} transactions total")
-        tables_created += 1
-        total_records += len(df_combined)
-    else:
-        print(f"\n7. ⚠️  Transactions CSV not found (pattern: {CSV_PATTERNS['transactions']})")
-
-    # Import Event Summary
-    csv_file = find_latest_csv(CSV_PATTERNS['events'])
-    if csv_file:
-        print(f"\n8. Importing Event Summary from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_')
-
-        # Parse dates
-        if 'date' in df.columns:
-            df['event_date'] = pd.to_datetime(df['date'], errors='coerce')
-
-        df.to_sql('event_summary', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} event summary records")
-        tables_created += 1
-        total_records += len(df)
-    else:
-        print(f"\n8. ⚠️  Event Summary CSV not found (pattern: {CSV_PATTERNS['events']})")
-
-    # Import Event List
-    csv_file = find_latest_csv(CSV_PATTERNS['event_list'])
-    if csv_file:
-        print(f"\n9. Importing Event List from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_')
-
-        df.to_sql('event_list', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} event types")
-        tables_created += 1
-        total_records += len(df)
-    else:
-        print(f"\n9. ⚠️  Event List CSV not found (pattern: {CSV_PATTERNS['event_list']})")
-
-    # Import Instructors
-    csv_file = find_latest_csv(CSV_PATTERNS['instructors'])
-    if csv_file:
-        print(f"\n10. Importing Instructors from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_')
-
-        # Handle duplicate column names by adding suffix
-        cols = pd.Series(df.columns)
-        for dup in cols[cols.duplicated()].unique():
-            cols[cols[cols == dup].index.values.tolist()] = [dup + '_' + str(i) if i != 0 else dup for i in range(sum(cols == dup))]
-        df.columns = cols
-
-        df.to_sql('instructors', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} instructors")
-        tables_created += 1
-        total_records += len(df)
-    else:
-        print(f"\n10. ⚠️  Instructors CSV not found (pattern: {CSV_PATTERNS['instructors']})")
-
-    # Import Sales Summary
-    csv_file = find_latest_csv(CSV_PATTERNS['sales_summary'])
-    if csv_file:
-        print(f"\n11. Importing Sales Summary from: {csv_file}")
-        df = pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False)
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('/', '_')
-
-        # Remove empty first row (header separator)
-        df = df[df['item'].notna()]
-
-        # Clean up 'name' field (remove extra whitespace and newlines)
-        if 'name' in df.columns:
-            df['name'] = df['name'].str.strip().str.replace('\n', ' ').str.replace(r'\s+', ' ', regex=True)
-
-        # Convert total to numeric (handle strings like "$1,234.56")
-        if 'total' in df.columns:
-            df['total_numeric'] = pd.to_numeric(df['total'].astype(str).str.replace('$', '').str.replace(',', ''), errors='coerce')
-
-        df.to_sql('sales_summary', conn, if_exists='replace', index=False)
-        print(f"   ✓ Imported {len(df):,} sales records")
-        tables_created += 1
-        total_records += len(df)
-    else:
-        print(f"\n11. ⚠️  Sales Summary CSV not found (pattern: {CSV_PATTERNS['sales_summary']})")
+        for table in streamed:
+            stream_result(table)
+        for table in in_memory:
+            write_result(*parse_table(table, pending[table], club_id))
+
+    # Databases from before the derived time-slot, time-dimension and time-of-day columns
+    backfilled = stamped
+    if incremental and table_exists(conn, 'court_utilization'):
+        backfilled = backfill_utilization_hours(conn)
+        if backfilled:
+            print(f"\n   ✓ Derived start_hour/end_hour for {backfilled:,} existing court_utilization rows")
+        conn.commit()
+    if incremental:
+        for table, schema in SCHEMAS.items():
+            if schema.dimensions and table_exists(conn, table):
+                dimensioned = backfill_time_dimensions(conn, table)
+                if dimensioned:
+                    print(f"\n   ✓ Derived time dimensions for {dimensioned:,} existing {table} rows")
+                backfilled += dimensioned
+        conn.commit()
+    filled = 0
+    if incremental and table_exists(conn, 'checkins'):
+        filled = backfill_checkin_time_of_day(conn)
+        if filled:
+            print(f"\n   ✓ Derived time_of_day for {filled:,} existing checkins rows")
+        backfilled += filled
+        conn.commit()
+
+    # Per-player aggregates: rebuilt on full imports, refreshed for the players with new check-ins
+    if table_exists(conn, 'checkins'):
+        if checkins_seen is None or filled or stamped or not table_exists(conn, PLAYER_SUMMARY_TABLE):
+            summarized = refresh_player_aggregates(conn)
+            if summarized:
+                print(f"\n   ✓ Aggregated check-ins into {summarized:,} {PLAYER_SUMMARY_TABLE} rows")
+            if incremental:
+                backfilled += summarized
+        elif 'checkins' in pending:
+            players = [row[0] for row in conn.execute(
+                'SELECT DISTINCT "player__#" FROM checkins WHERE rowid > ?', (checkins_seen,))]
+            refresh_player_aggregates(conn, players)
+            print(f"\n   ↻ Refreshed {PLAYER_SUMMARY_TABLE} for {len(players):,} players with new check-ins")
+        conn.commit()
 
     # Create indexes for common queries
     print("\n" + "=" * 80)
@@ -352,16 +868,25 @@ def create_database():
 
     indexes = [
         ("reservations", "CREATE INDEX IF NOT EXISTS idx_reservations_start ON reservations(start_datetime)"),
+        ("reservations", "CREATE INDEX IF NOT EXISTS idx_reservations_player ON reservations(\"player__#\")"),
         ("reservations", "CREATE INDEX IF NOT EXISTS idx_reservations_confirmation ON reservations(\"confirmation_#\")"),
+        ("reservations", "CREATE INDEX IF NOT EXISTS idx_reservations_dow_hour ON reservations(dow, hour)"),
+        ("reservations", "CREATE INDEX IF NOT EXISTS idx_reservations_week ON reservations(iso_week)"),
         ("members", "CREATE INDEX IF NOT EXISTS idx_members_id ON members(\"member_#\")"),
         ("members", "CREATE INDEX IF NOT EXISTS idx_members_status ON members(membership_status)"),
         ("checkins", "CREATE INDEX IF NOT EXISTS idx_checkins_player ON checkins(\"player__#\")"),
         ("checkins", "CREATE INDEX IF NOT EXISTS idx_checkins_datetime ON checkins(checkin_datetime)"),
         ("checkins", "CREATE INDEX IF NOT EXISTS idx_checkins_registration ON checkins(registration_type)"),
-        ("court_utilization", "CREATE INDEX IF NOT EXISTS idx_court_util_date ON court_utilization(date)"),
+        ("checkins", "CREATE INDEX IF NOT EXISTS idx_checkins_dow_hour ON checkins(dow, hour)"),
+        (PLAYER_SUMMARY_TABLE, f"CREATE INDEX IF NOT EXISTS idx_player_checkins_player ON {PLAYER_SUMMARY_TABLE}(\"player__#\")"),
+        (PLAYER_COUNTS_TABLE, f"CREATE INDEX IF NOT EXISTS idx_player_checkin_counts_player ON {PLAYER_COUNTS_TABLE}(\"player__#\", dimension)"),
+        ("court_utilization", "CREATE INDEX IF NOT EXISTS idx_court_util_date_hour ON court_utilization(date, start_hour)"),
+        ("court_utilization", "CREATE INDEX IF NOT EXISTS idx_court_util_dow_hour ON court_utilization(dow, start_hour)"),
         ("cancellations", "CREATE INDEX IF NOT EXISTS idx_cancellations_start ON cancellations(start_datetime)"),
+        ("cancellations", "CREATE INDEX IF NOT EXISTS idx_cancellations_dow_hour ON cancellations(dow, hour)"),
         ("transactions", "CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(trans_datetime)"),
         ("transactions", "CREATE INDEX IF NOT EXISTS idx_transactions_member ON transactions(\"member_#\")"),
+        ("transactions", "CREATE INDEX IF NOT EXISTS idx_transactions_month ON transactions(month, dow)"),
     ]
 
     for table, idx_sql in indexes:
@@ -372,20 +897,37 @@ def create_database():
             except Exception as e:
                 print(f"   ⚠️  Skipped index (column may not exist): {idx_sql.split('idx_')[1].split(' ON')[0]}")
 
+    # New data invalidates cached query results
+    if pending or backfilled or not incremental:
+        write_version_stamp(conn)
+
     conn.commit()
 
     # Get database size
-    db_size = os.path.getsize(DB_PATH) / (1024 * 1024)  # MB
+    db_size = os.path.getsize(db_path) / (1024 * 1024)  # MB
 
     # Print summary
     print("\n" + "=" * 80)
     print("DATABASE CREATION COMPLETE")
     print("=" * 80)
     print(f"\n📊 Summary:")
-    print(f"   • Tables created: {tables_created}")
-    print(f"   • Total records: {total_records:,}")
-    print(f"   • Database file: {DB_PATH}")
+    if incremental:
+        print(f"   • Tables updated: {tables_created}")
+        print(f"   • Tables unchanged (skipped): {tables_skipped}")
+        print(f"   • Records written: {total_records:,}")
+    else:
+        print(f"   • Tables created: {tables_created}")
+        print(f"   • Total records: {total_records:,}")
+    print(f"   • Database file: {db_path} ({CLUB_COLUMN} '{club_id}')")
     print(f"   • Database size: {db_size:.1f} MB")
+    print(f"   • Wall time: {time.perf_counter() - started:.2f}s ({jobs} worker(s))")
+
+    # Per-table import timings
+    if timings:
+        print(f"\n⏱  Import timings:")
+        print(f"   {'Table':20s} {'Rows':>10s} {'Written':>10s} {'Parse':>8s} {'Write':>8s}")
+        for table, rows, written, parse_seconds, write_seconds in timings:
+            print(f"   {table:20s} {rows:>10,} {written:>10,} {parse_seconds:>7.2f}s {write_seconds:>7.2f}s")
 
     # Show table info
     print(f"\n📋 Tables:")
@@ -400,11 +942,44 @@ def create_database():
 
     print(f"\n✅ Database ready! Use SQLite client or Python to query.")
     print(f"\nExample query:")
-    print(f"   sqlite3 {DB_PATH}")
+    print(f"   sqlite3 {db_path}")
     print(f"   SELECT COUNT(*) FROM reservations;")
 
-    return DB_PATH
+    return db_path
+
+
+def main():
+    """Parse command-line options and build the database."""
+    parser = argparse.ArgumentParser(description='Create SQLite database from CourtReserve CSV exports.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='keep the existing database, skip unchanged files and upsert new/changed rows')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='number of worker processes parsing tables in parallel (default: 1, in-process)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream reservations and transactions in chunks of this many rows '
+                             f'(default: only files over {STREAM_THRESHOLD_BYTES // (1024 * 1024)} MB, '
+                             f'{DEFAULT_CHUNKSIZE:,} rows per chunk)')
+    clubs = parser.add_mutually_exclusive_group()
+    clubs.add_argument('--club', help=f'import {CLUBS_DIR}/CLUB/{CSV_DIR}/ into {CLUBS_DIR}/CLUB/{DB_PATH}')
+    clubs.add_argument('--all-clubs', action='store_true',
+                       help=f'import every club under {CLUBS_DIR}/, one database per club')
+    args = parser.parse_args()
+
+    options = {'incremental': args.incremental, 'jobs': max(1, args.jobs), 'chunksize': args.chunksize}
+    if not args.all_clubs:
+        create_database(club=args.club, **options)
+        return
+
+    found = list_clubs()
+    if not found:
+        print(f"No clubs found: expected {CLUBS_DIR}/<club>/{CSV_DIR}/ directories of exports")
+        return
+    for club in found:
+        print("\n" + "#" * 80)
+        print(f"CLUB: {club}")
+        print("#" * 80)
+        create_database(club=club, **options)
 
 
 if __name__ == '__main__':
-    create_database()
+    main()
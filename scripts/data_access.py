@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+CourtReserve Data Access
+One entry point for the analysis scripts to get report data: typed frames
+served from courtreserve.db, or parsed from the CSV exports (exactly as the
+importer would store them) when the database or table is missing.
+
+Purpose: Stop hard-coding export filenames in every analysis and let SQLite
+do the filtering. Date ranges, player IDs and membership names are pushed
+down into the WHERE clause (using the importer's indexes) so an analysis
+only pulls the rows it needs.
+
+Usage:
+    from data_access import load_report
+
+    # Database column names, all rows
+    members = load_report('members')
+
+    # Export headers (as in the CSV) for just the listed columns
+    checkins = load_report('checkins', columns=['Player _#', 'Price'],
+                           start='2025-06-01', end='2025-07-01',
+                           memberships=['Non-Member/Visitor'])
+
+Filters:
+    start, end   - date range on the report's date column (start <= d < end)
+    players      - player/member IDs; '#1234', '1234' and 1234 all match
+    memberships  - case-insensitive substrings of the membership name
+    partition    - (index, count): one member-ID partition of the rows, see
+                   member_partition(); out_of_core.py iterates over them
+"""
+
+import os
+
+import pandas as pd
+
+from create_database import DB_PATH, find_source_files, parse_table, quote, table_columns, table_exists
+from query_database import get_pool
+from report_schema import SCHEMAS
+
+
+def resolve_source(report, source='auto'):
+    """
+    Return 'db' or 'csv' for a report.
+
+    'auto' prefers the database when it has the table and falls back to the
+    CSV exports; FileNotFoundError is raised when neither is available.
+    """
+    if source not in ('auto', 'db', 'csv'):
+        raise ValueError(f"source must be 'auto', 'db' or 'csv', not {source!r}")
+
+    if source in ('auto', 'db') and os.path.exists(DB_PATH):
+        with get_pool().connection() as conn:
+            found = table_exists(conn, report)
+        if found:
+            return 'db'
+    if source == 'db':
+        raise FileNotFoundError(f"Table '{report}' not found in {DB_PATH} (run scripts/create_database.py)")
+
+    if not find_source_files(report):
+        raise FileNotFoundError(f"No {DB_PATH} table or CSV export found for '{report}'")
+    return 'csv'
+
+
+def describe_source(report, source='auto'):
+    """Return where a report would be read from: the database path or its CSV file(s)."""
+    if resolve_source(report, source) == 'db':
+        return DB_PATH
+    return ', '.join(find_source_files(report))
+
+
+def load_report(report, columns=None, start=None, end=None, players=None, memberships=None, source='auto',
+                partition=None):
+    """
+    Load one report as a typed DataFrame.
+
+    Args:
+        report: Table name (a key of report_schema.SCHEMAS)
+        columns: Export headers to load; the frame then uses those headers.
+            None loads every column under its database name.
+        start, end: Date range on the report's date column (end exclusive)
+        players: Player/member IDs to keep
+        memberships: Membership names to keep (case-insensitive substrings)
+        source: 'auto', 'db' or 'csv'
+        partition: (index, count) keeps the rows of member-ID partition index
+            of count; the frame is then indexed by each row's position in
+            the report (its rowid), so partial results can be put back in
+            report order
+
+    Returns:
+        DataFrame with declared categoricals and parsed date columns
+    """
+    schema = SCHEMAS[report]
+    filters = _filters(schema, start, end, players, memberships, partition)
+
+    # Export header -> database column
+    names = {header: schema.clean_name(header) for header in columns} if columns is not None else None
+    wanted = list(names.values()) if names is not None else None
+
+    if resolve_source(report, source) == 'db':
+        df = _read_db(report, wanted, filters)
+    else:
+        df = _read_csv(report, filters)
+
+    df = _restore_types(schema, df)
+    if names is None:
+        return df
+
+    present = {header: col for header, col in names.items() if col in df.columns}
+    return df[list(present.values())].set_axis(list(present), axis=1)
+
+
+def _filters(schema, start, end, players, memberships, partition=None):
+    """Validate filters against the schema and return [(kind, column, value)]."""
+    filters = []
+
+    if start is not None or end is not None:
+        if schema.date_column is None:
+            raise ValueError(f"{schema.name} has no date column to filter on")
+        if start is not None:
+            filters.append(('start', schema.date_column, pd.Timestamp(start)))
+        if end is not None:
+            filters.append(('end', schema.date_column, pd.Timestamp(end)))
+
+    if players is not None:
+        if schema.player_column is None:
+            raise ValueError(f"{schema.name} has no player column to filter on")
+        filters.append(('players', schema.player_column, _player_keys(players)))
+
+    if memberships is not None:
+        if schema.membership_column is None:
+            raise ValueError(f"{schema.name} has no membership column to filter on")
+        filters.append(('memberships', schema.membership_column, [str(m) for m in memberships]))
+
+    if partition is not None:
+        if schema.player_column is None:
+            raise ValueError(f"{schema.name} has no player column to partition on")
+        index, count = partition
+        if not 0 <= index < count:
+            raise ValueError(f"partition index must be in 0..{count - 1}, not {index}")
+        filters.append(('partition', schema.player_column, (index, count)))
+
+    return filters
+
+
+def member_partition(ids, count):
+    """
+    Member-ID partition (0..count-1) of each ID: the numeric part of the ID
+    ('#1234', '1234' and 1234 alike) modulo count. Missing and non-numeric IDs
+    fall in partition 0. The database applies the same rule in SQL
+    (_partition_sql), so a member's rows share a partition in every table.
+    """
+    keys = ids.astype(object).where(ids.notna(), '').astype(str).str.strip().str.lstrip('#')
+    numbers = pd.to_numeric(keys, errors='coerce').fillna(0).abs() // 1
+    return (numbers % count).astype('int64')
+
+
+def _partition_sql(column):
+    """SQL twin of member_partition() for a column; the partition count is its one parameter."""
+    number = f"CAST(ltrim(trim(CAST({quote(column)} AS TEXT)), '#') AS INTEGER)"
+    return f"COALESCE(abs({number}), 0) % ?"
+
+
+def _player_keys(players):
+    """Every stored form of the given IDs: '#1234' (reservations), '1234' and 1234."""
+    keys = []
+    for player in players:
+        player = str(player).strip().lstrip('#')
+        keys += [player, '#' + player]
+        if player.isdigit():
+            keys.append(int(player))
+    return keys
+
+
+def _read_db(table, columns, filters):
+    """SELECT the requested columns with the filters as a WHERE clause."""
+    with get_pool().connection() as conn:
+        available = set(table_columns(conn, table))
+        selected = [col for col in columns if col in available] if columns is not None else []
+        select = ', '.join(quote(col) for col in selected) if selected else '*'
+
+        where = []
+        params = []
+        for kind, column, value in filters:
+            if column not in available:
+                raise ValueError(f"Column '{column}' not found in {table}")
+            if kind == 'start':
+                where.append(f"{quote(column)} >= ?")
+                params.append(value.strftime('%Y-%m-%d %H:%M:%S'))
+            elif kind == 'end':
+                where.append(f"{quote(column)} < ?")
+                params.append(value.strftime('%Y-%m-%d %H:%M:%S'))
+            elif kind == 'players':
+                where.append(f"{quote(column)} IN ({', '.join('?' * len(value))})")
+                params += value
+            elif kind == 'partition':
+                where.append(f"{_partition_sql(column)} = ?")
+                params += [value[1], value[0]]
+            else:
+                where.append('(' + ' OR '.join(f"{quote(column)} LIKE ? ESCAPE '\\'" for _ in value) + ')')
+                params += ['%' + _escape_like(name) + '%' for name in value]
+
+        # Partitions are indexed by rowid (position in the report)
+        positioned = any(kind == 'partition' for kind, _, _ in filters)
+        if positioned:
+            select = f"rowid AS _position, {select}"
+
+        sql = f"SELECT {select} FROM {quote(table)}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        # Keep export order (an index scan would otherwise return rows in index order)
+        sql += " ORDER BY rowid"
+        df = pd.read_sql_query(sql, conn, params=params)
+        if positioned:
+            df = df.set_index('_position').rename_axis(None)
+        return df
+
+
+def _escape_like(text):
+    """Escape LIKE wildcards so membership names match literally."""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _read_csv(table, filters):
+    """Parse the table's exports with the importer's loader, then apply the filters."""
+    _, df, _ = parse_table(table, find_source_files(table))
+
+    keep = pd.Series(True, index=df.index)
+    for kind, column, value in filters:
+        if column not in df.columns:
+            raise ValueError(f"Column '{column}' not found in {table}")
+        if kind == 'start':
+            keep &= df[column] >= value
+        elif kind == 'end':
+            keep &= df[column] < value
+        elif kind == 'players':
+            keep &= df[column].isin(value)
+        elif kind == 'partition':
+            keep &= member_partition(df[column], value[1]) == value[0]
+        else:
+            names = df[column].astype(object)
+            matched = pd.Series(False, index=df.index)
+            for name in value:
+                matched |= names.str.contains(name, case=False, regex=False, na=False)
+            keep &= matched
+
+    # Partitions keep the row positions as their index, as from the database
+    if any(kind == 'partition' for kind, _, _ in filters):
+        return df[keep]
+    return df[keep].reset_index(drop=True)
+
+
+def _restore_types(schema, df):
+    """Re-apply declared categoricals, parse stored timestamps and narrow the time dimensions."""
+    parsed = {target or column for column, (_, target) in schema.datetimes.items()}
+    dimensions = schema.dimension_dtypes()
+    for col in df.columns:
+        if col in schema.categoricals and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+        elif col in parsed and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format='ISO8601', errors='coerce')
+        elif col in dimensions and df[col].dtype != dimensions[col]:
+            df[col] = df[col].astype(dimensions[col])
+    return df
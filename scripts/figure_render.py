@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Figure Rendering
+Renders the analysis scripts' figures from precomputed arrays, in parallel
+worker processes, and skips figures whose inputs have not changed since
+they were last written.
+
+Purpose: The PNGs are 300 dpi and take seconds each to draw. Re-running an
+analysis on the same exports (or after changes that do not touch a
+figure's data) should not redraw them, and independent figures should not
+wait for each other.
+
+Usage:
+    from figure_render import render_figures
+
+    def draw_sizes(path, names, sizes):       # module-level, so workers can import it
+        fig, ax = plt.subplots()
+        ax.bar(names, sizes)
+        fig.savefig(path, dpi=300)
+        plt.close(fig)
+
+    render_figures([(draw_sizes, 'sizes.png', {'names': names, 'sizes': sizes})])
+
+Each figure is (draw function, output path, data). The content hash covers
+the data (arrays, numbers, strings, lists/dicts of them) and the draw
+function's source, so editing a plot re-renders it too. Hashes are kept
+in a .figure-hashes.json next to the figures. Draw functions must be
+module-level (workers look them up by module and name).
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+MANIFEST = '.figure-hashes.json'
+
+
+def _update(digest, value):
+    """Feed a value into a hash, independent of object identity and dict order."""
+    if isinstance(value, np.ndarray):
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}".encode())
+        if value.dtype == object:
+            digest.update(repr(value.tolist()).encode())
+        else:
+            digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'dict')
+        for key in sorted(value, key=str):
+            _update(digest, key)
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}:{len(value)}".encode())
+        for item in value:
+            _update(digest, item)
+    else:
+        digest.update(f"{type(value).__name__}:{value!r}".encode())
+
+
+def content_hash(draw, data):
+    """Hash of a figure's draw function source and input data."""
+    digest = hashlib.sha256()
+    try:
+        digest.update(inspect.getsource(draw).encode())
+    except (OSError, TypeError):
+        digest.update(f"{draw.__module__}.{draw.__qualname__}".encode())
+    _update(digest, data)
+    return digest.hexdigest()
+
+
+def _read_manifest(directory):
+    path = directory / MANIFEST
+    if not path.exists():
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(directory, manifest):
+    path = directory / MANIFEST
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _init_worker():
+    """Workers only write files: use the non-interactive backend."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render(draw, path, data):
+    """Draw one figure (in a worker or inline)."""
+    draw(path, **data)
+    return path
+
+
+def render_figures(figures, jobs=None, force=False):
+    """
+    Render (draw, path, data) figures whose inputs changed, jobs at a time.
+
+    Args:
+        figures: (draw, output path, data dict); draw(path, **data) must save the figure
+        jobs: Worker processes (default: CPU count, at most one per figure to render)
+        force: Render even when the saved hash matches
+
+    Returns:
+        Paths rendered (unchanged figures are skipped)
+    """
+    pending = []
+    manifests = {}
+    for draw, path, data in figures:
+        path = Path(path)
+        directory = path.resolve().parent
+        manifest = manifests.setdefault(directory, _read_manifest(directory))
+        key = content_hash(draw, data)
+        if not force and path.exists() and manifest.get(path.name) == key:
+            print(f"  Unchanged: {path} (inputs identical, not redrawn)")
+            continue
+        pending.append((draw, path, data, directory, key))
+
+    workers = min(jobs or os.cpu_count() or 1, len(pending))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, draw, path, data) for draw, path, data, _, _ in pending]
+            for future in futures:
+                future.result()
+    else:
+        for draw, path, data, _, _ in pending:
+            _render(draw, path, data)
+
+    for draw, path, data, directory, key in pending:
+        manifests[directory][path.name] = key
+        print(f"  Saved: {path}")
+    for directory in {directory for _, _, _, directory, _ in pending}:
+        _write_manifest(directory, manifests[directory])
+
+    return [path for _, path, _, _, _ in pending]
+
+
+def booking_heatmaps(groups, days, hours, n_groups):
+    """
+    Day-of-week × hour counts per group in one pass.
+
+    Args:
+        groups: Group number (0..n_groups-1) of each booking, or -1 to skip it
+        days: Day of week (0=Monday) of each booking, NaN when unknown
+        hours: Hour of day of each booking, NaN when unknown
+
+    Returns:
+        (n_groups, 7, 24) array of booking counts
+    """
+    groups, days, hours = (np.asarray(a, dtype=np.float64) for a in (groups, days, hours))
+    valid = (groups >= 0) & ~np.isnan(days) & ~np.isnan(hours)
+    cells = (groups[valid].astype(np.int64) * 7 + days[valid].astype(np.int64)) * 24 + hours[valid].astype(np.int64)
+    return np.bincount(cells, minlength=n_groups * 7 * 24).reshape(n_groups, 7, 24).astype(np.float64)
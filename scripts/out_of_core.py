@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Out-of-Core Analysis
+Reads a report one partition at a time (by month or by member-ID hash) and
+combines partial aggregates, so an analysis holds one partition in memory
+instead of the whole table.
+
+Purpose: Consolidated multi-club, multi-year exports do not fit in one
+DataFrame per table. The JTBD feature engineering, pay-per-use profile and
+shadow-market aggregation each have a partitioned mode built on this module
+that gives the same results as their in-memory path:
+
+    python3 scripts/analyze_courtreserve_jtbd.py --partitions 16      # member-ID partitions
+    python3 scripts/analyze_pay_per_use_segment.py --partitions 16    # member-ID partitions
+    python3 scripts/analyze_shadow_market_heatmap.py --by-month       # month partitions
+
+Usage:
+    from out_of_core import OrderedCounts, iter_partitions
+
+    events = OrderedCounts()
+    for label, checkins in iter_partitions('checkins', by='member', partitions=16,
+                                           columns=['Player _#', 'Event Name']):
+        events.add(checkins['Event Name'], checkins.index)
+    events.value_counts()       # == full_checkins['Event Name'].value_counts()
+
+Partitions:
+    by='member' - data_access.member_partition(): a member's rows are in the
+                  same partition in every table, so per-member results are
+                  exact; frames are indexed by their rows' position in the report
+    by='month'  - calendar months of the report's date column (rows without a
+                  date are in none)
+
+Memory stays bounded with the database as the source (create_database.py
+streams large exports into it in chunks). With the CSV exports as the source
+every partition is cut from the whole parsed export. Sums and means are
+added partition by partition, so they can differ from the in-memory path in
+the last digits; counts, orderings, medians and quantiles are exact.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_access import load_report, resolve_source
+from query_database import get_pool
+from create_database import quote
+from report_schema import SCHEMAS
+
+
+def month_ranges(report, start=None, end=None, source='auto'):
+    """
+    Calendar months [(month start, next month start)] covering the report's
+    date column, clipped to start <= date < end.
+    """
+    schema = SCHEMAS[report]
+    if schema.date_column is None:
+        raise ValueError(f"{report} has no date column to partition on")
+
+    if resolve_source(report, source) == 'db':
+        with get_pool().connection() as conn:
+            first, last = conn.execute(
+                f"SELECT MIN({quote(schema.date_column)}), MAX({quote(schema.date_column)}) FROM {quote(report)}"
+            ).fetchone()
+    else:
+        dates = load_report(report, columns=[schema.date_column], source=source)[schema.date_column]
+        first, last = dates.min(), dates.max()
+    if pd.isna(first) or pd.isna(last):
+        return []
+
+    first, last = pd.Timestamp(first), pd.Timestamp(last)
+    if start is not None:
+        first = max(first, pd.Timestamp(start))
+    if end is not None:
+        last = min(last, pd.Timestamp(end) - pd.Timedelta(microseconds=1))
+    months = pd.date_range(first.to_period('M').to_timestamp(), last, freq='MS')
+
+    ranges = []
+    for month in months:
+        month_end = month + pd.offsets.MonthBegin(1)
+        ranges.append((month if start is None else max(month, pd.Timestamp(start)),
+                       month_end if end is None else min(month_end, pd.Timestamp(end))))
+    return ranges
+
+
+def iter_partitions(report, by='member', partitions=8, start=None, end=None, **kwargs):
+    """
+    Yield (label, frame) for each partition of a report, loading one at a time.
+
+    Args:
+        report: Table name (a key of report_schema.SCHEMAS)
+        by: 'member' (member-ID hash) or 'month'
+        partitions: Number of member-ID partitions (by='member')
+        start, end: Date range (end exclusive), as for load_report
+        **kwargs: Other load_report arguments (columns, memberships, source, ...)
+
+    Labels are the partition index (by='member') or the month's first day.
+    """
+    if by == 'member':
+        for index in range(partitions):
+            yield index, load_report(report, start=start, end=end, partition=(index, partitions), **kwargs)
+    elif by == 'month':
+        for month_start, month_end in month_ranges(report, start, end, kwargs.get('source', 'auto')):
+            yield month_start, load_report(report, start=month_start, end=month_end, **kwargs)
+    else:
+        raise ValueError(f"by must be 'member' or 'month', not {by!r}")
+
+
+class OrderedCounts:
+    """
+    Value counts accumulated over partitions, remembering where each value
+    first appeared so the combined counts sort exactly like
+    Series.value_counts() over the whole column (ties in first-seen order).
+    Numeric counts also give the column's describe() and median().
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.dtype = None
+        self.counts = {}
+        self.first_seen = {}
+        self.seen = 0
+
+    def add(self, values, positions=None):
+        """
+        Count a partition's values (missing ones are skipped, as in value_counts).
+
+        positions are the rows' positions in the whole column (e.g. the index
+        of a member partition); by default partitions are taken in order.
+        """
+        # The combined counts are indexed like the column (categoricals by their values)
+        if self.dtype is None and isinstance(values, pd.Series) and not isinstance(values.dtype, pd.CategoricalDtype):
+            self.dtype = values.dtype
+        values = pd.Series(np.asarray(values, dtype=object))
+        positions = (np.arange(self.seen, self.seen + len(values)) if positions is None
+                     else np.asarray(positions))
+        self.seen += len(values)
+
+        present = values.notna().to_numpy()
+        if not present.any():
+            return self
+        partial = pd.DataFrame({'value': values[present].to_numpy(), 'position': positions[present]})
+        grouped = partial.groupby('value', sort=False)['position'].agg(['size', 'min'])
+        for value, count, first in zip(grouped.index, grouped['size'], grouped['min']):
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+            self.first_seen[value] = min(self.first_seen.get(value, first), first)
+        return self
+
+    @property
+    def total(self):
+        """Number of values counted."""
+        return sum(self.counts.values())
+
+    def value_counts(self):
+        """Counts in descending order, ties in first-seen order (as Series.value_counts)."""
+        values = sorted(self.counts, key=self.first_seen.get)
+        counts = pd.Series([self.counts[value] for value in values], dtype='int64',
+                           index=pd.Index(values, dtype=self.dtype, name=self.name), name='count')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def _sorted(self):
+        """Distinct values ascending and their cumulative counts."""
+        values = np.array(sorted(self.counts), dtype=np.float64)
+        counts = np.array([self.counts[value] for value in sorted(self.counts)], dtype=np.int64)
+        return values, counts, np.cumsum(counts)
+
+    def quantile(self, q):
+        """Linearly interpolated quantile, as Series.quantile over the counted values."""
+        values, counts, cumulative = self._sorted()
+        n = int(cumulative[-1]) if len(cumulative) else 0
+        if n == 0:
+            return np.nan
+        virtual = (n - 1) * q
+        previous = int(np.floor(virtual))
+        following = min(previous + 1, n - 1)
+        a = values[np.searchsorted(cumulative, previous, side='right')]
+        b = values[np.searchsorted(cumulative, following, side='right')]
+        gamma = virtual - previous
+        # numpy's lerp: interpolate from the nearer end
+        return float(b - (b - a) * (1 - gamma)) if gamma >= 0.5 else float(a + (b - a) * gamma)
+
+    def median(self):
+        """Median of the counted values (np.median averages the two middle values)."""
+        values, counts, cumulative = self._sorted()
+        n = int(cumulative[-1]) if len(cumulative) else 0
+        if n == 0:
+            return np.nan
+        a = values[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+        b = values[np.searchsorted(cumulative, n // 2, side='right')]
+        return float(np.mean([a, b]))
+
+    def describe(self):
+        """Count, mean, std, min, quartiles and max, as Series.describe() over the counted values."""
+        values, counts, _ = self._sorted()
+        n = int(counts.sum())
+        mean = float((values * counts).sum() / n) if n else np.nan
+        std = float(np.sqrt((counts * (values - mean) ** 2).sum() / (n - 1))) if n > 1 else np.nan
+        return pd.Series([n, mean, std,
+                          values[0] if n else np.nan,
+                          self.quantile(0.25), self.quantile(0.5), self.quantile(0.75),
+                          values[-1] if n else np.nan],
+                         index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
+                         name=self.name, dtype=np.float64)
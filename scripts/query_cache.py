@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Query Result Cache
+Persistent cache of query_database.run_query() results, keyed by the
+normalized SQL, its parameters and the database version stamp that
+create_database.py writes on every import.
+
+Purpose: Dashboard refreshes and repeated summary runs return stored
+results instead of re-running full-table aggregates. The next import writes
+a new version stamp, so every cached result of the old data stops matching;
+there is nothing to invalidate by hand.
+
+Cache location:
+    courtreserve_cache/query_results.db (next to the columnar cache)
+
+Entries are evicted least-recently-used once the cache exceeds
+MAX_CACHE_BYTES. Databases built before version stamps are never cached.
+Deleting the file is always safe.
+"""
+
+import hashlib
+import json
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from columnar_cache import CACHE_DIR
+
+CACHE_PATH = CACHE_DIR / 'query_results.db'
+
+# Total size of stored results; least recently used entries are evicted beyond it
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Quoted strings/identifiers are kept verbatim; runs of whitespace and comments become one space
+_SQL_TOKENS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|(?:\s|--[^\n]*|/\*.*?\*/)+""", re.DOTALL)
+
+_local = threading.local()
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and strip comments outside quoted text."""
+    return _SQL_TOKENS.sub(lambda m: m.group(1) or ' ', sql).strip()
+
+
+def cache_key(db_path, version, sql, params=None):
+    """Return the cache key of a query against one version of a database."""
+    payload = json.dumps([_database_id(db_path), version, normalize_sql(sql), params], default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _database_id(db_path):
+    return str(Path(db_path).resolve())
+
+
+def _connection():
+    """Per-thread connection to the cache file."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != CACHE_PATH:
+        CACHE_DIR.mkdir(exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                database TEXT NOT NULL,
+                version TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_used ON results(last_used)")
+        _local.conn, _local.path = conn, CACHE_PATH
+    return conn
+
+
+def get(key):
+    """Return the cached DataFrame for key (None on a miss) and mark it used."""
+    conn = _connection()
+    row = conn.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    with conn:
+        conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+    return pickle.loads(row[0])
+
+
+def put(key, db_path, version, df):
+    """
+    Store a result and evict least recently used entries over MAX_CACHE_BYTES.
+
+    Results of older versions of the same database can never be hit again,
+    so they are dropped first. A single result larger than the cap is not
+    stored.
+    """
+    payload = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) > MAX_CACHE_BYTES:
+        return False
+
+    conn = _connection()
+    with conn:
+        database = _database_id(db_path)
+        conn.execute("DELETE FROM results WHERE database = ? AND version != ?", (database, version))
+        conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                     (key, database, version, payload, len(payload), time.time()))
+
+        total = 0
+        evict = []
+        for old_key, size in conn.execute("SELECT key, size FROM results ORDER BY last_used DESC"):
+            total += size
+            if total > MAX_CACHE_BYTES:
+                evict.append((old_key,))
+        conn.executemany("DELETE FROM results WHERE key = ?", evict)
+    return True
+
+
+def stats():
+    """Return (entries, bytes) currently cached."""
+    if not CACHE_PATH.exists():
+        return 0, 0
+    entries, size = _connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+    return entries, size
+
+
+def clear():
+    """Remove every cached result."""
+    if CACHE_PATH.exists():
+        with _connection() as conn:
+            conn.execute("DELETE FROM results")
@@ -4,114 +4,330 @@ Query utility for CourtReserve SQLite database.
 
 Usage:
     python3 scripts/query_database.py
+    python3 scripts/query_database.py --club lincoln-park   # one club's database
 
 This script provides common queries and utilities for analyzing the
 CourtReserve database.
+
+run_query() reads through a shared pool of read-only connections (see
+ConnectionPool) instead of opening the database for every query, so
+repeated queries reuse each connection's page cache and prepared
+statements. The summaries below also use the query result cache
+(query_cache.py), so they are only recomputed after the next import.
+
+Multi-club: run_club_query() runs a query on every club database
+(clubs/<club>/courtreserve.db, see create_database.club_paths) in
+parallel and concatenates the results with their club_id. The cross-club
+comparisons aggregate inside each club's database and only merge the
+per-club rows, so no process ever holds more than one club's summary.
 """
 
+import argparse
+import os
+import queue
 import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
 import pandas as pd
 from datetime import datetime
 
+# Sibling modules are imported by name, also when this module is imported as
+# scripts.query_database from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import query_cache
+from create_database import CLUB_COLUMN, DEFAULT_CLUB, club_paths, list_clubs, read_version_stamp
+
 DB_PATH = 'courtreserve.db'
 
+# Pragmas for pooled (read-only) connections; the analyses are read-heavy
+READ_PRAGMAS = {
+    'mmap_size': 256 * 1024 * 1024,  # Read pages through a memory map instead of copying them
+    'cache_size': -64 * 1024,        # 64 MB page cache per connection (negative = KiB)
+    'temp_store': 'MEMORY',          # Sorts and GROUP BY temp tables stay in memory
+}
+
+# Idle connections kept per pool, and prepared statements cached per connection
+POOL_SIZE = 4
+CACHED_STATEMENTS = 256
+
+# Non-member check-ins (membership name or drop-in registration)
+PAY_PER_USE_SEGMENT = """
+    (membership_name LIKE '%Non-Member%'
+     OR membership_name LIKE '%Visitor%'
+     OR registration_type = 'Drop-In')
+"""
+
 
 def connect_db():
     """Connect to the database."""
     return sqlite3.connect(DB_PATH)
 
 
-def run_query(sql, params=None):
-    """Run a SQL query and return results as DataFrame."""
-    conn = connect_db()
-    if params:
-        df = pd.read_sql_query(sql, conn, params=params)
-    else:
-        df = pd.read_sql_query(sql, conn)
-    conn.close()
+class ConnectionPool:
+    """
+    Thread-safe pool of read-only connections to one SQLite file.
+
+    Connections are opened with a read-only URI and READ_PRAGMAS, and are
+    shared between threads (one thread at a time). sqlite3 caches prepared
+    statements per connection by SQL text, so a query repeated on a pooled
+    connection skips parsing and planning. Up to `size` idle connections
+    are kept; extra concurrent callers get a temporary connection.
+
+    When the database file is replaced (create_database.py rebuilds it),
+    pooled connections to the old file are closed and new ones opened.
+    """
+
+    def __init__(self, path=DB_PATH, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        self._members = set()
+        self._file_id = None
+
+    def _current_file_id(self):
+        """Identify the database file, so a rebuilt database is noticed."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_dev, stat.st_ino)
+
+    def _connect(self):
+        """Open a read-only connection with the read pragma profile."""
+        uri = Path(self.path).resolve().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS)
+        for pragma, value in READ_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    def _acquire(self):
+        with self._lock:
+            file_id = self._current_file_id()
+            if file_id != self._file_id:
+                self._close_idle()
+                self._members = set()
+                self._file_id = file_id
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+        conn = self._connect()
+        with self._lock:
+            if len(self._members) < self.size:
+                self._members.add(conn)
+        return conn
+
+    def _release(self, conn):
+        with self._lock:
+            if conn in self._members:
+                self._idle.put(conn)
+                return
+        conn.close()
+
+    def _close_idle(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Close idle connections; borrowed ones are closed when returned."""
+        with self._lock:
+            self._close_idle()
+            self._members = set()
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(path=None):
+    """Return the shared connection pool for a database (default DB_PATH)."""
+    path = path or DB_PATH
+    with _pool_lock:
+        if path not in _pools:
+            _pools[path] = ConnectionPool(path)
+        return _pools[path]
+
+
+def close_pool():
+    """Close the shared pools' connections (e.g. before deleting the database)."""
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+def run_query(sql, params=None, cache=False, path=None):
+    """
+    Run a SQL query on a pooled read-only connection and return results as DataFrame.
+
+    With cache=True the result is served from the query result cache while
+    the database version stamp is unchanged, and stored there otherwise.
+    path selects another database than DB_PATH (e.g. a club's).
+    """
+    path = path or DB_PATH
+    key = None
+    with get_pool(path).connection() as conn:
+        if cache:
+            version = read_version_stamp(conn)
+            if version is not None:
+                key = query_cache.cache_key(path, version, sql, params)
+                df = query_cache.get(key)
+                if df is not None:
+                    return df
+
+        if params:
+            df = pd.read_sql_query(sql, conn, params=params)
+        else:
+            df = pd.read_sql_query(sql, conn)
+
+    if key is not None:
+        query_cache.put(key, path, version, df)
     return df
 
 
+def club_databases(clubs=None):
+    """
+    Return {club_id: database path} for the given clubs, or for every club
+    with a database under clubs/. Without club databases the single-club
+    database (DB_PATH) stands for DEFAULT_CLUB.
+    """
+    if clubs is None:
+        clubs = list_clubs(with_database=True)
+        if not clubs:
+            return {DEFAULT_CLUB: DB_PATH}
+    return {club: club_paths(club)[1] for club in clubs}
+
+
+def run_club_query(sql, params=None, clubs=None, cache=False, jobs=None):
+    """
+    Run a SQL query on every club database in parallel and return the
+    results concatenated, with a club_id column when the query has none.
+
+    Each club's query runs in its own thread on that club's connection pool
+    (sqlite3 releases the GIL while it executes a statement), at most jobs
+    at a time (default: one per club). Aggregate in SQL so that each club
+    returns a few rows; merging is then only a concatenation.
+    """
+    databases = club_databases(clubs)
+
+    def query(club, path):
+        df = run_query(sql, params, cache=cache, path=path)
+        if CLUB_COLUMN not in df.columns:
+            df.insert(0, CLUB_COLUMN, club)
+        return df
+
+    with ThreadPoolExecutor(max_workers=jobs or len(databases)) as pool:
+        results = list(pool.map(query, databases, databases.values()))
+    return pd.concat(results, ignore_index=True)
+
+
 # ============================================================================
 # Common Queries
 # ============================================================================
 
-def get_table_counts():
-    """Get record count for all tables."""
-    conn = connect_db()
-    cursor = conn.cursor()
+def table_counts(path=None):
+    """Record count of every table, as (table, count) rows."""
+    tables = run_query("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name", cache=True, path=path)
+    counts = [run_query(f"SELECT COUNT(*) AS count FROM {table}", cache=True, path=path).iloc[0]['count']
+              for table in tables['name']]
+    return pd.DataFrame({'table': tables['name'], 'count': counts})
 
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-    tables = cursor.fetchall()
 
+def get_table_counts():
+    """Get record count for all tables."""
     print("=" * 80)
     print("TABLE RECORD COUNTS")
     print("=" * 80)
 
-    for table in tables:
-        cursor.execute(f"SELECT COUNT(*) FROM {table[0]}")
-        count = cursor.fetchone()[0]
-        print(f"   {table[0]:30s} {count:>10,} records")
+    for _, row in table_counts().iterrows():
+        print(f"   {row['table']:30s} {row['count']:>10,} records")
+
 
-    conn.close()
+# Date range queries: {label: (table, SQL)}
+DATE_RANGE_QUERIES = {
+    'Reservations': ('reservations', """
+        SELECT
+            MIN(start_datetime) as earliest,
+            MAX(start_datetime) as latest,
+            COUNT(DISTINCT DATE(start_datetime)) as days
+        FROM reservations
+        WHERE start_datetime IS NOT NULL
+    """),
+    'Check-ins': ('checkins', """
+        SELECT
+            MIN(checkin_datetime) as earliest,
+            MAX(checkin_datetime) as latest,
+            COUNT(DISTINCT DATE(checkin_datetime)) as days
+        FROM checkins
+        WHERE checkin_datetime IS NOT NULL
+    """),
+    'Court Utilization': ('court_utilization', """
+        SELECT
+            MIN(date) as earliest,
+            MAX(date) as latest,
+            COUNT(DISTINCT date) as days
+        FROM court_utilization
+        WHERE date IS NOT NULL
+    """),
+    'Event Registrants': ('event_registrants', """
+        SELECT
+            MIN(event_date) as earliest,
+            MAX(event_date) as latest,
+            COUNT(DISTINCT event_date) as days
+        FROM event_registrants
+        WHERE event_date IS NOT NULL
+    """),
+}
+
+
+def date_ranges(path=None):
+    """Earliest and latest date and distinct days per dated table (tables not imported are left out)."""
+    present = set(run_query("SELECT name FROM sqlite_master WHERE type='table'", cache=True, path=path)['name'])
+    rows = []
+    for name, (table, sql) in DATE_RANGE_QUERIES.items():
+        if table not in present:
+            continue
+        df = run_query(sql, cache=True, path=path)
+        if not df.empty and df.iloc[0]['earliest']:
+            rows.append({'name': name, **df.iloc[0].to_dict()})
+    return pd.DataFrame(rows, columns=['name', 'earliest', 'latest', 'days'])
 
 
 def get_date_ranges():
     """Show date ranges for each table."""
-    queries = {
-        'Reservations': """
-            SELECT
-                MIN(start_datetime) as earliest,
-                MAX(start_datetime) as latest,
-                COUNT(DISTINCT DATE(start_datetime)) as days
-            FROM reservations
-            WHERE start_datetime IS NOT NULL
-        """,
-        'Check-ins': """
-            SELECT
-                MIN(checkin_datetime) as earliest,
-                MAX(checkin_datetime) as latest,
-                COUNT(DISTINCT DATE(checkin_datetime)) as days
-            FROM checkins
-            WHERE checkin_datetime IS NOT NULL
-        """,
-        'Court Utilization': """
-            SELECT
-                MIN(date) as earliest,
-                MAX(date) as latest,
-                COUNT(DISTINCT date) as days
-            FROM court_utilization
-            WHERE date IS NOT NULL
-        """,
-        'Event Registrants': """
-            SELECT
-                MIN(event_date) as earliest,
-                MAX(event_date) as latest,
-                COUNT(DISTINCT event_date) as days
-            FROM event_registrants
-            WHERE event_date IS NOT NULL
-        """,
-    }
-
     print("\n" + "=" * 80)
     print("DATE RANGES")
     print("=" * 80)
 
-    for name, sql in queries.items():
-        df = run_query(sql)
-        if not df.empty and df.iloc[0]['earliest']:
-            earliest = df.iloc[0]['earliest']
-            latest = df.iloc[0]['latest']
-            days = df.iloc[0]['days']
-            print(f"\n{name}:")
-            print(f"   Earliest: {earliest}")
-            print(f"   Latest:   {latest}")
-            print(f"   Days:     {days}")
+    for _, row in date_ranges().iterrows():
+        print(f"\n{row['name']}:")
+        print(f"   Earliest: {row['earliest']}")
+        print(f"   Latest:   {row['latest']}")
+        print(f"   Days:     {row['days']}")
 
 
-def get_member_summary():
-    """Get member summary statistics."""
-    sql = """
+def member_status(path=None):
+    """Return {'status': members by status, 'active_types': active members by type} with counts and shares."""
+    status = run_query("""
         SELECT
             membership_status,
             COUNT(*) as count,
@@ -119,18 +335,9 @@ def get_member_summary():
         FROM members
         GROUP BY membership_status
         ORDER BY count DESC
-    """
-
-    print("\n" + "=" * 80)
-    print("MEMBER STATUS BREAKDOWN")
-    print("=" * 80)
-
-    df = run_query(sql)
-    for _, row in df.iterrows():
-        print(f"   {row['membership_status']:20s} {row['count']:>6,} ({row['pct']:>5.1f}%)")
+    """, cache=True, path=path)
 
-    # Member type breakdown
-    sql = """
+    active_types = run_query("""
         SELECT
             membership_type,
             COUNT(*) as count,
@@ -139,36 +346,76 @@ def get_member_summary():
         WHERE membership_status = 'Active'
         GROUP BY membership_type
         ORDER BY count DESC
-    """
+    """, cache=True, path=path)
+    return {'status': status, 'active_types': active_types}
+
+
+def get_member_summary():
+    """Get member summary statistics."""
+    summary = member_status()
 
+    print("\n" + "=" * 80)
+    print("MEMBER STATUS BREAKDOWN")
+    print("=" * 80)
+
+    for _, row in summary['status'].iterrows():
+        print(f"   {row['membership_status']:20s} {row['count']:>6,} ({row['pct']:>5.1f}%)")
+
+    # Member type breakdown
     print("\n" + "=" * 80)
     print("ACTIVE MEMBER TYPE BREAKDOWN")
     print("=" * 80)
 
-    df = run_query(sql)
-    for _, row in df.iterrows():
+    for _, row in summary['active_types'].iterrows():
         print(f"   {row['membership_type']:20s} {row['count']:>6,} ({row['pct']:>5.1f}%)")
 
 
+def pay_per_use_summary(path=None):
+    """
+    Return {'summary': segment totals (one row), 'top_spenders': up to 10
+    players with over $80 of paid check-ins}.
+
+    Reads the per-player aggregates the importer maintains (player_checkins)
+    rather than scanning every check-in.
+    """
+    summary = run_query(f"""
+        SELECT
+            COUNT(DISTINCT "player__#") as unique_players,
+            SUM(visits) as total_checkins,
+            SUM(spend) / SUM(priced_visits) as avg_price,
+            SUM(spend) as total_spent
+        FROM player_checkins
+        WHERE {PAY_PER_USE_SEGMENT}
+    """, cache=True, path=path)
+
+    # Top spenders (paid check-ins only)
+    top_spenders = run_query(f"""
+        SELECT
+            "player__#",
+            player_first_name || ' ' || player_last_name as player_name,
+            SUM(paid_visits) as visits,
+            SUM(paid_spend) as total_spent,
+            ROUND(SUM(paid_spend) / 4.0, 2) as monthly_avg
+        FROM player_checkins
+        WHERE {PAY_PER_USE_SEGMENT}
+          AND paid_visits > 0
+        GROUP BY "player__#"
+        HAVING SUM(paid_spend) > 80
+        ORDER BY total_spent DESC
+        LIMIT 10
+    """, cache=True, path=path)
+    return {'summary': summary, 'top_spenders': top_spenders}
+
+
 def get_pay_per_use_summary():
     """Get pay-per-use (non-member) check-in summary."""
-    sql = """
-        SELECT
-            COUNT(DISTINCT player__) as unique_players,
-            COUNT(*) as total_checkins,
-            AVG(price_amount) as avg_price,
-            SUM(price_amount) as total_spent
-        FROM checkins
-        WHERE membership_name LIKE '%Non-Member%'
-           OR membership_name LIKE '%Visitor%'
-           OR registration_type = 'Drop-In'
-    """
+    result = pay_per_use_summary()
 
     print("\n" + "=" * 80)
     print("PAY-PER-USE SEGMENT SUMMARY")
     print("=" * 80)
 
-    df = run_query(sql)
+    df = result['summary']
     if not df.empty:
         row = df.iloc[0]
         print(f"   Unique Players:  {row['unique_players']:>6,}")
@@ -176,53 +423,47 @@ def get_pay_per_use_summary():
         print(f"   Average Price:   ${row['avg_price']:>6.2f}")
         print(f"   Total Spent:     ${row['total_spent']:>10,.2f}")
 
-    # Top spenders
-    sql = """
-        SELECT
-            player__,
-            player_first_name || ' ' || player_last_name as player_name,
-            COUNT(*) as visits,
-            SUM(price_amount) as total_spent,
-            ROUND(SUM(price_amount) / 4.0, 2) as monthly_avg
-        FROM checkins
-        WHERE (membership_name LIKE '%Non-Member%'
-           OR membership_name LIKE '%Visitor%'
-           OR registration_type = 'Drop-In')
-          AND price_amount > 0
-        GROUP BY player__
-        HAVING SUM(price_amount) > 80
-        ORDER BY total_spent DESC
-        LIMIT 10
-    """
-
     print("\n" + "=" * 80)
     print("TOP 10 PAY-PER-USE SPENDERS (>$80 total)")
     print("=" * 80)
 
-    df = run_query(sql)
+    df = result['top_spenders']
     if not df.empty:
         for _, row in df.iterrows():
             print(f"   {row['player_name']:25s} {row['visits']:>3} visits  ${row['total_spent']:>7.2f}  (${row['monthly_avg']:>6.2f}/mo avg)")
 
 
-def get_shadow_market_summary():
-    """Get weekday daytime (9 AM-4 PM) utilization summary."""
-    sql = """
+def shadow_market_summary(window=None, path=None):
+    """
+    Average, min and max utilization (one row) in the weekday daytime
+    (9 AM-4 PM) window, or another utilization_cube.Window.
+    """
+    dates = run_query(UTILIZATION_DATES_SQL, cache=True, path=path)
+    where, params = _window_filter(_default_window(window), dates)
+
+    sql = f"""
         SELECT
             AVG(utilization_pct) as avg_utilization,
             MIN(utilization_pct) as min_utilization,
             MAX(utilization_pct) as max_utilization
         FROM court_utilization
-        WHERE CAST(strftime('%w', date) AS INTEGER) BETWEEN 1 AND 5  -- Monday-Friday
-          AND time_slot BETWEEN '9:00 AM - 10:00 AM' AND '3:00 PM - 4:00 PM'
-          AND utilization_pct IS NOT NULL
+        WHERE {where}
+    """
+    return run_query(sql, params, cache=True, path=path)
+
+
+def get_shadow_market_summary(window=None):
+    """
+    Get weekday daytime (9 AM-4 PM) utilization summary, or the summary of
+    another utilization_cube.Window.
     """
+    window = _default_window(window)
 
     print("\n" + "=" * 80)
-    print("SHADOW MARKET (Weekday 9 AM-4 PM) SUMMARY")
+    print(f"{window.name.upper()} ({window.describe()}) SUMMARY")
     print("=" * 80)
 
-    df = run_query(sql)
+    df = shadow_market_summary(window)
     if not df.empty:
         row = df.iloc[0]
         print(f"   Average Utilization: {row['avg_utilization']:>5.1f}%")
@@ -231,30 +472,150 @@ def get_shadow_market_summary():
         print(f"   Empty Capacity:      {100 - row['avg_utilization']:>5.1f}%")
 
 
-def get_top_activity_types():
-    """Get top activity types from check-ins."""
+def _default_window(window):
+    """The given utilization_cube.Window, or the shadow market."""
+    # Imported here: utilization_cube reads through data_access, which uses this module's pool
+    from utilization_cube import SHADOW_MARKET
+    return window or SHADOW_MARKET
+
+
+# First and last court_utilization date, bounding the holidays a window excludes
+UTILIZATION_DATES_SQL = "SELECT MIN(date) as first, MAX(date) as last FROM court_utilization"
+
+
+def _window_filter(window, dates):
+    """
+    Return (WHERE condition, params) selecting a window's court_utilization rows.
+
+    dates is the UTILIZATION_DATES_SQL result (one row per database queried):
+    holidays are listed between the earliest first and latest last date
+    only, not over the holiday calendar's whole 1970-2200 range.
+    """
+    # Integer dow/start_hour columns (indexed) rather than date and time_slot strings
+    where = [
+        f"dow IN ({', '.join('?' * len(window.days))})",  # 0=Monday
+        "start_hour >= ? AND start_hour < ?",
+        "utilization_pct IS NOT NULL",
+    ]
+    params = [*window.days, window.start_hour, window.end_hour]
+
+    first, last = dates['first'].min(), dates['last'].max()
+    excluded = window.excluded_dates(first, last) if pd.notna(first) else window.exclude_dates
+    if len(excluded):
+        where.append(f"date NOT IN ({', '.join('?' * len(excluded))})")
+        params += list(excluded.strftime('%Y-%m-%d %H:%M:%S'))
+    return ' AND '.join(where), params
+
+
+def top_activity_types(path=None, limit=10):
+    """Most checked-in event types with check-ins, unique players and share of all check-ins."""
     sql = """
         SELECT
             event_name,
             COUNT(*) as checkins,
-            COUNT(DISTINCT player__) as unique_players,
+            COUNT(DISTINCT "player__#") as unique_players,
             ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 1) as pct
         FROM checkins
         WHERE event_name IS NOT NULL AND event_name != ''
         GROUP BY event_name
         ORDER BY checkins DESC
-        LIMIT 10
+        LIMIT ?
     """
+    return run_query(sql, [limit], cache=True, path=path)
+
 
+def get_top_activity_types():
+    """Get top activity types from check-ins."""
     print("\n" + "=" * 80)
     print("TOP 10 ACTIVITY TYPES (by check-ins)")
     print("=" * 80)
 
-    df = run_query(sql)
-    for _, row in df.iterrows():
+    for _, row in top_activity_types().iterrows():
         print(f"   {row['event_name'][:50]:50s} {row['checkins']:>6,} ({row['pct']:>4.1f}%)")
 
 
+# ============================================================================
+# Cross-Club Comparisons
+# ============================================================================
+
+def compare_clubs_utilization(window=None, clubs=None):
+    """
+    Compare utilization in a window (default: the shadow market) across clubs.
+
+    Each club's database returns its slot count, sum, min and max; the
+    "All clubs" row is merged from those, weighting clubs by their slots.
+    """
+    window = _default_window(window)
+    dates = run_club_query(UTILIZATION_DATES_SQL, clubs=clubs, cache=True)
+    where, params = _window_filter(window, dates)
+    sql = f"""
+        SELECT
+            COUNT(*) as slots,
+            SUM(utilization_pct) as total_utilization,
+            MIN(utilization_pct) as min_utilization,
+            MAX(utilization_pct) as max_utilization
+        FROM court_utilization
+        WHERE {where}
+    """
+
+    df = run_club_query(sql, params, clubs=clubs, cache=True)
+    total = pd.DataFrame([{
+        CLUB_COLUMN: 'All clubs',
+        'slots': df['slots'].sum(),
+        'total_utilization': df['total_utilization'].sum(),
+        'min_utilization': df['min_utilization'].min(),
+        'max_utilization': df['max_utilization'].max(),
+    }])
+    df = pd.concat([df, total], ignore_index=True)
+    df['avg_utilization'] = df['total_utilization'] / df['slots'].where(df['slots'] > 0)
+    return df
+
+
+def compare_clubs_pay_per_use(clubs=None):
+    """
+    Compare the pay-per-use (non-member) segment across clubs, from each
+    club's player_checkins aggregates. Player IDs are per club, so the
+    "All clubs" row adds the clubs' player counts.
+    """
+    sql = f"""
+        SELECT
+            COUNT(DISTINCT CASE WHEN {PAY_PER_USE_SEGMENT} THEN "player__#" END) as unique_players,
+            COALESCE(SUM(CASE WHEN {PAY_PER_USE_SEGMENT} THEN visits END), 0) as pay_per_use_checkins,
+            COALESCE(SUM(visits), 0) as total_checkins,
+            SUM(CASE WHEN {PAY_PER_USE_SEGMENT} THEN priced_visits END) as priced_visits,
+            SUM(CASE WHEN {PAY_PER_USE_SEGMENT} THEN spend END) as total_spent
+        FROM player_checkins
+    """
+
+    df = run_club_query(sql, clubs=clubs, cache=True)
+    total = df.drop(columns=CLUB_COLUMN).sum().to_frame().T
+    total.insert(0, CLUB_COLUMN, 'All clubs')
+    df = pd.concat([df, total], ignore_index=True)
+    df['avg_price'] = df['total_spent'] / df['priced_visits'].where(df['priced_visits'] > 0)
+    df['share_of_checkins'] = df['pay_per_use_checkins'] / df['total_checkins'].where(df['total_checkins'] > 0)
+    return df
+
+
+def get_club_comparisons(window=None, clubs=None):
+    """Show window utilization and the pay-per-use segment by club."""
+    window = _default_window(window)
+    print("\n" + "=" * 80)
+    print(f"{window.name.upper()} ({window.describe()}) BY CLUB")
+    print("=" * 80)
+    print(f"   {'Club':20s} {'Slots':>8s} {'Average':>8s} {'Min':>7s} {'Max':>7s} {'Empty':>7s}")
+    for _, row in compare_clubs_utilization(window, clubs).iterrows():
+        print(f"   {row[CLUB_COLUMN]:20s} {row['slots']:>8,} {row['avg_utilization']:>7.1f}% "
+              f"{row['min_utilization']:>6.1f}% {row['max_utilization']:>6.1f}% {100 - row['avg_utilization']:>6.1f}%")
+
+    print("\n" + "=" * 80)
+    print("PAY-PER-USE SEGMENT BY CLUB")
+    print("=" * 80)
+    print(f"   {'Club':20s} {'Players':>8s} {'Check-ins':>10s} {'Share':>7s} {'Avg Price':>10s} {'Total Spent':>13s}")
+    for _, row in compare_clubs_pay_per_use(clubs).iterrows():
+        print(f"   {row[CLUB_COLUMN]:20s} {int(row['unique_players']):>8,} {int(row['pay_per_use_checkins']):>10,} "
+              f"{row['share_of_checkins']:>6.1%} ${row['avg_price']:>9.2f} ${row['total_spent']:>12,.2f}")
+
+
 # ============================================================================
 # Custom Query Examples
 # ============================================================================
@@ -270,20 +631,20 @@ def example_custom_queries():
             'title': '1. Reservations by Day of Week',
             'sql': """
                 SELECT
-                    CASE CAST(strftime('%w', start_datetime) AS INTEGER)
-                        WHEN 0 THEN 'Sunday'
-                        WHEN 1 THEN 'Monday'
-                        WHEN 2 THEN 'Tuesday'
-                        WHEN 3 THEN 'Wednesday'
-                        WHEN 4 THEN 'Thursday'
-                        WHEN 5 THEN 'Friday'
-                        WHEN 6 THEN 'Saturday'
+                    CASE dow
+                        WHEN 0 THEN 'Monday'
+                        WHEN 1 THEN 'Tuesday'
+                        WHEN 2 THEN 'Wednesday'
+                        WHEN 3 THEN 'Thursday'
+                        WHEN 4 THEN 'Friday'
+                        WHEN 5 THEN 'Saturday'
+                        WHEN 6 THEN 'Sunday'
                     END as day_of_week,
                     COUNT(*) as reservations
                 FROM reservations
-                WHERE start_datetime IS NOT NULL
-                GROUP BY CAST(strftime('%w', start_datetime) AS INTEGER)
-                ORDER BY CAST(strftime('%w', start_datetime) AS INTEGER)
+                WHERE dow IS NOT NULL
+                GROUP BY dow
+                ORDER BY dow
             """
         },
         {
@@ -303,20 +664,20 @@ def example_custom_queries():
             'title': '3. Busiest Hours by Day of Week',
             'sql': """
                 SELECT
-                    CASE CAST(strftime('%w', date) AS INTEGER)
-                        WHEN 0 THEN 'Sunday'
-                        WHEN 1 THEN 'Monday'
-                        WHEN 2 THEN 'Tuesday'
-                        WHEN 3 THEN 'Wednesday'
-                        WHEN 4 THEN 'Thursday'
-                        WHEN 5 THEN 'Friday'
-                        WHEN 6 THEN 'Saturday'
+                    CASE dow
+                        WHEN 0 THEN 'Monday'
+                        WHEN 1 THEN 'Tuesday'
+                        WHEN 2 THEN 'Wednesday'
+                        WHEN 3 THEN 'Thursday'
+                        WHEN 4 THEN 'Friday'
+                        WHEN 5 THEN 'Saturday'
+                        WHEN 6 THEN 'Sunday'
                     END as day_of_week,
-                    time_slot,
+                    start_hour,
                     AVG(utilization_pct) as avg_utilization
                 FROM court_utilization
                 WHERE utilization_pct IS NOT NULL
-                GROUP BY CAST(strftime('%w', date) AS INTEGER), time_slot
+                GROUP BY dow, start_hour
                 ORDER BY avg_utilization DESC
                 LIMIT 10
             """
@@ -336,6 +697,13 @@ def example_custom_queries():
 
 def main():
     """Run all summary queries."""
+    global DB_PATH
+    parser = argparse.ArgumentParser(description='Summarize the CourtReserve database.')
+    parser.add_argument('--club', help='summarize clubs/CLUB/courtreserve.db instead of courtreserve.db')
+    args = parser.parse_args()
+    if args.club:
+        DB_PATH = club_paths(args.club)[1]
+
     print("\n" + "=" * 80)
     print("COURTRESERVE DATABASE SUMMARY")
     print(f"Database: {DB_PATH}")
@@ -349,6 +717,11 @@ def main():
         get_pay_per_use_summary()
         get_shadow_market_summary()
         get_top_activity_types()
+
+        # Clubs under clubs/ with a database
+        if len(list_clubs(with_database=True)) > 1:
+            get_club_comparisons()
+
         example_custom_queries()
 
         print("\n" + "=" * 80)
@@ -358,6 +731,7 @@ def main():
         print(f"   from scripts.query_database import run_query")
         print(f"   df = run_query('SELECT * FROM members LIMIT 10')")
         print(f"   print(df)")
+        print(f"   df = run_club_query('SELECT COUNT(*) AS members FROM members')  # one row per club")
 
         print(f"\nSQLite CLI:")
         print(f"   sqlite3 {DB_PATH}")
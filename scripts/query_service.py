@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+CourtReserve Query Service
+A long-running local HTTP service that answers the query_database.py
+summaries and parameterized read-only SQL as JSON, from one process that
+keeps its database connections and recent results in memory.
+
+Purpose: Dashboard widgets shelling out to query_database.py (or importing
+run_query) pay Python startup and the pandas import for every widget. The
+service pays them once: its pooled read-only connections keep their page
+caches and prepared statements, and responses are cached in memory until
+the next import.
+
+Usage:
+    python3 scripts/query_service.py                    # http://127.0.0.1:8765
+    python3 scripts/query_service.py --port 9000 --workers 8
+
+    curl localhost:8765/summary/pay-per-use
+    curl 'localhost:8765/summary/shadow-market?days=5,6&start_hour=8&end_hour=12'
+    curl 'localhost:8765/query?sql=SELECT+dow,COUNT(*)+AS+n+FROM+reservations+WHERE+hour>=?+GROUP+BY+dow&param=17'
+    curl -d '{"sql": "SELECT * FROM members WHERE membership_status = :status", "params": {"status": "Active"}}' \\
+         localhost:8765/query
+    curl localhost:8765/stats
+
+Endpoints (GET; /query also takes a POSTed JSON body):
+    /summary/table-counts    - record count per table
+    /summary/date-ranges     - earliest/latest date and days per dated table
+    /summary/members         - members by status, active members by type
+    /summary/pay-per-use     - non-member segment totals and top spenders
+    /summary/shadow-market   - utilization in a window (days=0,...,4,
+                               start_hour=9, end_hour=16 by default)
+    /summary/top-activities  - most checked-in event types (limit=10)
+    /query                   - one read-only SELECT with ? or :name params,
+                               at most MAX_ROWS rows
+    /stats                   - request counts, cache hits, latency histograms
+    /health                  - liveness and database version
+
+Every data endpoint takes club=<club> to read clubs/<club>/courtreserve.db
+instead of courtreserve.db. Responses are {"endpoint", "club", "version",
+"data"}; errors are {"error"} with a 4xx/5xx status.
+
+Caching: responses are kept in memory (CACHE_ENTRIES, least recently used
+first out) keyed by endpoint, parameters and the database's version stamp,
+which is re-read at most every VERSION_TTL seconds, so an import is picked
+up without a restart. Identical requests arriving together share one query.
+The summaries also use the on-disk query result cache (query_cache.py), so
+a restarted service answers them without recomputing.
+
+Requests are handled concurrently on the event loop; the queries run on a
+pool of worker threads (sqlite3 releases the GIL while a statement runs),
+each borrowing a pooled read-only connection. The service binds to
+127.0.0.1 and sends no CORS headers unless --cors-origin is given.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import query_database
+from create_database import club_paths, read_version_stamp
+from query_database import (date_ranges, get_pool, member_status, pay_per_use_summary, run_query,
+                            shadow_market_summary, table_counts, top_activity_types)
+from utilization_cube import SHADOW_MARKET, Window
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+# Query threads (one pooled connection each)
+WORKERS = query_database.POOL_SIZE
+
+# Cached responses, and how long a database version stamp is trusted (seconds)
+CACHE_ENTRIES = 256
+VERSION_TTL = 1.0
+
+# Custom queries return at most this many rows; request bodies are capped too
+MAX_ROWS = 10_000
+MAX_BODY_BYTES = 1024 * 1024
+
+# Keep-alive connections are closed after this many idle seconds
+IDLE_TIMEOUT = 30
+
+# Latency histogram bucket upper bounds (ms), and samples kept for percentiles
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+LATENCY_SAMPLES = 1000
+
+
+class RequestError(Exception):
+    """A request the service answers with an error status (bad parameters, unknown endpoint, ...)."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================================
+# Endpoints (run on worker threads)
+# ============================================================================
+
+def _records(df):
+    """DataFrame rows as JSON-ready dicts (NaN -> null, timestamps as ISO strings)."""
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def _int_param(params, name, default, low, high):
+    """An integer query parameter within [low, high]."""
+    value = params.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer, not {value!r}")
+    if not low <= value <= high:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"{name} must be between {low} and {high}")
+    return value
+
+
+def summary_table_counts(params, path):
+    """Record count per table."""
+    return _records(table_counts(path))
+
+
+def summary_date_ranges(params, path):
+    """Earliest/latest date and distinct days per dated table."""
+    return _records(date_ranges(path))
+
+
+def summary_members(params, path):
+    """Members by status and active members by type."""
+    return {name: _records(df) for name, df in member_status(path).items()}
+
+
+def summary_pay_per_use(params, path):
+    """Non-member segment totals and top spenders."""
+    result = pay_per_use_summary(path)
+    summary = _records(result['summary'])
+    return {'summary': summary[0] if summary else None, 'top_spenders': _records(result['top_spenders'])}
+
+
+def summary_shadow_market(params, path):
+    """Utilization in the shadow market, or in the window given by days/start_hour/end_hour."""
+    window = SHADOW_MARKET
+    if {'days', 'start_hour', 'end_hour'} & set(params):
+        try:
+            days = [int(day) for day in params.get('days', '0,1,2,3,4').split(',')]
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "days must be comma-separated integers (0=Monday)")
+        if not days or not all(0 <= day <= 6 for day in days):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "days must be between 0 (Monday) and 6 (Sunday)")
+        start_hour = _int_param(params, 'start_hour', SHADOW_MARKET.start_hour, 0, 23)
+        end_hour = _int_param(params, 'end_hour', SHADOW_MARKET.end_hour, start_hour + 1, 24)
+        window = Window('Custom window', days=days, start_hour=start_hour, end_hour=end_hour)
+
+    summary = _records(shadow_market_summary(window, path))
+    return {'window': window.describe(), **(summary[0] if summary else {})}
+
+
+def summary_top_activities(params, path):
+    """Most checked-in event types."""
+    return _records(top_activity_types(path, limit=_int_param(params, 'limit', 10, 1, 1000)))
+
+
+def custom_query(params, path):
+    """
+    One read-only SELECT (or WITH ... SELECT) with positional (?) or named
+    (:name) parameters. Connections are opened read-only, so statements
+    that write fail; results are cut at MAX_ROWS rows.
+    """
+    sql = (params.get('sql') or '').strip().rstrip(';').strip()
+    if not sql:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "sql is required")
+    if sql.split(None, 1)[0].upper() not in ('SELECT', 'WITH'):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "only SELECT queries are allowed")
+
+    # One more row than returned tells whether the result was cut
+    df = run_query(f"SELECT * FROM ({sql}) LIMIT {MAX_ROWS + 1}", params.get('params') or None, path=path)
+    return {
+        'columns': list(df.columns),
+        'rows': _records(df.head(MAX_ROWS)),
+        'truncated': len(df) > MAX_ROWS,
+    }
+
+
+# Data endpoints: path -> handler(params, database path)
+ENDPOINTS = {
+    '/summary/table-counts': summary_table_counts,
+    '/summary/date-ranges': summary_date_ranges,
+    '/summary/members': summary_members,
+    '/summary/pay-per-use': summary_pay_per_use,
+    '/summary/shadow-market': summary_shadow_market,
+    '/summary/top-activities': summary_top_activities,
+    '/query': custom_query,
+}
+
+
+# ============================================================================
+# Latency histograms
+# ============================================================================
+
+class LatencyHistogram:
+    """Request latencies of one endpoint: bucket counts since start, percentiles over recent requests."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, ms):
+        self.buckets[int(np.searchsorted(LATENCY_BUCKETS_MS, ms))] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append(ms)
+
+    def snapshot(self):
+        """
+        Counts, mean, max, p50/p90/p99 over the last LATENCY_SAMPLES requests,
+        and the histogram since start as {'<=bound': requests in (previous bound, bound], ..., '+Inf': n}.
+        """
+        recent = np.array(self.recent)
+        p50, p90, p99 = np.percentile(recent, [50, 90, 99]) if len(recent) else (None, None, None)
+        labels = [f"<={bound:g}" for bound in LATENCY_BUCKETS_MS] + ['+Inf']
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else None,
+            'p50_ms': p50,
+            'p90_ms': p90,
+            'p99_ms': p99,
+            'max_ms': self.max_ms,
+            'histogram_ms': dict(zip(labels, self.buckets)),
+        }
+
+
+# ============================================================================
+# Service
+# ============================================================================
+
+class QueryService:
+    """
+    Routes requests to ENDPOINTS on a thread pool, with an in-memory
+    response cache keyed on the database version stamp and per-endpoint
+    latency histograms.
+    """
+
+    def __init__(self, workers=WORKERS, cache_entries=CACHE_ENTRIES, cors_origin=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='query')
+        self.cache_entries = cache_entries
+        self.cors_origin = cors_origin
+        self.cache = OrderedDict()   # key -> (version, body)
+        self.inflight = {}           # key -> Future of (version, body)
+        self.versions = {}           # database path -> (checked at, version)
+        self.latency = {}
+        self.counters = {'requests': 0, 'errors': 0, 'cache_hits': 0, 'cache_misses': 0, 'coalesced': 0}
+        self.started = time.time()
+
+    # -- database versions --------------------------------------------------
+
+    def _read_version(self, path):
+        if not os.path.exists(path):
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE,
+                               f"{path} not found (run scripts/create_database.py)")
+        with get_pool(path).connection() as conn:
+            return read_version_stamp(conn)
+
+    async def version(self, path):
+        """The database's version stamp, re-read at most every VERSION_TTL seconds."""
+        checked, version = self.versions.get(path, (None, None))
+        if checked is None or time.monotonic() - checked > VERSION_TTL:
+            version = await asyncio.get_running_loop().run_in_executor(self.executor, self._read_version, path)
+            self.versions[path] = (time.monotonic(), version)
+        return version
+
+    # -- requests -----------------------------------------------------------
+
+    async def respond(self, method, target, body):
+        """Return (status, body bytes, cache state) for one request."""
+        url = urlsplit(target)
+        endpoint = url.path.rstrip('/') or '/'
+        params = {name: values[-1] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+        if 'param' in params:
+            params['params'] = parse_qs(url.query)['param']
+
+        if endpoint == '/health':
+            return HTTPStatus.OK, self._json({'status': 'ok', 'version': await self.version(query_database.DB_PATH)}), None
+        if endpoint == '/stats':
+            return HTTPStatus.OK, self._json(self.stats()), None
+        if endpoint == '/':
+            return HTTPStatus.OK, self._json({'endpoints': sorted(ENDPOINTS) + ['/health', '/stats']}), None
+        if endpoint not in ENDPOINTS:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown endpoint {endpoint}")
+
+        if method == 'POST' and endpoint == '/query':
+            params.update(self._json_body(body))
+        elif method != 'GET':
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported on {endpoint}")
+
+        club = params.pop('club', None)
+        try:
+            path = club_paths(club)[1] if club else query_database.DB_PATH
+        except ValueError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+
+        version = await self.version(path)
+        key = (path, endpoint, json.dumps(params, sort_keys=True, default=str))
+
+        # Cached for this database version
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == version and version is not None:
+            self.cache.move_to_end(key)
+            self.counters['cache_hits'] += 1
+            return HTTPStatus.OK, cached[1], 'hit'
+
+        # Same request already running: wait for its result
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.counters['coalesced'] += 1
+            return HTTPStatus.OK, (await asyncio.shield(pending))[1], 'coalesced'
+
+        self.counters['cache_misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            data = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._run, ENDPOINTS[endpoint], params, path)
+            body = self._json({'endpoint': endpoint, 'club': club, 'version': version, 'data': data})
+            future.set_result((version, body))
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Retrieved here, so waiters-less failures are not logged as unhandled
+            raise
+        finally:
+            del self.inflight[key]
+
+        # Databases without a version stamp cannot be invalidated, so are not cached
+        if version is not None:
+            self.cache[key] = (version, body)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_entries:
+                self.cache.popitem(last=False)
+        return HTTPStatus.OK, body, 'miss'
+
+    @staticmethod
+    def _run(handler, params, path):
+        """Run an endpoint on a worker thread; SQL errors become 400s."""
+        try:
+            return handler(params, path)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            # pandas wraps the sqlite3 error in a message repeating the SQL
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(e.__cause__ or e))
+
+    @staticmethod
+    def _json_body(body):
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid JSON body: {e}")
+        if not isinstance(data, dict) or not isinstance(data.get('params', []), (list, dict)):
+            raise RequestError(HTTPStatus.BAD_REQUEST, 'Body must be {"sql": ..., "params": [...] or {...}}')
+        return data
+
+    @staticmethod
+    def _json(payload):
+        return json.dumps(payload, default=str).encode()
+
+    def stats(self):
+        """Uptime, request and cache counters, and every endpoint's latency snapshot."""
+        return {
+            'uptime_seconds': round(time.time() - self.started, 1),
+            **self.counters,
+            'cached_responses': len(self.cache),
+            'latency': {endpoint: histogram.snapshot() for endpoint, histogram in sorted(self.latency.items())},
+        }
+
+    # -- HTTP ---------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        """Serve one client connection (HTTP/1.1 with keep-alive)."""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+
+                start = time.perf_counter()
+                cache_state = None
+                try:
+                    status, payload, cache_state = await self.respond(method, target, body)
+                except RequestError as e:
+                    status, payload = e.status, self._json({'error': str(e)})
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, self._json({'error': f"{type(e).__name__}: {e}"})
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(self._response(status, payload, cache_state, keep_alive))
+                await writer.drain()
+
+                endpoint = urlsplit(target).path.rstrip('/') or '/'
+                self.counters['requests'] += 1
+                self.counters['errors'] += status >= 400
+                self.latency.setdefault(endpoint if status != HTTPStatus.NOT_FOUND else 'not_found',
+                                        LatencyHistogram()).record((time.perf_counter() - start) * 1000)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        """Return (method, target, headers, body), or None when the client closed the connection."""
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split()
+        except ValueError:
+            raise ConnectionError("Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise ConnectionError("Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    def _response(self, status, payload, cache_state, keep_alive):
+        headers = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(payload)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if cache_state:
+            headers.append(f"X-Cache: {cache_state}")
+        if self.cors_origin:
+            headers.append(f"Access-Control-Allow-Origin: {self.cors_origin}")
+        return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + payload
+
+    # -- lifecycle ----------------------------------------------------------
+
+    async def warm(self):
+        """Answer every summary once for the default database, so the first widgets hit the cache."""
+        start = time.perf_counter()
+        warmed = 0
+        for endpoint in ENDPOINTS:
+            if endpoint == '/query':
+                continue
+            try:
+                await self.respond('GET', endpoint, b'')
+                warmed += 1
+            except RequestError as e:
+                print(f"   ⚠️  {endpoint}: {e}")
+        print(f"   Warmed {warmed} summaries in {time.perf_counter() - start:.2f}s")
+
+    async def serve(self, host=HOST, port=PORT, warm=True):
+        """Listen until cancelled (Ctrl+C)."""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"CourtReserve query service on http://{host}:{port} (database: {query_database.DB_PATH})")
+        if warm and os.path.exists(query_database.DB_PATH):
+            await self.warm()
+        async with server:
+            await server.serve_forever()
+
+    def print_summary(self):
+        """Per-endpoint request counts and latency percentiles."""
+        print(f"\n{'Endpoint':28s} {'Requests':>9s} {'p50 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+        for endpoint, snapshot in self.stats()['latency'].items():
+            print(f"{endpoint:28s} {snapshot['count']:>9,} {snapshot['p50_ms']:>8.2f} "
+                  f"{snapshot['p99_ms']:>8.2f} {snapshot['max_ms']:>8.2f}")
+        print(f"Cache: {self.counters['cache_hits']:,} hits, {self.counters['cache_misses']:,} misses, "
+              f"{self.counters['coalesced']:,} coalesced")
+
+
+def main():
+    """Parse command-line options and run the service."""
+    parser = argparse.ArgumentParser(description='Serve CourtReserve summaries and read-only queries as JSON.')
+    parser.add_argument('--host', default=HOST, help=f'address to listen on (default: {HOST})')
+    parser.add_argument('--port', type=int, default=PORT, help=f'port to listen on (default: {PORT})')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='query threads (default: connection pool size)')
+    parser.add_argument('--cache-entries', type=int, default=CACHE_ENTRIES, help='responses kept in memory')
+    parser.add_argument('--club', help='serve clubs/CLUB/courtreserve.db by default instead of courtreserve.db')
+    parser.add_argument('--cors-origin', help='allow browser requests from this origin (e.g. http://localhost:3000)')
+    parser.add_argument('--no-warm', action='store_true', help='do not precompute the summaries at startup')
+    args = parser.parse_args()
+
+    if args.club:
+        query_database.DB_PATH = club_paths(args.club)[1]
+
+    service = QueryService(workers=args.workers, cache_entries=args.cache_entries, cors_origin=args.cors_origin)
+    try:
+        asyncio.run(service.serve(args.host, args.port, warm=not args.no_warm))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.executor.shutdown(wait=False)
+        if service.latency:
+            service.print_summary()
+
+
+if __name__ == '__main__':
+    main()
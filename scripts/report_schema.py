@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+CourtReserve Report Schemas
+One declaration per CourtReserve export: how its headers become database
+column names, which columns are categorical, the datetime format of every
+date column, the columns derived from others, the timestamp its integer
+time dimensions come from and the column a real row must have (export
+summary rows lack it).
+
+Purpose: Parse each report the same way everywhere. create_database.py,
+analyze_courtreserve_jtbd.py and the standalone analysis scripts all read
+through this registry instead of repeating their own cleaning code.
+
+Usage:
+    from report_schema import SCHEMAS
+
+    checkins = SCHEMAS['checkins'].read_csv(path)   # export headers, typed
+    checkins = SCHEMAS['checkins'].read_csv(path, columns=['Player _#', 'Price'])
+    checkins = SCHEMAS['checkins'].load(path)       # database columns
+
+Whole-file reads go through the columnar cache (see columnar_cache.py).
+
+All names in a schema are database (cleaned) column names; export headers are
+matched to them through clean_name(), so header capitalization changes in
+CourtReserve exports do not break the registry.
+"""
+
+import hashlib
+import inspect
+import re
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+
+# CourtReserve export date formats
+DATE = '%m/%d/%Y'
+DATETIME = '%m/%d/%Y %I:%M %p'
+
+# Court utilization time slots ("9:00 AM - 10:00 AM") are two of these
+TIME_OF_DAY = '%I:%M %p'
+
+# Resolution pd.to_datetime gives parsed strings (ns in pandas 2, us in pandas 3)
+DATETIME_UNIT = pd.to_datetime(pd.Series(['01/01/2025'])).dt.unit
+
+# Integer time dimensions materialized once per timestamped row, so filters
+# are small-integer comparisons instead of datetime accessors: {column: dtype}.
+# dow counts from Monday (0) like pandas; iso_week is the ISO-8601 week (1-53).
+TIME_DIMENSIONS = {
+    'hour': 'Int8',
+    'minute_of_day': 'Int16',
+    'dow': 'Int8',
+    'iso_week': 'Int8',
+    'month': 'Int8',
+    'is_weekend': 'Int8',
+}
+
+# Dimensions that need a time of day (date-only columns get the rest)
+TIME_OF_DAY_DIMENSIONS = ('hour', 'minute_of_day')
+
+
+def parse_datetime(values, fmt=None, infer=False):
+    """
+    Parse date strings with an explicit format. Values that do not match it
+    become NaT, as with pd.to_datetime(errors='coerce'), unless infer=True:
+    then only those values fall back to pandas' inference.
+
+    Exports repeat the same time slots thousands of times, so each distinct
+    string is parsed once and the results are broadcast back.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values) or values.isna().all():
+        return pd.to_datetime(values, errors='coerce')
+
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques)
+    parsed = pd.to_datetime(uniques, format=fmt, errors='coerce')
+    if fmt is not None and infer:
+        missed = parsed.isna()
+        if missed.any():
+            parsed[missed] = pd.to_datetime(uniques[missed], errors='coerce')
+
+    parsed = pd.DatetimeIndex(parsed).as_unit(DATETIME_UNIT)
+    return pd.Series(parsed.take(codes, allow_fill=True, fill_value=pd.NaT),
+                     index=values.index, name=values.name)
+
+
+def time_dimensions(dates, with_time=True):
+    """
+    Integer time dimensions of parsed dates, as nullable small integers
+    (missing where the date is NaT).
+
+    Args:
+        dates: Parsed datetime Series
+        with_time: Include hour and minute_of_day (False for date-only columns)
+
+    Returns:
+        DataFrame with the TIME_DIMENSIONS columns, indexed like dates
+    """
+    dates = pd.to_datetime(dates, errors='coerce')
+    dow = dates.dt.dayofweek
+    values = {
+        'hour': dates.dt.hour,
+        'minute_of_day': dates.dt.hour * 60 + dates.dt.minute,
+        'dow': dow,
+        'iso_week': dates.dt.isocalendar().week,
+        'month': dates.dt.month,
+        'is_weekend': (dow >= 5).astype(int).where(dow.notna()),
+    }
+    return pd.DataFrame({column: values[column].astype(dtype) for column, dtype in TIME_DIMENSIONS.items()
+                         if with_time or column not in TIME_OF_DAY_DIMENSIONS}, index=dates.index)
+
+
+def parse_time_slots(values):
+    """
+    Split time slots like "9:00 AM - 10:00 AM" into start_hour and end_hour
+    (0-23, float so unparseable slots such as a "Total" row can be NaN).
+    Each distinct slot is parsed once.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    bounds = pd.Series(uniques, dtype=object).astype(str).str.split(' - ', n=1, expand=True)
+    bounds = bounds.reindex(columns=[0, 1])
+
+    hours = {}
+    for name, column in [('start_hour', 0), ('end_hour', 1)]:
+        times = pd.to_datetime(bounds[column].str.strip(), format=TIME_OF_DAY, errors='coerce')
+        parsed = np.append(times.dt.hour.to_numpy(dtype=float), np.nan)
+        hours[name] = parsed[codes]  # Missing slots (code -1) take the trailing NaN
+    return pd.DataFrame(hours, index=getattr(values, 'index', None))
+
+
+# Time of day of a check-in from its event name ("Evening Drill 7:00 PM"):
+# (label, keywords) in precedence order, the first rule with a keyword in the
+# lowercased name wins. Named sessions come before the hour fallbacks.
+TIME_OF_DAY_RULES = [
+    ('morning', ['morning', '7:00 am', '8:00 am']),
+    ('evening', ['evening', '7:00 pm', '8:00 pm']),
+    ('midday', ['midday', 'mid-day', '11:00 am', '12:00 pm']),
+    ('evening', ['5:00 pm', '6:00 pm', '7:00 pm', '8:00 pm', '9:00 pm']),
+    ('morning', ['7:00 am', '8:00 am', '9:00 am', '10:00 am']),
+    ('midday', ['11:00 am', '12:00 pm', '1:00 pm', '2:00 pm', '3:00 pm', '4:00 pm']),
+]
+_TIME_OF_DAY_PATTERNS = [(label, re.compile('|'.join(re.escape(k) for k in keywords)))
+                         for label, keywords in TIME_OF_DAY_RULES]
+
+# Amount after a '$' in price strings like "(Drop-in)  $16.00" or "$1,234.00"
+_PRICE_AMOUNT = re.compile(r'\$\s*([\d,]+(?:\.\d+)?)')
+
+
+def parse_prices(values):
+    """
+    Extract the amount from price strings like "(Drop-in)  $16.00" (float,
+    NaN when no '$' is followed by a number). Only the number is taken, so
+    trailing text ("$16.00)") is ignored and thousands separators are
+    dropped. Each distinct string is parsed once.
+    """
+    codes, uniques = pd.factorize(values)
+    tokens = pd.Series(uniques, dtype=object).astype(str).str.extract(_PRICE_AMOUNT)[0].str.replace(',', '')
+    amounts = np.append(pd.to_numeric(tokens, errors='coerce').to_numpy(dtype=float), np.nan)
+    return pd.Series(amounts[codes], index=getattr(values, 'index', None), name=getattr(values, 'name', None))
+
+
+def classify_time_of_day(values):
+    """
+    Label event names 'morning', 'midday', 'evening' or 'unknown' with
+    TIME_OF_DAY_RULES. Each distinct name is classified once.
+    """
+    codes, uniques = pd.factorize(values)
+    names = pd.Series(uniques, dtype=object).astype(str).str.lower()
+
+    labels = np.full(len(names) + 1, 'unknown', dtype=object)  # Missing names (code -1) stay unknown
+    unmatched = np.ones(len(names), dtype=bool)
+    for label, pattern in _TIME_OF_DAY_PATTERNS:
+        hit = unmatched & names.str.contains(pattern, na=False).to_numpy(dtype=bool)
+        labels[:-1][hit] = label
+        unmatched &= ~hit
+
+    # Taking from the few labels avoids re-inferring a string dtype row by row
+    codes[codes < 0] = len(names)
+    return pd.Series(labels).take(codes).set_axis(getattr(values, 'index', None)).rename(getattr(values, 'name', None))
+
+
+class ReportSchema:
+    """Declarative description of one CourtReserve export."""
+
+    def __init__(self, name, separators=' /', drop_chars='', categoricals=(),
+                 datetimes=None, infer_dates=(), derived=None, required=None, skiprows=0,
+                 date_column=None, player_column=None, membership_column=None,
+                 dimensions=None):
+        """
+        Args:
+            name: Database table name
+            separators: Header characters replaced with '_'
+            drop_chars: Header characters removed
+            categoricals: Columns read as pandas categoricals
+            datetimes: {column: (format, target)}; target None parses in place
+            infer_dates: Datetime columns whose values in another format fall
+                back to pandas' inference (others become NaT)
+            derived: {target: (source, function of the source Series)}
+            required: Column that is empty only on summary/separator rows
+            skiprows: Metadata lines above the header
+            date_column: Parsed column that date-range filters apply to
+            player_column: Player/member ID column for player filters
+            membership_column: Membership name column for membership filters
+            dimensions: Parsed datetime column the TIME_DIMENSIONS are derived from
+        """
+        self.name = name
+        self.separators = separators
+        self.drop_chars = drop_chars
+        self.categoricals = set(categoricals)
+        self.datetimes = datetimes or {}
+        self.infer_dates = set(infer_dates)
+        self.derived = derived or {}
+        self.required = required
+        self.skiprows = skiprows
+        self.date_column = date_column
+        self.player_column = player_column
+        self.membership_column = membership_column
+        self.dimensions = dimensions
+        self._signature = None
+
+    def clean_name(self, header):
+        """Convert an export header to its database column name."""
+        name = str(header).strip().lower()
+        for char in self.separators:
+            name = name.replace(char, '_')
+        for char in self.drop_chars:
+            name = name.replace(char, '')
+        return name
+
+    def datetime_format(self, column):
+        """Return the declared datetime format of a column (None if unknown)."""
+        return self.datetimes.get(column, (None, None))[0]
+
+    def dimension_dtypes(self):
+        """
+        Return {column: dtype} of the time dimensions this report stores
+        (hour and minute_of_day only when its source has a time of day).
+        """
+        if self.dimensions is None:
+            return {}
+        fmt = next((fmt for column, (fmt, target) in self.datetimes.items()
+                    if (target or column) == self.dimensions), None)
+        return {column: dtype for column, dtype in TIME_DIMENSIONS.items()
+                if fmt != DATE or column not in TIME_OF_DAY_DIMENSIONS}
+
+    def add_dimensions(self, df, source=None):
+        """
+        Materialize the time dimensions of df's parsed source column (default:
+        the declared one) as integer columns. Returns df.
+        """
+        dtypes = self.dimension_dtypes()
+        source = source or self.dimensions
+        if dtypes and source in df.columns:
+            dims = time_dimensions(df[source], with_time='hour' in dtypes)
+            for column in dims.columns:
+                df[column] = dims[column]
+        return df
+
+    def dtypes_for(self, headers):
+        """Map export headers to the dtypes declared for their columns."""
+        return {header: 'category' for header in headers if self.clean_name(header) in self.categoricals}
+
+    def cache_signature(self):
+        """
+        Digest of everything that shapes the frame read_csv() caches: the
+        declarations the CSV parse uses, the source of the parsing methods
+        and the pandas version. Part of the columnar cache key.
+        """
+        if self._signature is None:
+            digest = hashlib.sha256(repr((self.name, self.separators, self.drop_chars,
+                                          sorted(self.categoricals), self.skiprows, pd.__version__)).encode())
+            for method in (ReportSchema.clean_name, ReportSchema.dtypes_for, ReportSchema._read_csv):
+                digest.update(inspect.getsource(method).encode())
+            self._signature = digest.hexdigest()
+        return self._signature
+
+    def read_csv(self, csv_file, columns=None, **kwargs):
+        """
+        Read an export with its declared dtypes, keeping the export headers.
+
+        Served from the columnar cache when the CSV is unchanged; otherwise
+        the CSV is parsed and cached. columns (export headers; missing ones
+        are ignored) limits which columns are loaded. Extra keyword arguments
+        (e.g. chunksize) are passed to pd.read_csv and bypass the cache.
+        """
+        if kwargs:
+            return self._read_csv(csv_file, columns, **kwargs)
+
+        path = columnar_cache.cache_path(self.name, csv_file, self.cache_signature())
+        df = columnar_cache.read_cache(path, columns)
+        if df is not None:
+            return df
+
+        # The cache holds every column, so only project after writing it
+        df = self._read_csv(csv_file, None if path else columns)
+        columnar_cache.write_cache(path, df)
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return df
+
+    def _read_csv(self, csv_file, columns=None, **kwargs):
+        """Parse the CSV itself, with declared dtypes and optional projection."""
+        headers = pd.read_csv(csv_file, encoding='utf-8-sig', skiprows=self.skiprows, nrows=0).columns
+        if columns is not None:
+            kwargs['usecols'] = [col for col in columns if col in headers]
+        return pd.read_csv(csv_file, encoding='utf-8-sig', low_memory=False, skiprows=self.skiprows,
+                           dtype=self.dtypes_for(headers), **kwargs)
+
+    def clean_columns(self, df):
+        """Rename export headers to database column names."""
+        df.columns = [self.clean_name(col) for col in df.columns]
+        return df
+
+    def parse_dates(self, df, raw=False):
+        """
+        Parse every declared datetime column present in df.
+
+        With raw=True, df still has export headers and each column is parsed
+        in place; otherwise parsed values go to the declared target column.
+        """
+        if raw:
+            for header in df.columns:
+                column = self.clean_name(header)
+                if column in self.datetimes:
+                    df[header] = parse_datetime(df[header], self.datetime_format(column),
+                                                infer=column in self.infer_dates)
+            return df
+
+        for column, (fmt, target) in self.datetimes.items():
+            if column in df.columns:
+                df[target or column] = parse_datetime(df[column], fmt, infer=column in self.infer_dates)
+        return df
+
+    def clean(self, df):
+        """Turn a frame read by read_csv (whole file or one chunk) into table rows."""
+        df = self.clean_columns(df)
+
+        if self.required and self.required in df.columns:
+            df = df[df[self.required].notna()].copy()
+
+        df = self.parse_dates(df)
+        for target, (source, derive) in self.derived.items():
+            if source in df.columns:
+                df[target] = derive(df[source])
+        return self.add_dimensions(df)
+
+    def load(self, csv_file):
+        """Read and clean one export."""
+        return self.clean(self.read_csv(csv_file))
+
+
+def _start_hour(time_slot):
+    """Start hour (0-23) of time slots like "9:00 AM - 10:00 AM"."""
+    return parse_time_slots(time_slot)['start_hour'].astype('Int64')
+
+
+def _end_hour(time_slot):
+    """End hour (0-23) of time slots like "9:00 AM - 10:00 AM"."""
+    return parse_time_slots(time_slot)['end_hour'].astype('Int64')
+
+
+def _currency_amount(total):
+    """Convert currency strings like "$1,234.56" to numbers."""
+    return pd.to_numeric(total.astype(str).str.replace('$', '').str.replace(',', ''), errors='coerce')
+
+
+SCHEMAS = {schema.name: schema for schema in [
+    ReportSchema(
+        'reservations',
+        categoricals=['reservation_type', 'payment_status'],
+        datetimes={
+            'start_date___time': (DATETIME, 'start_datetime'),
+            'end_date___time': (DATETIME, 'end_datetime'),
+            'created_on': (DATETIME, None),
+        },
+        date_column='start_datetime',
+        player_column='player__#',
+        dimensions='start_datetime',
+    ),
+    ReportSchema(
+        'members',
+        categoricals=['membership_type', 'membership_status', 'current_membership'],
+        datetimes={
+            'current_membership_start_date': (DATE, 'membership_start_date'),
+            'date_of_birth': (DATE, None),
+        },
+        date_column='membership_start_date',
+        player_column='member_#',
+        membership_column='current_membership',
+    ),
+    ReportSchema(
+        'checkins',
+        separators=' /-',
+        categoricals=['registration_type', 'membership_name', 'check_in_status'],
+        datetimes={'check_in_date_time': (DATETIME, 'checkin_datetime')},
+        derived={
+            'price_amount': ('price', parse_prices),
+            'time_of_day': ('event_name', classify_time_of_day),
+        },
+        date_column='checkin_datetime',
+        player_column='player__#',
+        membership_column='membership_name',
+        dimensions='checkin_datetime',
+    ),
+    ReportSchema(
+        'court_utilization',
+        datetimes={'date': (DATE, None)},
+        derived={
+            'start_hour': ('time_slot', _start_hour),
+            'end_hour': ('time_slot', _end_hour),
+        },
+        skiprows=1,
+        date_column='date',
+        dimensions='date',
+    ),
+    ReportSchema(
+        'cancellations',
+        categoricals=['reservation_type'],
+        datetimes={
+            'start_date___time': (DATETIME, 'start_datetime'),
+            'cancelled_on': (DATETIME, None),
+        },
+        date_column='start_datetime',
+        player_column='player__#',
+        dimensions='start_datetime',
+    ),
+    ReportSchema(
+        'event_registrants',
+        datetimes={'event_date': (DATE, None)},
+        infer_dates=['event_date'],
+        date_column='event_date',
+        dimensions='event_date',
+    ),
+    ReportSchema(
+        'transactions',
+        drop_chars='.',
+        datetimes={
+            'trans_date': (DATE, 'trans_datetime'),
+            'paid_date': (DATE, 'paid_datetime'),
+        },
+        infer_dates=['trans_date', 'paid_date'],
+        required='transaction_id',
+        date_column='trans_datetime',
+        player_column='member_#',
+        dimensions='trans_datetime',
+    ),
+    ReportSchema(
+        'event_summary',
+        datetimes={'date': (DATE, 'event_date')},
+        infer_dates=['date'],
+        date_column='event_date',
+        dimensions='event_date',
+    ),
+    ReportSchema('event_list'),
+    ReportSchema('instructors'),
+    ReportSchema(
+        'sales_summary',
+        derived={'total_numeric': ('total', _currency_amount)},
+        required='item',
+    ),
+]}
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Persisted JTBD Segment Model
+Saves the fitted feature scaler and K-Means model of
+JTBDAnalyzer.cluster_customers() together with a format version, a hash of
+the feature schema and a digest of every customer's feature row, so later
+runs can assign segments against the saved centroids instead of
+reclustering.
+
+Purpose: Daily segment refreshes in seconds. Only new customers and those
+whose features changed are scored; a full refit happens on demand (--refit)
+or when the customer base has drifted away from the one the model was
+trained on.
+
+Usage:
+    python3 scripts/analyze_courtreserve_jtbd.py              # assigns when a saved model fits
+    python3 scripts/analyze_courtreserve_jtbd.py --refit      # always recluster and save
+    python3 scripts/segment_model.py                          # show the saved model
+
+    from segment_model import load_model, check_drift, assign_segments
+
+Drift compares the current customers, in the saved scaler's units, with the
+training customers: mean distance to the nearest centroid, the share
+further out than 95% of training customers were, and the largest shift of a
+feature mean (in training standard deviations). Limits are in DRIFT_LIMITS.
+"""
+
+import argparse
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+# Bump when the saved layout changes; older files are refitted, not read
+MODEL_VERSION = 1
+MODEL_PATH = 'jtbd-segment-model.joblib'
+
+# Refit when any measure exceeds its limit (training customers: 1.0, 0.05, 0.0)
+DRIFT_LIMITS = {
+    'distance_ratio': 1.25,
+    'outside_share': 0.15,
+    'mean_shift': 0.5,
+}
+
+
+def schema_hash(feature_names):
+    """Hash of the ordered clustering feature names."""
+    return hashlib.sha256('\n'.join(feature_names).encode()).hexdigest()[:16]
+
+
+def feature_digests(customer_features, feature_names):
+    """One 64-bit digest of each customer's feature row, indexed by member_id."""
+    rows = customer_features[feature_names].fillna(0)
+    digests = pd.util.hash_pandas_object(rows, index=False)
+    return pd.Series(digests.to_numpy(), index=customer_features['member_id'].to_numpy())
+
+
+def _distances(model, X_scaled):
+    """Distance of each row to its nearest centroid."""
+    return model.transform(X_scaled).min(axis=1)
+
+
+def save_model(clustering_results, customer_features, path=MODEL_PATH):
+    """
+    Save a cluster_customers() result with the drift baseline, each
+    customer's feature digest and assigned segment. Returns the saved bundle.
+    """
+    names = clustering_results['feature_names']
+    X_scaled = clustering_results['scaler'].transform(customer_features[names].fillna(0))
+    distances = _distances(clustering_results['model'], X_scaled)
+
+    bundle = {
+        'version': MODEL_VERSION,
+        'sklearn': sklearn.__version__,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+        'schema_hash': schema_hash(names),
+        'feature_names': names,
+        'scaler': clustering_results['scaler'],
+        'model': clustering_results['model'],
+        'best_k': clustering_results['best_k'],
+        'silhouette_score': clustering_results['silhouette_score'],
+        'n_customers': len(customer_features),
+        'baseline': {
+            'mean_distance': float(distances.mean()),
+            'p95_distance': float(np.percentile(distances, 95)),
+        },
+        'digests': feature_digests(customer_features, names),
+        'assignments': pd.Series(customer_features['segment'].to_numpy(),
+                                 index=customer_features['member_id'].to_numpy()),
+    }
+    write_bundle(bundle, path)
+    return bundle
+
+
+def write_bundle(bundle, path=MODEL_PATH):
+    """Write a model bundle atomically (readers never see a partial file)."""
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    joblib.dump(bundle, tmp)
+    os.replace(tmp, path)
+
+
+def load_model(feature_names=None, path=MODEL_PATH):
+    """
+    Load a saved model, or return None (with the reason printed) when there
+    is none, it was saved by another format version or scikit-learn
+    release, or its feature schema differs from feature_names.
+    """
+    if not Path(path).exists():
+        print(f"  No saved segment model at {path}")
+        return None
+    bundle = joblib.load(path)
+    if bundle.get('version') != MODEL_VERSION:
+        print(f"  Saved segment model has format version {bundle.get('version')}, expected {MODEL_VERSION}")
+        return None
+    if bundle.get('sklearn') != sklearn.__version__:
+        print(f"  Saved segment model was fitted with scikit-learn {bundle.get('sklearn')} "
+              f"(running {sklearn.__version__})")
+        return None
+    if feature_names is not None and bundle['schema_hash'] != schema_hash(feature_names):
+        print("  Saved segment model was fitted on a different feature schema")
+        return None
+    return bundle
+
+
+def check_drift(bundle, X_scaled):
+    """
+    Compare customers (already in the saved scaler's units) with the training
+    baseline. Returns the drift measures and 'drifted': the measures over
+    DRIFT_LIMITS.
+    """
+    distances = _distances(bundle['model'], X_scaled)
+    baseline = bundle['baseline']
+    measures = {
+        'distance_ratio': float(distances.mean() / baseline['mean_distance']) if baseline['mean_distance'] else 1.0,
+        'outside_share': float((distances > baseline['p95_distance']).mean()),
+        'mean_shift': float(np.abs(X_scaled.mean(axis=0)).max()),
+    }
+    measures['drifted'] = [name for name, limit in DRIFT_LIMITS.items() if measures[name] > limit]
+    return measures
+
+
+def assign_segments(bundle, customer_features, X_scaled):
+    """
+    Segments for every customer: saved assignments for unchanged feature
+    rows, the nearest saved centroid for new and changed customers.
+
+    Returns (segments array aligned with customer_features, digests, number scored).
+    """
+    digests = feature_digests(customer_features, bundle['feature_names'])
+    saved = bundle['digests']
+    known = digests.index.isin(saved.index)
+    changed = ~known
+    changed[known] = saved.loc[digests.index[known]].to_numpy() != digests.to_numpy()[known]
+
+    segments = bundle['assignments'].reindex(digests.index).to_numpy(dtype=np.float64, copy=True)
+    if changed.any():
+        segments[changed] = bundle['model'].predict(X_scaled[changed])
+    return segments.astype(np.int64), digests, int(changed.sum())
+
+
+def main():
+    """Show the saved model."""
+    parser = argparse.ArgumentParser(description='Show the persisted JTBD segment model.')
+    parser.add_argument('--model', default=MODEL_PATH)
+    args = parser.parse_args()
+
+    bundle = load_model(path=args.model)
+    if bundle is None:
+        return
+    print(f"📦 {args.model}")
+    print(f"   Format version {bundle['version']}, scikit-learn {bundle['sklearn']}")
+    print(f"   Trained {bundle['trained_at']} on {bundle['n_customers']:,} customers, updated {bundle['updated_at']}")
+    print(f"   k={bundle['best_k']}, silhouette={bundle['silhouette_score']:.3f}, "
+          f"schema {bundle['schema_hash']} ({len(bundle['feature_names'])} features)")
+    sizes = bundle['assignments'].value_counts().sort_index()
+    print("   Segments: " + ', '.join(f"{segment}: {size:,}" for segment, size in sizes.items()))
+
+
+if __name__ == '__main__':
+    main()
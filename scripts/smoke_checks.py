@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Smoke Checks
+Fast, deterministic correctness checks for the optimized code paths, kept
+separate from the timing benchmarks so they can run on every change.
+
+Purpose: The benchmarks assert parity too, but they take minutes and their
+inputs change with --scales. These checks use tiny fixed synthetic inputs,
+run in seconds and exit non-zero on the first mismatch.
+
+Usage:
+    python3 scripts/smoke_checks.py
+    python3 scripts/smoke_checks.py feature_parity
+
+Checks:
+    feature_parity          - grouped JTBD feature engine == per-member reference
+    context_switcher_parity - batched context-switcher detection == per-member reference
+    incremental_import      - incremental import of a newer export == full import
+    out_of_core_parity      - partitioned JTBD, pay-per-use and shadow-market results == in-memory
+    documented_imports      - the DATABASE_README imports work from the repository root
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+# Synthetic scale and seed of the fixed inputs (0.05 = ~230 reservations)
+SMOKE_SCALE = 0.05
+SMOKE_SEED = 7
+
+# Member-ID partitions of the out-of-core check (enough that members split)
+SMOKE_PARTITIONS = 3
+
+
+def check_feature_parity():
+    """Grouped vs per-member customer features on a tiny synthetic club."""
+    from benchmark_feature_engine import build_analyzer
+
+    analyzer = build_analyzer(SMOKE_SCALE, SMOKE_SEED)
+    with contextlib.redirect_stdout(io.StringIO()):
+        grouped = analyzer.engineer_features()
+        per_member = analyzer.engineer_features(per_member=True)
+
+    # Columns, dtypes, member order and every integer/object value must be
+    # identical; floats may differ in the last bit (the grouped std sums in
+    # a different order), so they are compared to 1e-12 relative
+    pd.testing.assert_frame_equal(grouped, per_member, check_exact=False, rtol=1e-12, atol=0)
+    return f"{len(grouped)} customers, {len(grouped.columns)} features"
+
+
+def check_context_switcher_parity():
+    """
+    Batched vs per-member context switchers on a tiny synthetic club, at the
+    default threshold and at min_bookings=2 (more members qualify).
+    """
+    from benchmark_feature_engine import build_analyzer
+
+    analyzer = build_analyzer(SMOKE_SCALE, SMOKE_SEED)
+    found = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        # The batched path reads customer_features
+        analyzer.engineer_features()
+        for min_bookings in (5, 2):
+            batched = analyzer.identify_context_switchers(min_bookings=min_bookings)
+            per_member = analyzer.identify_context_switchers(min_bookings=min_bookings, per_member=True)
+            assert batched == per_member, f"min_bookings={min_bookings}: {batched[:2]} != {per_member[:2]}"
+            found.append(len(batched))
+
+    assert found[-1] > 0, "no context switchers in the smoke data; the check would be vacuous"
+    return f"{found[0]} / {found[1]} switchers (min_bookings 5 / 2)"
+
+
+def _row_counts(db_path):
+    with sqlite3.connect(db_path) as conn:
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                  if not row[0].startswith('_')]  # Not the import manifest or version stamp
+        return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+
+def check_incremental_import():
+    """
+    Import an export, then a newer one incrementally, and compare row counts
+    with a full import of the newer export. The newer check-in and
+    cancellation exports contain the older ones plus new rows, and both
+    repeat some rows verbatim (identical rows are real, separate records).
+    """
+    from create_database import create_database
+    from synthetic_data import export_file_names, generate_exports, write_exports
+
+    exports = generate_exports(members=200, months=2, seed=SMOKE_SEED)
+    older = dict(exports)
+    newer = dict(exports)
+    for table in ('checkins', 'cancellations'):
+        rows = exports[table]
+        cut = len(rows) * 2 // 3
+        older[table] = pd.concat([rows.iloc[:cut], rows.iloc[:5]], ignore_index=True)
+        newer[table] = pd.concat([rows, rows.iloc[:5], rows.iloc[:3], rows.iloc[-4:]], ignore_index=True)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='courtreserve-smoke-') as tmp:
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_exports(older, '.', end='2025-03-01')
+                create_database()
+                # The newer reports sort first (larger); the rest are unchanged
+                names = export_file_names(pd.Timestamp('2025-03-02'))
+                for table in ('checkins', 'cancellations'):
+                    newer[table].to_csv(Path('_to_process') / names[table], index=False)
+                create_database(incremental=True)
+                incremental = _row_counts('courtreserve.db')
+                create_database()
+                full = _row_counts('courtreserve.db')
+        finally:
+            os.chdir(cwd)
+
+    assert incremental == full, f"incremental {incremental} != full {full}"
+    expected = {table: len(newer[table]) for table in ('checkins', 'cancellations')}
+    assert {table: full[table] for table in expected} == expected, f"{full} != {expected}"
+    return f"{len(full)} tables, {full['checkins']:,} check-ins"
+
+
+def _assert_same_results(in_memory, partitioned, label):
+    """
+    Compare two analysis results recursively. Sums over partitions add in a
+    different order, so floats are compared to 1e-12 relative.
+    """
+    if isinstance(in_memory, pd.DataFrame):
+        pd.testing.assert_frame_equal(in_memory, partitioned, check_exact=False, rtol=1e-12, atol=0,
+                                      obj=label)
+    elif isinstance(in_memory, pd.Series):
+        pd.testing.assert_series_equal(in_memory, partitioned, check_exact=False, rtol=1e-12, atol=0,
+                                       obj=label)
+    elif isinstance(in_memory, dict):
+        assert list(in_memory) == list(partitioned), f"{label}: keys {list(in_memory)} != {list(partitioned)}"
+        for key in in_memory:
+            _assert_same_results(in_memory[key], partitioned[key], f"{label}[{key!r}]")
+    elif isinstance(in_memory, (list, tuple)):
+        assert len(in_memory) == len(partitioned), f"{label}: {len(in_memory)} != {len(partitioned)} items"
+        for index, (a, b) in enumerate(zip(in_memory, partitioned)):
+            _assert_same_results(a, b, f"{label}[{index}]")
+    elif isinstance(in_memory, float):
+        assert math.isclose(in_memory, partitioned, rel_tol=1e-12), f"{label}: {in_memory} != {partitioned}"
+    else:
+        assert in_memory == partitioned, f"{label}: {in_memory!r} != {partitioned!r}"
+
+
+def check_out_of_core_parity():
+    """
+    Build a small database and run each out-of-core analysis both ways: the
+    JTBD features and context switchers with partitions=N, the partitioned
+    pay-per-use segment and the month-by-month shadow market, against their
+    in-memory versions.
+    """
+    from analyze_courtreserve_jtbd import JTBDAnalyzer
+    from analyze_pay_per_use_segment import (analyze_pay_per_use_partitioned, analyze_pay_per_use_segment,
+                                             load_checkin_data, load_player_spend)
+    from analyze_shadow_market_heatmap import (analyze_shadow_market, analyze_shadow_market_by_month,
+                                               load_utilization_data)
+    from create_database import create_database
+    from data_access import resolve_source
+    from query_database import close_pool
+    from synthetic_data import generate_exports, write_exports
+
+    exports = generate_exports(members=400, months=4, seed=SMOKE_SEED)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='courtreserve-smoke-') as tmp:
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_exports(exports, '.', end='2025-05-01')
+                create_database()
+                assert resolve_source('reservations') == 'db', "the smoke database was not picked up"
+
+                analyzers = {}
+                for partitions in (None, SMOKE_PARTITIONS):
+                    analyzer = JTBDAnalyzer(data_dir='.', partitions=partitions)
+                    analyzer.load_data()
+                    analyzer.clean_data()
+                    analyzer.engineer_features()
+                    analyzer.identify_context_switchers(min_bookings=2)
+                    analyzers[partitions] = analyzer
+
+                player_spend = load_player_spend()
+                pay_per_use = analyze_pay_per_use_segment(load_checkin_data(), player_spend)[0]
+                pay_per_use_partitioned = analyze_pay_per_use_partitioned(SMOKE_PARTITIONS, player_spend)
+
+                shadow_market = analyze_shadow_market(load_utilization_data())
+                shadow_market_by_month = analyze_shadow_market_by_month()
+        finally:
+            # The pooled connections point into the temporary directory
+            close_pool()
+            os.chdir(cwd)
+
+    in_memory, partitioned = analyzers[None], analyzers[SMOKE_PARTITIONS]
+    pd.testing.assert_frame_equal(in_memory.customer_features, partitioned.customer_features,
+                                  obj='customer_features')
+    assert in_memory.context_switchers == partitioned.context_switchers, \
+        f"context switchers: {in_memory.context_switchers[:2]} != {partitioned.context_switchers[:2]}"
+    _assert_same_results(pay_per_use, pay_per_use_partitioned, 'pay_per_use')
+    _assert_same_results(shadow_market, shadow_market_by_month, 'shadow_market')
+
+    assert in_memory.context_switchers, "no context switchers in the smoke data; the check would be vacuous"
+    return (f"{len(in_memory.customer_features)} customers, {len(in_memory.context_switchers)} switchers, "
+            f"{pay_per_use['unique_players']} pay-per-use players, {SMOKE_PARTITIONS} partitions")
+
+
+# Imports shown in DATABASE_README.md and the query_database.py hints
+DOCUMENTED_IMPORTS = [
+    'from scripts.query_database import run_query',
+    'from scripts.query_database import get_pool',
+    'from scripts.query_database import run_club_query, compare_clubs_utilization, compare_clubs_pay_per_use',
+]
+
+
+def check_documented_imports():
+    """
+    Run each documented import in a fresh interpreter from the repository
+    root (this process already has scripts/ on sys.path, which would hide a
+    sibling import that only works from there).
+    """
+    for statement in DOCUMENTED_IMPORTS:
+        result = subprocess.run([sys.executable, '-c', statement], cwd=SCRIPTS_DIR.parent,
+                                capture_output=True, text=True)
+        error = result.stderr.strip().splitlines()[-1:] or ['']
+        assert result.returncode == 0, f"{statement!r} failed: {error[0]}"
+    return f"{len(DOCUMENTED_IMPORTS)} import statements"
+
+
+CHECKS = {
+    'feature_parity': check_feature_parity,
+    'context_switcher_parity': check_context_switcher_parity,
+    'incremental_import': check_incremental_import,
+    'out_of_core_parity': check_out_of_core_parity,
+    'documented_imports': check_documented_imports,
+}
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('checks', nargs='*', metavar='CHECK',
+                        help=f"checks to run (default: all): {', '.join(CHECKS)}")
+    args = parser.parse_args()
+    unknown = [name for name in args.checks if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(unknown)}")
+
+    failed = 0
+    for name in args.checks or list(CHECKS):
+        t0 = time.perf_counter()
+        try:
+            detail = CHECKS[name]()
+        except AssertionError as e:
+            failed += 1
+            print(f"  ✗ {name} ({time.perf_counter() - t0:.1f}s)\n{e}")
+            continue
+        print(f"  ✓ {name} ({time.perf_counter() - t0:.1f}s): {detail}")
+
+    if failed:
+        print(f"\n❌ {failed} check(s) failed")
+        sys.exit(1)
+    print("\n✅ All checks passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Pipeline Stage Trace
+Records wall time, CPU time, peak memory and row counts for each stage of a
+multi-step analysis and writes them as a JSON trace, with an optional
+cProfile dump per stage.
+
+Purpose: Track performance regressions between runs and see which stage
+dominates as the CourtReserve exports grow, without reading print output.
+
+Usage:
+    from stage_trace import StageTrace
+
+    trace = StageTrace('jtbd', rows=analyzer.row_counts, profile_dir='profiles', track_memory=True)
+    trace.run('load_data', analyzer.load_data)
+    trace.run('cluster_customers', analyzer.cluster_customers, n_clusters_range=(3, 7))
+    trace.print_summary()
+    trace.write('jtbd-trace.json')
+
+Trace format:
+    {"pipeline": "jtbd", "started": ISO time, "python": version,
+     "total_wall_seconds": ..., "total_cpu_seconds": ..., "peak_rss_scope": ...,
+     "stages": [{"stage", "wall_seconds", "cpu_seconds", "peak_rss_mb",
+                 "peak_memory_mb", "memory_delta_mb", "rows", "profile", "error"}]}
+
+Peak memory is always recorded as peak_rss_mb, the process's resident set
+high-water mark (getrusage ru_maxrss) at the end of the stage. On Linux the
+mark is reset before each stage, so it is the stage's own peak
+(peak_rss_scope "stage"); elsewhere it is the peak since the process
+started ("process"), which still shows the stage that set it. This costs
+a system call per stage.
+
+For a detailed breakdown set track_memory: tracemalloc then records Python
+and numpy/pandas buffers (not the interpreter itself). peak_memory_mb is
+the most allocated at any point of the stage, memory_delta_mb what the
+stage left allocated. Tracing every allocation makes pandas-heavy stages
+2-4x slower, so compare wall times only between runs with the same setting.
+Each .prof dump opens with `python -m pstats FILE` or snakeviz.
+"""
+
+import cProfile
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+# ru_maxrss is in bytes on macOS and KiB elsewhere
+MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def reset_peak_rss():
+    """
+    Reset the process's peak RSS so ru_maxrss measures from now (Linux
+    4.0+). Returns False where the peak cannot be reset.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Resident set high-water mark in MB (None without the resource module)."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_UNIT / MB
+
+
+class StageTrace:
+    """Timing, memory and row-count records of one pipeline run."""
+
+    def __init__(self, pipeline, rows=None, profile_dir=None, track_memory=False):
+        """
+        Args:
+            pipeline: Name written to the trace (and prefixed to profile dumps)
+            rows: Callable returning {name: row count} after each stage
+            profile_dir: Directory for one cProfile dump per stage (None disables)
+            track_memory: Record peak memory with tracemalloc
+        """
+        self.pipeline = pipeline
+        self.rows = rows
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.track_memory = track_memory
+        self.started = datetime.now()
+        self.stages = []
+        self.peak_rss_scope = 'stage'
+
+    def run(self, stage, func, *args, **kwargs):
+        """Run func(*args, **kwargs) as a named stage and return its result."""
+        record = {'stage': stage}
+        profiler = cProfile.Profile() if self.profile_dir else None
+        started_tracing = self.track_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        if not reset_peak_rss():
+            self.peak_rss_scope = 'process'
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            record['wall_seconds'] = round(time.perf_counter() - wall_start, 4)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 4)
+
+            peak_rss = peak_rss_mb()
+            if peak_rss is not None:
+                record['peak_rss_mb'] = round(peak_rss, 2)
+            if self.track_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record['peak_memory_mb'] = round(peak / MB, 2)
+                record['memory_delta_mb'] = round((current - memory_before) / MB, 2)
+                if started_tracing:
+                    tracemalloc.stop()
+
+            if self.rows is not None:
+                record['rows'] = self.rows()
+            if profiler:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                path = self.profile_dir / f"{self.pipeline}-{len(self.stages) + 1:02d}-{stage}.prof"
+                profiler.dump_stats(path)
+                record['profile'] = str(path)
+            self.stages.append(record)
+
+    def to_dict(self):
+        """The trace as a JSON-serializable dict."""
+        return {
+            'pipeline': self.pipeline,
+            'started': self.started.isoformat(),
+            'python': platform.python_version(),
+            'total_wall_seconds': round(sum(s['wall_seconds'] for s in self.stages), 4),
+            'total_cpu_seconds': round(sum(s['cpu_seconds'] for s in self.stages), 4),
+            'peak_rss_scope': self.peak_rss_scope,
+            'stages': self.stages,
+        }
+
+    def write(self, path):
+        """Write the trace as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def print_summary(self):
+        """Print wall time, CPU time, peak memory and share of the run for each stage."""
+        total = sum(s['wall_seconds'] for s in self.stages) or 1
+        traced = any('peak_memory_mb' in s for s in self.stages)
+
+        def mb(s, key, width):
+            return f"{s[key]:>{width}.1f}" if key in s else f"{'-':>{width}s}"
+
+        print(f"\n⏱  Stage timings ({self.pipeline}):")
+        print(f"   {'Stage':28s} {'Wall':>8s} {'CPU':>8s} {'Peak RSS MB':>12s}"
+              + (f" {'Traced MB':>10s}" if traced else '') + f" {'Share':>6s}")
+        for s in self.stages:
+            flag = '  ⚠️  failed' if 'error' in s else ''
+            print(f"   {s['stage']:28s} {s['wall_seconds']:>7.2f}s {s['cpu_seconds']:>7.2f}s {mb(s, 'peak_rss_mb', 12)}"
+                  + (f" {mb(s, 'peak_memory_mb', 10)}" if traced else '')
+                  + f" {s['wall_seconds'] / total:>6.0%}{flag}")
+        if self.peak_rss_scope == 'process':
+            print("   (Peak RSS is the process's high-water mark so far; per-stage peaks need Linux)")
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Synthetic CourtReserve Exports
+Writes schema-faithful CourtReserve CSV exports (Reservations, Members,
+Transactions, Cancellations, Check-ins, Event Summary and Court
+Utilization) at a configurable scale, with the export headers, date
+formats and file names the importer and analysis scripts expect.
+
+Purpose: Benchmarks and trial runs of every script without the real
+(private, timestamped) exports. Output is deterministic for a given seed.
+
+Usage:
+    python3 scripts/synthetic_data.py --out /tmp/club
+    python3 scripts/synthetic_data.py --out /tmp/big --members 50000 --months 24 --courts 12
+
+    cd /tmp/club && python3 /path/to/scripts/create_database.py
+
+Files are written to OUT/_to_process/. Record counts scale with members ×
+months at the rates of the October 2025 exports (4,477 members over 9
+months). Distributions:
+    - Activity is heavy-tailed: a minority of players books most courts
+    - Bookings and check-ins peak 8-10 AM and 5-8 PM, weekends are busier
+    - ~45% of players are Non-Member/Visitors paying drop-in fees
+    - Court utilization is derived from the reservations (booked courts per
+      hour / courts), so the shadow market matches the booking pattern
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from report_schema import DATE, DATETIME
+
+# October 2025 exports: 4,477 members over ~9 months
+BASE_MEMBERS = 4477
+BASE_MONTHS = 9
+BASE_COURTS = 7
+
+# Records per member per month in the October 2025 exports
+RATES = {
+    'reservations': 4609 / (BASE_MEMBERS * BASE_MONTHS),
+    'checkins': 15513 / (BASE_MEMBERS * BASE_MONTHS),
+    'transactions': 366 / (BASE_MEMBERS * BASE_MONTHS),
+    'cancellations': 3894 / (BASE_MEMBERS * BASE_MONTHS),
+}
+EVENTS_PER_COURT_DAY = 1326 / (BASE_COURTS * 270)
+
+# Current Membership mix (None: no membership on file)
+MEMBERSHIPS = {
+    'Non-Member/Visitor': 0.45,
+    'Individual Membership': 0.16,
+    'Fanatic Annual': 0.10,
+    'Family Membership': 0.10,
+    'Founder Membership': 0.05,
+    'Fight Club': 0.05,
+    'Coach': 0.01,
+    None: 0.08,
+}
+MEMBERSHIP_TYPES = {
+    'Family Membership': 'Family',
+    'Coach': 'Staff',
+    'Non-Member/Visitor': 'Visitor',
+}
+
+# Opening hours (slot start) and relative demand per hour
+OPEN_HOURS = np.arange(6, 22)
+WEEKDAY_DEMAND = np.array([3, 5, 8, 9, 7, 5, 4, 4, 3, 3, 4, 7, 9, 9, 7, 4], dtype=float)
+WEEKEND_DEMAND = np.array([2, 5, 9, 10, 10, 9, 7, 6, 5, 5, 5, 5, 5, 4, 3, 2], dtype=float)
+WEEKEND_BOOST = 1.3
+
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn',
+               'Maria', 'James', 'Linda', 'Robert', 'Patricia', 'Michael', 'Susan', 'David', 'Karen', 'Chris']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Lopez', 'Wilson',
+              'Anderson', 'Thomas', 'Moore', 'Martin', 'Lee', 'Walker', 'Hall', 'Allen', 'Young', 'King']
+ZIP_CODES = ['60601', '60607', '60608', '60611', '60614', '60616', '60622', '60647', '60657', '60302']
+
+RESERVATION_TYPES = {'Doubles - Add Players Now': 0.45, 'Singles': 0.15, 'Open Play Drop-In': 0.25,
+                     'Event': 0.10, 'Clinic': 0.05}
+EVENT_PROGRAMS = ['Open Play - Intermediate', 'Open Play - Advanced', 'Skills Drill 3.5', 'Round Robin',
+                  'Beginner Clinic', 'Social Mixer', 'Ladder League']
+TRANSACTION_ITEMS = {'Monthly Membership': 99.0, 'Drop-In': 16.0, 'Clinic': 35.0,
+                     'Paddle Rental': 5.0, 'Court Fee': 30.0}
+
+
+def _weighted_choice(rng, options, size):
+    """Draw from a {value: probability} dict."""
+    values = np.array(list(options), dtype=object)
+    p = np.array(list(options.values()), dtype=float)
+    return rng.choice(values, size, p=p / p.sum())
+
+
+def _names(ids):
+    """Deterministic first/last names for player IDs."""
+    ids = np.asarray(ids)
+    return (np.array(FIRST_NAMES, dtype=object)[ids % len(FIRST_NAMES)],
+            np.array(LAST_NAMES, dtype=object)[(ids // len(FIRST_NAMES)) % len(LAST_NAMES)])
+
+
+def _slot_label(hour):
+    """'9:00 AM - 10:00 AM' for hour 9."""
+    def fmt(h):
+        return f"{(h % 12) or 12}:00 {'AM' if h % 24 < 12 else 'PM'}"
+    return f"{fmt(hour)} - {fmt(hour + 1)}"
+
+
+def _clock(hours):
+    """'7:00 PM' style labels for integer hours."""
+    hours = np.asarray(hours)
+    return np.char.add(np.char.add(((hours % 12) + 12 * (hours % 12 == 0)).astype(str), ':00 '),
+                       np.where(hours < 12, 'AM', 'PM'))
+
+
+def _draw_times(rng, days, size):
+    """Start timestamps following the weekday/weekend hourly demand curves."""
+    weekend = days.dayofweek >= 5
+    day_p = np.where(weekend, WEEKEND_BOOST, 1.0)
+    day_idx = rng.choice(len(days), size, p=day_p / day_p.sum())
+    on_weekend = weekend[day_idx]
+
+    hours = np.empty(size, dtype=np.int64)
+    for flag, demand in [(False, WEEKDAY_DEMAND), (True, WEEKEND_DEMAND)]:
+        rows = on_weekend == flag
+        hours[rows] = rng.choice(OPEN_HOURS, rows.sum(), p=demand / demand.sum())
+    minutes = rng.choice([0, 30], size, p=[0.7, 0.3])
+    starts = days[day_idx] + pd.to_timedelta(hours, unit='h') + pd.to_timedelta(minutes, unit='m')
+    return pd.DatetimeIndex(starts)
+
+
+def generate_exports(members=BASE_MEMBERS, months=BASE_MONTHS, courts=BASE_COURTS,
+                     start='2025-01-01', seed=42):
+    """
+    Build the exports as DataFrames with CourtReserve's headers.
+
+    Returns:
+        {table: DataFrame} for reservations, members, checkins,
+        court_utilization (wide, as exported), cancellations, transactions
+        and event_summary
+    """
+    rng = np.random.default_rng(seed)
+    first_day = pd.Timestamp(start)
+    days = pd.date_range(first_day, first_day + pd.DateOffset(months=months), freq='D', inclusive='left')
+
+    def volume(table):
+        return max(1, int(round(members * months * RATES[table])))
+
+    # Members ------------------------------------------------------------------
+    ids = np.arange(1000000, 1000000 + members)
+    first, last = _names(ids)
+    membership = _weighted_choice(rng, MEMBERSHIPS, members)
+    visitor = membership == 'Non-Member/Visitor'
+    doubles = np.round(rng.uniform(2.5, 5.5, members), 2).astype(object)
+    doubles[rng.random(members) < 0.6] = None
+    singles = np.round(rng.uniform(2.5, 5.5, members), 2).astype(object)
+    singles[rng.random(members) < 0.85] = None
+
+    member_df = pd.DataFrame({
+        'Member #': ids,
+        'First Name': first,
+        'Last Name': last,
+        'Email': [f"player{i}@example.com" for i in ids],
+        'Phone': [f"(312) 555-{i % 10000:04d}" for i in ids],
+        'Zip Code': rng.choice(ZIP_CODES, members),
+        'Membership Type': [MEMBERSHIP_TYPES.get(m, 'Individual') if m else None for m in membership],
+        'Membership Status': rng.choice(['Active', 'Expired', 'Suspended'], members, p=[0.75, 0.2, 0.05]),
+        'Current Membership': membership,
+        'Current Membership Start Date': (first_day - pd.to_timedelta(rng.integers(-len(days), 730, members), unit='D')
+                                          ).strftime(DATE),
+        'Date Of Birth': (pd.Timestamp('2000-01-01') - pd.to_timedelta(rng.integers(0, 365 * 50, members), unit='D')
+                          ).strftime(DATE),
+        'Total Paid': np.round(np.where(visitor, rng.lognormal(4, 1, members), rng.lognormal(6.5, 0.6, members)), 2),
+        'DUPR - Singles': singles,
+        'DUPR - Doubles': doubles,
+    })
+
+    # Heavy-tailed activity: a minority of players books most of the courts
+    weights = rng.pareto(1.5, members) + 1
+    weights /= weights.sum()
+
+    def players(size):
+        return rng.choice(members, size, p=weights)
+
+    # Reservations -------------------------------------------------------------
+    n = volume('reservations')
+    booker = players(n)
+    starts = _draw_times(rng, days, n)
+    duration = rng.choice([60, 90, 120], n, p=[0.5, 0.3, 0.2])
+    ends = starts + pd.to_timedelta(duration, unit='m')
+    res_type = _weighted_choice(rng, RESERVATION_TYPES, n)
+    is_event = np.isin(res_type, ['Event', 'Clinic'])
+    party = np.where(res_type == 'Singles', 2, rng.choice([1, 2, 3, 4], n, p=[0.15, 0.15, 0.2, 0.5]))
+    court = rng.integers(1, courts + 1, n)
+
+    party_members = [players(n) for _ in range(3)]
+    member_lists = []
+    for i in range(n):
+        listed = [booker[i]] + [party_members[k][i] for k in range(party[i] - 1)]
+        member_lists.append(', '.join(f"{first[p]} {last[p]} (#{ids[p]})" for p in listed)
+                            if party[i] > 1 else None)
+
+    fee = np.where(is_event, 20.0, np.where(visitor[booker], 16.0, 0.0))
+    reservations = pd.DataFrame({
+        'Confirmation #': np.arange(500000, 500000 + n),
+        'Reservation Type': res_type,
+        'Start Date / Time': starts.strftime(DATETIME),
+        'End Date / Time': ends.strftime(DATETIME),
+        'Is Event?': np.where(is_event, 'TRUE', 'FALSE'),
+        'Event Name': np.where(is_event, rng.choice(EVENT_PROGRAMS, n), None),
+        'Courts': np.char.add('Court ', court.astype(str)),
+        'Player Name': first[booker] + ' ' + last[booker],
+        'Player Email': member_df['Email'].to_numpy()[booker],
+        'Player _#': np.char.add('#', ids[booker].astype(str)),
+        'Members': member_lists,
+        'Members Count': party,
+        'Guests': np.where(rng.random(n) < 0.1, '1', None),
+        'Payment Status': np.where(fee > 0, rng.choice(['Paid', 'Partially Paid', 'Unpaid'], n, p=[0.85, 0.05, 0.1]),
+                                   'Paid'),
+        'Fee Amount': fee,
+        'Created On': (starts - pd.to_timedelta(rng.integers(1, 14 * 24, n), unit='h')).strftime(DATETIME),
+        'Created By': first[booker] + ' ' + last[booker],
+    }).sort_values('Confirmation #', ignore_index=True)
+
+    # Court utilization: booked courts per hour slot / courts ------------------
+    booked = np.zeros((len(days), len(OPEN_HOURS)))
+    day_idx = (starts.normalize() - days[0]).days.to_numpy()
+    start_hour = starts.hour.to_numpy()
+    end_hours = (ends - starts.normalize()) / pd.Timedelta(hours=1)
+    for offset in range(3):  # Bookings span at most three hour slots
+        slot = start_hour + offset
+        covered = (slot < end_hours.to_numpy()) & (slot >= OPEN_HOURS[0]) & (slot <= OPEN_HOURS[-1])
+        np.add.at(booked, (day_idx[covered], slot[covered] - OPEN_HOURS[0]), 1)
+    pct = np.round(np.minimum(booked, courts) / courts * 100, 2)
+
+    cells = pd.DataFrame(pct.T).map(lambda v: f"{v:g} %")
+    cells.columns = [f"{d.month}/{d.day}/{d.year}" for d in days]
+    utilization = pd.concat([pd.DataFrame({'Time': [_slot_label(h) for h in OPEN_HOURS]}), cells], axis=1)
+    utilization['Total'] = [f"{v:.2f} %" for v in pct.mean(axis=0)]
+
+    # Check-ins ----------------------------------------------------------------
+    n = volume('checkins')
+    player = players(n)
+    times = _draw_times(rng, days, n)
+    hours = times.hour.to_numpy()
+    labels = np.where(hours < 11, 'Morning', np.where(hours < 16, 'Mid-Day', 'Evening'))
+    programs = rng.choice(['Open Play', 'Skills Drill', 'Round Robin', 'Drop-In'], n)
+    event_names = np.where(rng.random(n) < 0.5,
+                           np.char.add(np.char.add(labels, ' '), programs),
+                           np.char.add(np.char.add(programs, ' '), _clock(hours)))
+    player_visitor = visitor[player]
+    price = np.where(player_visitor, rng.choice(['(Drop-in)  $16.00', '$20.00'], n, p=[0.8, 0.2]), '$0.00')
+    price = np.where(rng.random(n) < 0.1, None, price)
+    rating = pd.to_numeric(pd.Series(doubles[player]), errors='coerce')
+
+    checkins = pd.DataFrame({
+        'Player _#': ids[player],
+        'Player First Name': first[player],
+        'Player Last Name': last[player],
+        'Check-in Date/Time': times.strftime(DATETIME),
+        'Check-In Status': rng.choice(['Checked-In', 'Not Checked-In'], n, p=[0.85, 0.15]),
+        'Registration Type': np.where(player_visitor & (rng.random(n) < 0.7), 'Drop-In',
+                                      rng.choice(['Reservation', 'Event Registration'], n)),
+        'Membership Name': np.where(pd.isna(membership[player]), 'Non-Member/Visitor', membership[player]),
+        'Event Name': event_names,
+        'Price': price,
+        'Pickleball Rating': (rating * 2).round() / 2,
+    }).sort_values('Check-in Date/Time', key=lambda s: pd.to_datetime(s, format=DATETIME), ignore_index=True)
+
+    # Cancellations ------------------------------------------------------------
+    n = volume('cancellations')
+    player = players(n)
+    starts = _draw_times(rng, days, n)
+    cancellations = pd.DataFrame({
+        'Player _#': np.char.add('#', ids[player].astype(str)),
+        'Player Name': first[player] + ' ' + last[player],
+        'Reservation Type': _weighted_choice(rng, RESERVATION_TYPES, n),
+        'Start Date / Time': starts.strftime(DATETIME),
+        'Cancelled On': (starts - pd.to_timedelta(rng.integers(1, 7 * 24, n), unit='h')).strftime(DATETIME),
+        'Courts': np.char.add('Court ', rng.integers(1, courts + 1, n).astype(str)),
+    })
+
+    # Transactions -------------------------------------------------------------
+    n = volume('transactions')
+    player = players(n)
+    item = _weighted_choice(rng, {'Monthly Membership': 0.4, 'Drop-In': 0.3, 'Clinic': 0.15,
+                                  'Paddle Rental': 0.05, 'Court Fee': 0.1}, n)
+    trans_dates = days[rng.integers(0, len(days), n)]
+    transactions = pd.DataFrame({
+        'Transaction ID': np.arange(900000, 900000 + n),
+        'Trans. Date': trans_dates.strftime(DATE),
+        'Paid Date': (trans_dates + pd.to_timedelta(rng.integers(0, 5, n), unit='D')).strftime(DATE),
+        'Member #': ids[player],
+        'First Name': first[player],
+        'Last Name': last[player],
+        'Item': item,
+        'Total': [TRANSACTION_ITEMS[i] for i in item],
+        'Payment Type': rng.choice(['Credit Card', 'Account Credit', 'Cash'], n, p=[0.8, 0.15, 0.05]),
+    })
+
+    # Event summary: scheduled programs per day, more with more courts -------
+    per_day = rng.poisson(EVENTS_PER_COURT_DAY * courts, len(days))
+    event_days = np.repeat(days, per_day)
+    n = len(event_days)
+    capacity = rng.choice([8, 12, 16], n)
+    registrants = np.minimum(rng.binomial(capacity, 0.7), capacity)
+    event_hours = rng.choice(OPEN_HOURS, n, p=WEEKDAY_DEMAND / WEEKDAY_DEMAND.sum())
+    event_summary = pd.DataFrame({
+        'Date': event_days.strftime(DATE),
+        'Event Name': rng.choice(EVENT_PROGRAMS, n),
+        'Start Time': _clock(event_hours),
+        'Registrants': registrants,
+        'Capacity': capacity,
+        'Revenue': registrants * 20.0,
+    })
+
+    return {
+        'reservations': reservations,
+        'members': member_df,
+        'checkins': checkins,
+        'court_utilization': utilization,
+        'cancellations': cancellations,
+        'transactions': transactions,
+        'event_summary': event_summary,
+    }
+
+
+def export_file_names(end):
+    """Export file names (matching create_database.CSV_PATTERNS) stamped with the export date."""
+    stamp = end.strftime('%Y-%m-%d')
+    return {
+        'reservations': f'ReservationReport_{stamp}_03-50-PM.csv',
+        'members': f'MembersReport_{stamp}_04-58-PM.csv',
+        'checkins': f'CheckinReports{stamp}_09-55-PM.csv',
+        'court_utilization': 'CourtUtilization-by-date.csv',
+        'cancellations': f'CancellationsReport_{stamp}_09-49-PM.csv',
+        'transactions': f'Transactions-{end.year}.csv',
+        'event_summary': 'Event_Summary.csv',
+    }
+
+
+def write_exports(exports, out_dir, end=None):
+    """
+    Write generate_exports() output to out_dir/_to_process/ and return the
+    {table: path} written. end stamps the file names (default: today).
+    """
+    target = Path(out_dir) / '_to_process'
+    target.mkdir(parents=True, exist_ok=True)
+    names = export_file_names(pd.Timestamp(end) if end is not None else pd.Timestamp.now())
+
+    paths = {}
+    for table, df in exports.items():
+        path = target / names[table]
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            if table == 'court_utilization':
+                f.write('Court Utilization Report\n')  # Metadata line above the header
+            df.to_csv(f, index=False)
+        paths[table] = path
+    return paths
+
+
+def main():
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', required=True, help='directory to write _to_process/ exports into')
+    parser.add_argument('--members', type=int, default=BASE_MEMBERS, help='members/players on file')
+    parser.add_argument('--months', type=int, default=BASE_MONTHS, help='months of activity')
+    parser.add_argument('--courts', type=int, default=BASE_COURTS, help='courts at the club')
+    parser.add_argument('--start', default='2025-01-01', help='first day of activity')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.members:,} members × {args.months} months, {args.courts} courts...")
+    exports = generate_exports(args.members, args.months, args.courts, args.start, args.seed)
+    end = pd.Timestamp(args.start) + pd.DateOffset(months=args.months)
+    for table, path in write_exports(exports, args.out, end).items():
+        print(f"  ✓ {path} ({len(exports[table]):,} rows)")
+
+
+if __name__ == '__main__':
+    main()
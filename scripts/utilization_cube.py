@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Court Utilization Windows
+A dense date × hour utilization cube, built once from the court_utilization
+report, against which any number of time windows (days of week, hour range,
+excluded dates/holidays, court count, price per court-hour) are evaluated
+together.
+
+Purpose: The shadow market (weekday 9 AM - 4 PM, 7 courts, $30/court-hour)
+is one window among many. Scanning dozens of candidate off-peak windows
+reads and parses the data once, then evaluates every window with a few
+array operations instead of re-running the analysis per window.
+
+Usage:
+    python3 scripts/utilization_cube.py                  # scan candidate windows
+    python3 scripts/utilization_cube.py --top 20 --start 2025-03-01
+
+    from utilization_cube import SHADOW_MARKET, UtilizationCube, Window
+
+    cube = UtilizationCube.load()
+    results = cube.evaluate([SHADOW_MARKET,
+                             Window('Tue-Thu 1-4 PM', days=[1, 2, 3], start_hour=13, end_hour=16)])
+
+Cells are averaged the same way as analyze_shadow_market(): every time slot
+of every date counts once, and blank cells count as 0% utilization.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+from data_access import load_report
+from report_schema import parse_time_slots
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+WEEKDAYS = (0, 1, 2, 3, 4)
+WEEKEND = (5, 6)
+
+# Weeks per year in the annual revenue figures
+WEEKS_PER_YEAR = 52
+
+
+class Window:
+    """A recurring block of court time and the economics of filling it."""
+
+    def __init__(self, name, days=WEEKDAYS, start_hour=9, end_hour=16, courts=7,
+                 price_per_hour=30, fill_rate=0.30, exclude_dates=(), exclude_holidays=False):
+        """
+        Args:
+            name: Label used in reports
+            days: Days of week included (0=Monday, 6=Sunday)
+            start_hour, end_hour: Hours covered, start <= hour < end (0-24)
+            courts: Courts available in the window
+            price_per_hour: Average revenue per filled court-hour ($)
+            fill_rate: Share of empty capacity assumed fillable
+            exclude_dates: Dates left out of the averages (closures, events)
+            exclude_holidays: Also leave out US federal holidays
+        """
+        self.name = name
+        self.days = tuple(sorted(days))
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.courts = courts
+        self.price_per_hour = price_per_hour
+        self.fill_rate = fill_rate
+        self.exclude_dates = pd.DatetimeIndex(pd.to_datetime(list(exclude_dates))).normalize()
+        self.exclude_holidays = exclude_holidays
+
+    @property
+    def hours(self):
+        """Hours of day in the window."""
+        return range(self.start_hour, self.end_hour)
+
+    @property
+    def weekly_capacity(self):
+        """Court-hours per week (courts × hours × days)."""
+        return self.courts * len(self.hours) * len(self.days)
+
+    def excluded_dates(self, start=None, end=None):
+        """Dates left out of the window: exclude_dates plus, if enabled, US federal holidays."""
+        if not self.exclude_holidays:
+            return self.exclude_dates
+        return self.exclude_dates.union(USFederalHolidayCalendar().holidays(start, end))
+
+    def day_label(self):
+        """Days as 'Mon-Fri' (consecutive runs) or 'Sat, Sun'."""
+        if len(self.days) > 2 and self.days == tuple(range(self.days[0], self.days[-1] + 1)):
+            return f"{DAY_NAMES[self.days[0]][:3]}-{DAY_NAMES[self.days[-1]][:3]}"
+        return ', '.join(DAY_NAMES[d][:3] for d in self.days)
+
+    def describe(self):
+        """Short description like 'Mon-Fri 9:00-16:00'."""
+        return f"{self.day_label()} {self.start_hour}:00-{self.end_hour}:00"
+
+    def __repr__(self):
+        return f"Window({self.name!r}, {self.describe()}, {self.courts} courts, ${self.price_per_hour}/h)"
+
+
+# The weekday daytime block analyzed by analyze_shadow_market_heatmap.py
+SHADOW_MARKET = Window('Shadow market')
+
+
+def candidate_windows(day_sets=None, lengths=(2, 3, 4), first_hour=6, last_hour=22, **kwargs):
+    """
+    Build a grid of candidate windows: every block of each length between
+    first_hour and last_hour, for each named set of days. Extra keyword
+    arguments (courts, price_per_hour, exclude_holidays, ...) apply to all.
+    """
+    if day_sets is None:
+        day_sets = {'Weekdays': WEEKDAYS, 'Mon-Thu': (0, 1, 2, 3), 'Weekend': WEEKEND}
+
+    windows = []
+    for label, days in day_sets.items():
+        for length in lengths:
+            for start in range(first_hour, last_hour - length + 1):
+                name = f"{label} {start}:00-{start + length}:00"
+                windows.append(Window(name, days=days, start_hour=start, end_hour=start + length, **kwargs))
+    return windows
+
+
+class UtilizationCube:
+    """
+    Utilization totals and slot counts per (date, hour of day).
+
+    totals[d, h] is the sum of the utilization percentages of every time
+    slot starting in hour h on dates[d]; counts[d, h] is how many slots that
+    is. Hours with several slots (half-hour or per-court reports) therefore
+    weigh each slot equally, as in analyze_shadow_market().
+    """
+
+    def __init__(self, dates, totals, counts):
+        self.dates = pd.DatetimeIndex(dates)
+        self.totals = np.asarray(totals, dtype=float)
+        self.counts = np.asarray(counts, dtype=float)
+        self.day_of_week = self.dates.dayofweek.to_numpy()
+
+    @classmethod
+    def from_long(cls, df):
+        """Build from (time_slot, date, utilization_pct) rows, as stored in courtreserve.db."""
+        hours = parse_time_slots(df['time_slot'])['start_hour'].to_numpy()
+        dates = pd.to_datetime(df['date']).dt.normalize()
+        keep = ~np.isnan(hours) & dates.notna().to_numpy()
+
+        date_index, date_values = pd.factorize(dates[keep], sort=True)
+        hour_index = hours[keep].astype(int)
+        values = pd.to_numeric(df['utilization_pct'], errors='coerce').fillna(0).to_numpy()[keep]
+
+        shape = (len(date_values), 24)
+        totals = np.zeros(shape)
+        counts = np.zeros(shape)
+        np.add.at(totals, (date_index, hour_index), values)
+        np.add.at(counts, (date_index, hour_index), 1)
+        return cls(date_values, totals, counts)
+
+    @classmethod
+    def load(cls, start=None, end=None):
+        """Build from the court_utilization report (courtreserve.db, or the CSV export)."""
+        return cls.from_long(load_report('court_utilization', start=start, end=end))
+
+    def masks(self, windows):
+        """Return (date mask, hour mask) arrays of shape (windows, dates) and (windows, 24)."""
+        first, last = (self.dates.min(), self.dates.max()) if len(self.dates) else (None, None)
+
+        date_mask = np.zeros((len(windows), len(self.dates)), dtype=bool)
+        hour_mask = np.zeros((len(windows), 24), dtype=bool)
+        for i, window in enumerate(windows):
+            excluded = window.excluded_dates(first, last)
+            date_mask[i] = np.isin(self.day_of_week, window.days) & ~self.dates.isin(excluded)
+            hour_mask[i, window.start_hour:window.end_hour] = True
+        return date_mask, hour_mask
+
+    def day_hour_averages(self, windows):
+        """
+        Average utilization per window, day of week and hour: an array of
+        shape (windows, 7, 24), NaN outside each window or where it has no data.
+        """
+        date_mask, hour_mask = self.masks(windows)
+        days = np.eye(7)[self.day_of_week]  # (dates, 7) one-hot day of week
+
+        weights = date_mask.astype(float)
+        totals = np.einsum('wd,dk,dh->wkh', weights, days, self.totals)
+        counts = np.einsum('wd,dk,dh->wkh', weights, days, self.counts)
+        counts[~hour_mask[:, None, :].repeat(7, axis=1)] = 0
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / counts, np.nan)
+
+    def evaluate(self, windows):
+        """
+        Evaluate windows in one pass over the cube.
+
+        Returns a DataFrame with one row per window: average utilization,
+        the lowest (day, hour) inside it, and the revenue opportunity under
+        the window's court count, price and fill rate (same formulas as
+        analyze_shadow_market()).
+        """
+        date_mask, hour_mask = self.masks(windows)
+        weights = date_mask.astype(float)
+
+        # (windows, 24) sums over the included dates, then over the included hours
+        totals = (weights @ self.totals * hour_mask).sum(axis=1)
+        counts = (weights @ self.counts * hour_mask).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = np.where(counts > 0, totals / counts, np.nan)
+
+        averages = self.day_hour_averages(windows)
+        flat = averages.reshape(len(windows), -1)
+        has_data = ~np.isnan(flat).all(axis=1)
+        lowest = np.where(has_data, np.nanargmin(np.where(np.isnan(flat), np.inf, flat), axis=1), 0)
+
+        capacity = np.array([w.weekly_capacity for w in windows], dtype=float)
+        empty = capacity * (100 - avg) / 100
+        fillable = empty * np.array([w.fill_rate for w in windows])
+        weekly = fillable * np.array([w.price_per_hour for w in windows])
+
+        return pd.DataFrame({
+            'window': [w.name for w in windows],
+            'days': [w.day_label() for w in windows],
+            'hours': [f"{w.start_hour}:00-{w.end_hour}:00" for w in windows],
+            'dates': date_mask.sum(axis=1),
+            'avg_utilization': avg,
+            'lowest_day': [DAY_NAMES[i // 24] if ok else None for i, ok in zip(lowest, has_data)],
+            'lowest_hour': [int(i % 24) if ok else None for i, ok in zip(lowest, has_data)],
+            'lowest_utilization': np.where(has_data, flat[np.arange(len(windows)), lowest], np.nan),
+            'empty_court_hours_per_week': empty,
+            'fillable_capacity': fillable,
+            'weekly_revenue_opportunity': weekly,
+            'annual_revenue_opportunity': weekly * WEEKS_PER_YEAR,
+        })
+
+    def by_day_hour(self, window):
+        """Return {(day_of_week, hour): average utilization} for one window."""
+        averages = self.day_hour_averages([window])[0]
+        return {(day, hour): averages[day, hour]
+                for day in window.days for hour in window.hours
+                if not np.isnan(averages[day, hour])}
+
+
+def main():
+    """Scan candidate windows and print the emptiest ones."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--start', help='first date to include (YYYY-MM-DD)')
+    parser.add_argument('--end', help='date to stop before (YYYY-MM-DD)')
+    parser.add_argument('--top', type=int, default=15, help='windows to list')
+    parser.add_argument('--courts', type=int, default=SHADOW_MARKET.courts)
+    parser.add_argument('--price', type=float, default=SHADOW_MARKET.price_per_hour, help='$ per court-hour')
+    parser.add_argument('--exclude-holidays', action='store_true', help='leave out US federal holidays')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("COURT UTILIZATION WINDOW SCAN")
+    print("=" * 80)
+
+    cube = UtilizationCube.load(args.start, args.end)
+    print(f"\nCube: {len(cube.dates)} dates × 24 hours "
+          f"({cube.dates.min():%Y-%m-%d} to {cube.dates.max():%Y-%m-%d})")
+
+    settings = dict(courts=args.courts, price_per_hour=args.price, exclude_holidays=args.exclude_holidays)
+    shadow_market = Window(SHADOW_MARKET.name, **settings)
+    windows = [shadow_market] + candidate_windows(**settings)
+    results = cube.evaluate(windows)
+    print(f"Evaluated {len(windows)} windows")
+
+    shadow = results.iloc[0]
+    print(f"\n{shadow_market.name} ({shadow_market.describe()}): {shadow['avg_utilization']:.1f}% utilized, "
+          f"${shadow['annual_revenue_opportunity']:,.0f}/year opportunity")
+
+    print(f"\n{args.top} least utilized candidate windows:")
+    print(f"   {'Window':28s} {'Avg':>6} {'Lowest hour':>22} {'Opportunity':>14}")
+    for _, row in results.iloc[1:].nsmallest(args.top, 'avg_utilization').iterrows():
+        lowest = f"{row['lowest_day'][:3]} {row['lowest_hour']}:00 ({row['lowest_utilization']:.1f}%)"
+        opportunity = f"${row['annual_revenue_opportunity']:,.0f}/yr"
+        print(f"   {row['window']:28s} {row['avg_utilization']:>5.1f}% {lowest:>22} {opportunity:>14}")
+
+
+if __name__ == '__main__':
+    main()